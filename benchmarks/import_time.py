@@ -0,0 +1,71 @@
+"""
+Import time benchmark for ytinspector.
+
+Every module is imported in a fresh interpreter, several times, and the best and median wall time are reported
+together with any heavy dependency the import pulled in. Exits with status 1 when an import is slower than
+--budget or loads a module listed in DEFERRED, so it can guard against regressions in CI.
+
+	python benchmarks/import_time.py
+	python benchmarks/import_time.py --runs 20 --budget 150 ytinspector.youtube
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ('ytinspector', 'ytinspector.youtube', 'ytinspector.ytanalytics')
+
+# dependencies that must only be imported once a service is built or a request is sent
+DEFERRED = (
+	'google_auth_oauthlib', 'googleapiclient.discovery', 'googleapiclient.http', 'google.auth.transport.requests',
+	'google_auth_httplib2', 'httplib2', 'requests', 'asyncio',
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [name for name in {deferred!r} if name in sys.modules]}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module, runs):
+	"""Import module in runs fresh interpreters. Returns (timings in ms, deferred modules it loaded)"""
+	timings = []
+	loaded = set()
+	env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+	for _ in range(runs):
+		output = subprocess.run(
+			[sys.executable, '-c', PROBE.format(module=module, deferred=DEFERRED)],
+			env=env, check=True, capture_output=True, text=True
+		).stdout
+		result = json.loads(output.splitlines()[-1])
+		timings.append(result['ms'])
+		loaded.update(result['loaded'])
+	return timings, sorted(loaded)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument('modules', nargs='*', default=MODULES)
+	parser.add_argument('--runs', type=int, default=10)
+	parser.add_argument('--budget', type=float, default=200.0, help='Maximum median import time in milliseconds.')
+	args = parser.parse_args()
+
+	failed = False
+	print('{0:<28} {1:>9} {2:>9}  {3}'.format('module', 'best ms', 'median ms', 'deferred modules loaded'))
+	for module in args.modules:
+		timings, loaded = measure(module, args.runs)
+		median = statistics.median(timings)
+		print('{0:<28} {1:>9.1f} {2:>9.1f}  {3}'.format(module, min(timings), median, ', '.join(loaded) or '-'))
+		failed = failed or median > args.budget or bool(loaded)
+	return 1 if failed else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
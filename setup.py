@@ -14,9 +14,15 @@ setup(
     author_email='jiejenn@learndataanalysis.org',
     version='1.0.1',
     keywords=['YouTube', 'YouTube Scraper'],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     install_requires=['google-auth>=1.12.0', 'google-auth-oauthlib>=0.4.1', 'google-api-python-client>=2.41.0',
                       'google-api-python-client>=2.41.0'],
+    extras_require={
+        'async': ['httpx>=0.23.0'],
+        'numpy': ['numpy'],
+        'pandas': ['numpy', 'pandas'],
+        'arrow': ['numpy', 'pyarrow'],
+    },
     packages=['ytinspector'],
     license='MIT'
 )    
@@ -0,0 +1,131 @@
+import json
+from email.parser import Parser
+from urllib.parse import urlparse, parse_qs
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+
+
+class FakeHttp:
+	"""
+	In-process transport for googleapiclient: every request, including the parts of a batch request,
+	is answered by handler(resource, params), which returns (status, body). Requests are recorded in calls,
+	and the headers of each (non-batch) request in headers.
+	"""
+	def __init__(self, handler):
+		self.handler = handler
+		self.calls = []
+		self.headers = []
+		self.batches = 0
+
+	def _answer(self, uri):
+		url = urlparse(uri)
+		params = {name: values[0] for name, values in parse_qs(url.query).items()}
+		resource = url.path.rsplit('/', 1)[-1]
+		self.calls.append((resource, params))
+		return self.handler(resource, params)
+
+	def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+		if urlparse(uri).path.startswith('/batch'):
+			return self._batch(body, headers)
+		self.headers.append(dict(headers or {}))
+		status, data = self._answer(uri)
+		return httplib2.Response({'status': str(status), 'content-type': 'application/json'}), json.dumps(data).encode()
+
+	def _batch(self, body, headers):
+		self.batches += 1
+		message = Parser().parsestr('content-type: {0}\r\n\r\n{1}'.format(headers['content-type'], body))
+		parts = []
+		for part in message.get_payload():
+			method, uri, _ = part.get_payload().split('\n')[0].split(' ')
+			status, data = self._answer(uri)
+			parts.append(
+				'--BOUNDARY\r\nContent-Type: application/http\r\nContent-ID: <response-{0}>\r\n\r\n'
+				'HTTP/1.1 {1} X\r\nContent-Type: application/json\r\n\r\n{2}\r\n'.format(part['Content-ID'].strip('<>'), status, json.dumps(data))
+			)
+		content = ''.join(parts) + '--BOUNDARY--'
+		return httplib2.Response({'status': '200', 'content-type': 'multipart/mixed; boundary=BOUNDARY'}), content.encode()
+
+
+class Clock:
+	"""Stand-in for the time module whose time() only moves when advanced"""
+	def __init__(self, now=1000000.0):
+		self.now = now
+
+	def time(self):
+		return self.now
+
+	def advance(self, seconds):
+		self.now += seconds
+
+
+def video(video_id):
+	return {
+		'id': video_id,
+		'snippet': {'title': video_id, 'channelId': 'UC1', 'channelTitle': 'Channel', 'publishedAt': '2022-01-01T00:00:00Z'},
+		'contentDetails': {'duration': 'PT1M2S'},
+		'statistics': {'viewCount': '10', 'likeCount': '1', 'commentCount': '2'},
+	}
+
+
+def page(items, params, size):
+	"""One page of items, paged with numeric page tokens"""
+	start = int(params.get('pageToken', 0))
+	response = {'etag': 'page-{0}'.format(start), 'pageInfo': {'totalResults': len(items)}, 'items': items[start: start + size]}
+	if start + size < len(items):
+		response['nextPageToken'] = str(start + size)
+	return response
+
+
+def comment(comment_id, published_at, updated_at=None, parent_id=None):
+	snippet = {
+		'textDisplay': 'text of ' + comment_id, 'authorDisplayName': 'author', 'authorChannelUrl': 'http://www.youtube.com/channel/UCa',
+		'likeCount': 0, 'publishedAt': published_at, 'updatedAt': updated_at or published_at,
+	}
+	if parent_id is not None:
+		snippet['parentId'] = parent_id
+	return {'id': comment_id, 'snippet': snippet}
+
+
+def comment_thread(thread_id, published_at, updated_at=None, reply_count=0, replies=(), video_id='v1'):
+	thread = {'id': thread_id, 'snippet': {
+		'videoId': video_id, 'channelId': 'UC1', 'totalReplyCount': reply_count,
+		'topLevelComment': comment(thread_id, published_at, updated_at),
+	}}
+	if replies:
+		thread['replies'] = {'comments': list(replies)}
+	return thread
+
+
+def videos_handler(resource, params):
+	return 200, {'items': [video(video_id) for video_id in params['id'].split(',')]}
+
+
+def report_handler(resource, params):
+	return 200, {
+		'columnHeaders': [{'name': 'day', 'dataType': 'STRING'}, {'name': 'views', 'dataType': 'INTEGER'}],
+		'rows': [[params['startDate'], 5]],
+	}
+
+
+def _serviceFactory(monkeypatch, api, version, default_handler):
+	def make(handler=default_handler):
+		http = FakeHttp(handler)
+		# requests made from worker threads use a per-thread transport
+		for module in ('ytinspector.youtube', 'ytinspector.ytanalytics'):
+			monkeypatch.setattr(module + '.build_thread_http', lambda service: http)
+		return build(api, version, http=http, static_discovery=True), http
+	return make
+
+
+@pytest.fixture
+def youtube_service(monkeypatch):
+	"""Factory of a youtube v3 service whose requests are answered by a handler"""
+	return _serviceFactory(monkeypatch, 'youtube', 'v3', videos_handler)
+
+
+@pytest.fixture
+def analytics_service(monkeypatch):
+	"""Factory of a youtubeAnalytics v2 service whose requests are answered by a handler"""
+	return _serviceFactory(monkeypatch, 'youtubeAnalytics', 'v2', report_handler)
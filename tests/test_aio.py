@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from conftest import comment_thread, page, video
+from ytinspector.exceptions import QuotaExceeded, YouTubeException, YTAnalyticsException
+from ytinspector.quota import QuotaLedger
+from ytinspector.retry import RetryPolicy
+
+httpx = pytest.importorskip('httpx')
+from ytinspector.aio import AsyncTransport, AsyncYouTube, AsyncYTAnalytics
+
+THREADS = [comment_thread('t{0}'.format(i), '2022-01-01T00:{0:02d}:00Z'.format(59 - i)) for i in range(5)]
+UPLOADS = [{'contentDetails': {'videoId': 'v{0}'.format(i)}} for i in range(120)]
+
+
+def _mockTransport(handler, calls):
+	"""httpx transport answering every request with handler(resource, params) -> (status, body), like FakeHttp"""
+	def respond(request):
+		resource = request.url.path.rsplit('/', 1)[-1]
+		params = dict(request.url.params)
+		calls.append((resource, params))
+		result = handler(resource, params)
+		if isinstance(result, Exception):
+			raise result
+		status, body = result
+		return httpx.Response(status, json=body)
+	return httpx.MockTransport(respond)
+
+
+def _client(cls, service_factory, handler, **options):
+	client = cls('client-secret.json', retry=RetryPolicy(max_retries=2, base_delay=0), **options)
+	client.service, _ = service_factory()
+	calls = []
+	client.transport = AsyncTransport(http_transport=_mockTransport(handler, calls))
+	return client, calls
+
+
+def _run(client, coroutine):
+	async def main():
+		async with client:
+			return await coroutine
+	return asyncio.run(main())
+
+
+def _error(status, reason):
+	return status, {'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}}
+
+
+def _channelHandler(resource, params):
+	if resource == 'channels':
+		return 200, {'pageInfo': {'totalResults': 1}, 'items': [{'contentDetails': {'relatedPlaylists': {'uploads': 'UU1'}}}]}
+	if resource == 'playlistItems':
+		return 200, page(UPLOADS, params, 50)
+	return 200, {'items': [video(video_id) for video_id in params['id'].split(',')]}
+
+
+def test_comments_are_paginated(youtube_service):
+	yt, calls = _client(AsyncYouTube, youtube_service, lambda resource, params: (200, page(THREADS, params, 2)))
+	comments = _run(yt, yt.retrieveVideoComments('v1'))
+	assert [comment.comment_thread_id for comment in comments] == ['t0', 't1', 't2', 't3', 't4']
+	assert [params.get('pageToken') for resource, params in calls] == [None, '2', '4']
+
+
+def test_channel_videos_are_paginated_and_hydrated_in_order(youtube_service):
+	yt, calls = _client(AsyncYouTube, youtube_service, _channelHandler)
+	videos = _run(yt, yt.retrieveChannelVideos('UC1'))
+	assert [v['id'] for v in videos] == ['v{0}'.format(i) for i in range(120)]
+	assert [resource for resource, params in calls].count('playlistItems') == 3
+	assert [resource for resource, params in calls].count('videos') == 3
+
+
+def test_transient_errors_are_retried(youtube_service):
+	failures = [_error(503, 'backendError'), httpx.ConnectError('connection reset')]
+
+	def handler(resource, params):
+		return failures.pop(0) if failures else (200, {'items': [{'id': '1', 'snippet': {'title': 'Film & Animation'}}]})
+
+	yt, calls = _client(AsyncYouTube, youtube_service, handler)
+	assert _run(yt, yt.retrieveVideoCategoriesList()) == {'1': 'Film & Animation'}
+	assert len(calls) == 3
+	assert yt.executor.stats()['retried_statuses'] == {503: 1, 'ConnectionError': 1}
+
+
+def test_http_errors_are_mapped_to_client_exceptions(youtube_service, analytics_service):
+	yt, calls = _client(AsyncYouTube, youtube_service, lambda resource, params: _error(400, 'invalidParameter'))
+	with pytest.raises(YouTubeException) as error:
+		_run(yt, yt.retrieveVideoCategoriesList())
+	assert isinstance(error.value.__cause__, HttpError)
+
+	yt, calls = _client(AsyncYouTube, youtube_service, lambda resource, params: _error(403, 'commentsDisabled'))
+	with pytest.raises(HttpError) as error:
+		_run(yt, yt.retrieveVideoComments('v1'))
+	assert error.value.resp.status == 403
+	# not a transient error: sent once
+	assert len(calls) == 1
+
+	yt_analytics, calls = _client(AsyncYTAnalytics, analytics_service, lambda resource, params: _error(400, 'badRequest'))
+	with pytest.raises(YTAnalyticsException):
+		_run(yt_analytics, yt_analytics.query('2022-01-01', '2022-01-10', ['views'], ['day']))
+
+
+def test_quota_exceeded_is_not_wrapped(youtube_service):
+	yt, calls = _client(AsyncYouTube, youtube_service, _channelHandler, ledger=QuotaLedger(daily_limit=0))
+	with pytest.raises(QuotaExceeded):
+		_run(yt, yt.retrieveChannelVideos('UC1'))
+	assert calls == []
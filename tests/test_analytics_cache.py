@@ -0,0 +1,92 @@
+import datetime
+
+from ytinspector.analytics_cache import AnalyticsDayCache
+from ytinspector.ytanalytics import YTAnalytics
+
+COUNTRIES = ('US', 'IT')
+
+
+def _days(start_date, end_date):
+	day = datetime.date.fromisoformat(start_date)
+	while day <= datetime.date.fromisoformat(end_date):
+		yield day.isoformat()
+		day += datetime.timedelta(days=1)
+
+
+def _views(day, country):
+	return int(day[-2:]) * (2 if country == 'US' else 1)
+
+
+def report_handler(resource, params):
+	"""Reports of views by day, country and/or video; without the day dimension days are summed like the API does"""
+	dimensions = params['dimensions'].split(',') if params.get('dimensions') else []
+	metrics = params['metrics'].split(',')
+	column_headers = [{'name': name, 'columnType': 'DIMENSION', 'dataType': 'STRING'} for name in dimensions]
+	column_headers += [{'name': name, 'columnType': 'METRIC', 'dataType': 'INTEGER'} for name in metrics]
+	totals = {}
+	for day in _days(params['startDate'], params['endDate']):
+		for country in COUNTRIES:
+			values = {'day': day, 'country': country, 'video': 'video-' + country}
+			key = tuple(values[name] for name in dimensions)
+			totals[key] = totals.get(key, 0) + _views(day, country)
+	return 200, {'columnHeaders': column_headers, 'rows': [list(key) + [views] for key, views in totals.items()]}
+
+
+def _client(analytics_service, tmp_path):
+	yt_analytics = YTAnalytics('client-secret.json', day_cache=AnalyticsDayCache(str(tmp_path / 'analytics.sqlite3')))
+	yt_analytics.service, http = analytics_service(report_handler)
+	return yt_analytics, http
+
+
+def test_finalized_days_are_served_from_the_cache(analytics_service, tmp_path):
+	yt_analytics, http = _client(analytics_service, tmp_path)
+	columns, rows = yt_analytics.query('2022-03-01', '2022-03-05', ['views'], ['day', 'country'])
+	assert columns == ['day', 'country', 'views']
+	assert len(rows) == 10 and len(http.calls) == 1
+
+	assert yt_analytics.query('2022-03-01', '2022-03-05', ['views'], ['day', 'country']) == (columns, rows)
+	assert len(http.calls) == 1
+
+	# only the days missing from the cache are fetched
+	columns, rows = yt_analytics.query('2022-03-04', '2022-03-08', ['views'], ['day', 'country'])
+	assert [row[0] for row in rows[::2]] == list(_days('2022-03-04', '2022-03-08'))
+	assert (http.calls[-1][1]['startDate'], http.calls[-1][1]['endDate']) == ('2022-03-06', '2022-03-08')
+	assert yt_analytics.day_cache.stats() == {'days_served': 7, 'days_fetched': 8}
+
+
+def test_recent_days_are_always_fetched(analytics_service, tmp_path):
+	yt_analytics, http = _client(analytics_service, tmp_path)
+	today = datetime.date.today()
+	start_date = (today - datetime.timedelta(days=6)).isoformat()
+	yt_analytics.query(start_date, today.isoformat(), ['views'], ['day'])
+	yt_analytics.query(start_date, today.isoformat(), ['views'], ['day'])
+	assert len(http.calls) == 2
+	refetched = http.calls[-1][1]
+	assert refetched['startDate'] > start_date and refetched['endDate'] == today.isoformat()
+
+
+def test_rollup_sums_daily_partitions(analytics_service, tmp_path):
+	yt_analytics, http = _client(analytics_service, tmp_path)
+	plan = yt_analytics.day_cache.plan({'metrics': 'views', 'dimensions': 'country', 'startDate': '2022-03-01', 'endDate': '2022-03-03', 'sort': '-views'})
+	assert plan.rollup and plan.fetches == [{'metrics': 'views', 'dimensions': 'day,country', 'startDate': '2022-03-01', 'endDate': '2022-03-03'}]
+
+	columns, rows = yt_analytics.query('2022-03-01', '2022-03-03', ['views'], ['country'], sort_by='views', max_results=1)
+	assert columns == ['country', 'views']
+	assert rows == [['IT', 6]]
+	assert http.calls[0][1]['dimensions'] == 'day,country'
+	assert 'sort' not in http.calls[0][1]
+
+	# the daily partitions stored by the rollup also serve the day report
+	columns, rows = yt_analytics.query('2022-03-01', '2022-03-03', ['views'], ['day', 'country'])
+	assert len(http.calls) == 1 and len(rows) == 6
+
+
+def test_ranked_reports_pass_through_unchanged(analytics_service, tmp_path):
+	yt_analytics, http = _client(analytics_service, tmp_path)
+	for dimensions in ('video', 'day,video'):
+		assert yt_analytics.day_cache.plan({'metrics': 'views', 'dimensions': dimensions, 'startDate': '2022-03-01', 'endDate': '2022-03-03'}) is None
+
+	columns, rows = yt_analytics.query('2022-03-01', '2022-03-03', ['views'], ['day', 'video'], sort_by='-views', max_results=10)
+	assert columns == ['day', 'video', 'views']
+	params = http.calls[0][1]
+	assert (params['startDate'], params['endDate'], params['sort'], params['maxResults']) == ('2022-03-01', '2022-03-03', '-views', '10')
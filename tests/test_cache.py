@@ -0,0 +1,71 @@
+import pytest
+
+from conftest import Clock
+from ytinspector.cache import MemoryCache, SQLiteCache
+
+METHOD = 'youtube.videos.list'
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_cache(request, tmp_path, monkeypatch):
+	"""Factory of each cache backend, on a clock advanced by the tests"""
+	clock = Clock()
+	monkeypatch.setattr('ytinspector.cache.time', clock)
+	caches = []
+
+	def make(**options):
+		if request.param == 'memory':
+			cache = MemoryCache(**options)
+		else:
+			cache = SQLiteCache(str(tmp_path / 'cache{0}.sqlite3'.format(len(caches))), **options)
+		caches.append(cache)
+		return cache, clock
+
+	yield make
+	for cache in caches:
+		if isinstance(cache, SQLiteCache):
+			cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(make_cache):
+	cache, clock = make_cache(max_entries=2)
+	cache.set('a', METHOD, {'id': 'a'})
+	clock.advance(1)
+	cache.set('b', METHOD, {'id': 'b'})
+	clock.advance(1)
+	# reading a makes b the least recently used entry
+	assert cache.get('a') == {'id': 'a'}
+	clock.advance(1)
+	cache.set('c', METHOD, {'id': 'c'})
+
+	assert cache.get('b') is None
+	assert cache.get('a') == {'id': 'a'}
+	assert cache.get('c') == {'id': 'c'}
+	assert cache.stats()['evictions'] == 1
+	assert len(cache) == 2
+
+
+def test_entries_expire_after_their_endpoint_ttl(make_cache):
+	cache, clock = make_cache(default_ttl=10, ttls={METHOD: 60})
+	cache.set('video', METHOD, {'id': 'v1'})
+	cache.set('other', 'youtube.unknown.list', {'id': 'x'})
+
+	clock.advance(30)
+	assert cache.get('video') == {'id': 'v1'}
+	assert cache.get('other') is None
+	clock.advance(31)
+	assert cache.get('video') is None
+	# expired entries are kept for revalidation
+	assert cache.lookup('video') == ({'id': 'v1'}, False)
+
+	cache.revalidate('video', METHOD, {'id': 'v1'})
+	assert cache.lookup('video') == ({'id': 'v1'}, True)
+	stats = cache.stats()
+	assert (stats['hits'], stats['revalidations']) == (2, 1)
+
+
+def test_zero_ttl_disables_caching(make_cache):
+	cache, clock = make_cache(ttls={METHOD: 0})
+	cache.set('video', METHOD, {'id': 'v1'})
+	assert cache.lookup('video') is None
+	assert len(cache) == 0
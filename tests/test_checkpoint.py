@@ -0,0 +1,67 @@
+import json
+import os
+
+from conftest import page, comment_thread
+from ytinspector.checkpoint import Checkpoint
+from ytinspector.youtube import YouTube
+
+THREADS = [comment_thread('t{0}'.format(i), '2022-01-01T00:{0:02d}:00Z'.format(59 - i)) for i in range(6)]
+
+
+def _client(youtube_service):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(lambda resource, params: (200, page(THREADS, params, 2)))
+	return yt, http
+
+
+def test_saves_every_few_pages(tmp_path):
+	checkpoint = Checkpoint(str(tmp_path / 'crawl.json'), every=2)
+	assert checkpoint.start('key') == (None, [])
+
+	checkpoint.update({'items': [1], 'nextPageToken': 'a'})
+	assert not os.path.exists(checkpoint.path)
+	checkpoint.update({'items': [2], 'nextPageToken': 'b'})
+	with open(checkpoint.path) as f:
+		assert json.load(f) == {'key': 'key', 'page_token': 'b', 'items': [1, 2]}
+
+	# another crawl does not pick up the saved progress
+	assert Checkpoint(checkpoint.path).start('other key', resume=True) == (None, [])
+	assert Checkpoint(checkpoint.path).start('key', resume=True) == ('b', [1, 2])
+	assert Checkpoint(checkpoint.path).start('key') == (None, [])
+
+	checkpoint.complete()
+	assert not os.path.exists(checkpoint.path)
+
+
+def test_interrupted_crawl_resumes_from_saved_page_token(youtube_service, tmp_path):
+	path = str(tmp_path / 'comments.json')
+	yt, http = _client(youtube_service)
+
+	comments = yt.iterVideoComments('v1', checkpoint=Checkpoint(path, every=1))
+	interrupted = [next(comments).comment_thread_id for _ in range(3)]
+	comments.close()
+	assert interrupted == ['t0', 't1', 't2']
+	with open(path) as f:
+		assert json.load(f)['page_token'] == '4'
+
+	yt, http = _client(youtube_service)
+	resumed = [c.comment_thread_id for c in yt.iterVideoComments('v1', checkpoint=Checkpoint(path, every=1), resume=True)]
+	# the saved pages come first, then only the rest of the crawl is fetched
+	assert resumed == ['t0', 't1', 't2', 't3', 't4', 't5']
+	assert [params.get('pageToken') for resource, params in http.calls] == ['4']
+	assert not os.path.exists(path)
+
+
+def test_completed_crawl_removes_checkpoint(youtube_service, tmp_path):
+	path = str(tmp_path / 'comments.json')
+	yt, http = _client(youtube_service)
+
+	comments = yt.retrieveVideoComments('v1', checkpoint=Checkpoint(path, every=1))
+	assert len(comments) == 6
+	assert len(http.calls) == 3
+	assert not os.path.exists(path)
+
+	# nothing left to resume: the next crawl starts from page 1
+	yt, http = _client(youtube_service)
+	assert len(yt.retrieveVideoComments('v1', checkpoint=path, resume=True)) == 6
+	assert http.calls[0][1].get('pageToken') is None
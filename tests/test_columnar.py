@@ -0,0 +1,93 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+from conftest import video
+from ytinspector.columnar import MISSING, VIDEO_FEATURES, parse_durations, to_numpy, video_features
+from ytinspector.records import to_compact_video
+
+
+def _videos():
+	hidden = video('v2')
+	hidden['contentDetails']['duration'] = 'P0D'
+	# the channel hides the like count; statistics not requested at all
+	del hidden['statistics']['likeCount']
+	no_details = video('v3')
+	del no_details['contentDetails'], no_details['statistics']
+	return [video('v1'), hidden, no_details]
+
+
+def test_video_features_dtypes_and_missing_values():
+	features = video_features(_videos())
+	assert tuple(features) == VIDEO_FEATURES
+	assert features['video_id'].dtype == object
+	assert features['published_at'].dtype == np.dtype('datetime64[s]')
+	for name in VIDEO_FEATURES[2:]:
+		assert features[name].dtype == np.int64
+
+	assert list(features['video_id']) == ['v1', 'v2', 'v3']
+	assert features['published_at'][0] == np.datetime64('2022-01-01T00:00:00')
+	assert features['duration'].tolist() == [62, 0, MISSING]
+	assert features['view_count'].tolist() == [10, 10, MISSING]
+	assert features['like_count'].tolist() == [1, MISSING, MISSING]
+
+
+def test_video_features_of_compact_records():
+	videos = _videos()
+	compact = video_features([to_compact_video(v) for v in videos])
+	raw = video_features(videos)
+	for name in VIDEO_FEATURES:
+		assert compact[name].dtype == raw[name].dtype
+		assert compact[name].tolist() == raw[name].tolist()
+
+
+def test_video_features_of_no_videos():
+	features = video_features([])
+	assert all(len(column) == 0 for column in features.values())
+	assert features['duration'].dtype == np.int64
+
+
+def test_video_features_arrow():
+	pa = pytest.importorskip('pyarrow')
+	table = video_features(_videos(), output_format='arrow')
+	assert table.column_names == list(VIDEO_FEATURES)
+	assert table.schema.field('duration').type == pa.int64()
+	with pytest.raises(ValueError):
+		video_features(_videos(), output_format='rows')
+
+
+def test_parse_durations():
+	durations = parse_durations(['PT1M2S', 'P0D', 'P1D', 'PT'])
+	assert durations.dtype == np.int64
+	assert durations.tolist() == [62, 0, 86400, 0]
+
+
+HEADERS = [
+	{'name': 'day', 'dataType': 'STRING'}, {'name': 'country', 'dataType': 'STRING'},
+	{'name': 'views', 'dataType': 'INTEGER'}, {'name': 'averageViewPercentage', 'dataType': 'FLOAT'},
+]
+
+
+def test_to_numpy_dtypes():
+	columns = to_numpy(HEADERS, [['2022-01-01', 'US', 3, 41.5], ['2022-01-02', 'FR', 5, 12.0]])
+	assert {name: column.dtype for name, column in columns.items()} == {
+		'day': np.dtype('datetime64[D]'), 'country': np.dtype(object), 'views': np.dtype('int64'), 'averageViewPercentage': np.dtype('float64'),
+	}
+	assert columns['day'][1] == np.datetime64('2022-01-02')
+	assert columns['views'].tolist() == [3, 5]
+	assert to_numpy([{'name': 'month', 'dataType': 'STRING'}], [['2022-03']])['month'].dtype == np.dtype('datetime64[M]')
+
+
+def test_to_numpy_nulls():
+	columns = to_numpy(HEADERS, [['2022-01-01', 'US', 3, 41.5], [None, None, None, None]])
+	assert np.isnat(columns['day'][1])
+	assert columns['country'].tolist() == ['US', None]
+	assert columns['views'].dtype == np.int64
+	assert columns['views'].tolist() == [3, MISSING]
+	assert columns['averageViewPercentage'][0] == 41.5
+	assert np.isnan(columns['averageViewPercentage'][1])
+
+
+def test_to_numpy_of_an_empty_report():
+	columns = to_numpy(HEADERS, [])
+	assert all(len(column) == 0 for column in columns.values())
+	assert columns['views'].dtype == np.int64
@@ -0,0 +1,75 @@
+from ytinspector.comment_index import CommentIndex, tokenize
+from ytinspector.utility import VideoComment, VideoReply
+
+
+def _comment(comment_id, text, minute, author='author', video_id='v1', updated_minute=None, like_count=0, replies=None):
+	published = '2022-01-01T00:{0:02d}:00Z'.format(minute)
+	updated = '2022-01-01T00:{0:02d}:00Z'.format(updated_minute if updated_minute is not None else minute)
+	return VideoComment(
+		video_id, comment_id, text, author, 'http://www.youtube.com/channel/UC' + author, like_count, published, updated,
+		len(replies or ()), replies
+	)
+
+
+def _reply(reply_id, comment_id, text, minute):
+	timestamp = '2022-01-01T00:{0:02d}:00Z'.format(minute)
+	return VideoReply(reply_id, comment_id, text, 'replier', 'http://www.youtube.com/channel/UCreplier', 0, timestamp, timestamp)
+
+
+def _ids(records):
+	return [getattr(record, 'comment_reply_id', None) or record.comment_thread_id for record in records]
+
+
+def _index():
+	index = CommentIndex()
+	index.add([
+		_comment('c1', 'Great video about Tesla', 1),
+		_comment('c2', 'tesla <b>battery</b> range is great', 2, author='Bob'),
+		_comment('c3', 'Café &amp; cake', 3, video_id='v2', replies=[_reply('r1', 'c3', 'Tesla cafe?', 4)]),
+	])
+	return index
+
+
+def test_tokenize_strips_html_and_folds_case_and_accents():
+	assert tokenize('Café <b>TESLA</b>!') == ['cafe', 'tesla']
+	assert tokenize("don't &amp; won't") == ["don't", "won't"]
+	assert tokenize('?! ...') == []
+
+
+def test_search_requires_every_keyword_newest_first():
+	index = _index()
+	assert _ids(index.search('tesla')) == ['r1', 'c2', 'c1']
+	assert _ids(index.search('great tesla')) == ['c2', 'c1']
+	assert _ids(index.search('great cafe', match='any')) == ['r1', 'c3', 'c2', 'c1']
+	assert _ids(index.search('tesla', limit=2)) == ['r1', 'c2']
+	assert _ids(index.search('tesla', author='bob')) == ['c2']
+	assert _ids(index.search('tesla', video_id='v2')) == ['r1']
+	assert _ids(index.search(start='2022-01-01T00:02:00Z', end='2022-01-01T00:03:00Z')) == ['c3', 'c2']
+
+
+def test_query_without_terms_matches_nothing():
+	index = _index()
+	assert index.search('') == []
+	assert index.search('?!', match='any') == []
+	assert index.count('...') == 0
+	# without a query, every comment matches
+	assert len(index.search()) == 4
+
+
+def test_add_is_incremental():
+	index = _index()
+	assert index.add([_comment('c1', 'Great video about Tesla', 1)]) == 0
+	assert index.add([_comment('c1', 'Great video about Tesla', 1, like_count=5)]) == 1
+	assert index.search('video')[0].like_count == 5
+
+	# an edited comment is found by its new text only
+	assert index.add([_comment('c1', 'Great video about rockets', 1, updated_minute=9)]) == 1
+	assert _ids(index.search('tesla')) == ['r1', 'c2']
+	assert _ids(index.search('rockets')) == ['c1']
+	assert len(index) == 4
+
+	index.add([_comment('c4', 'More rockets', 5)])
+	assert _ids(index.search('rockets')) == ['c4', 'c1']
+	index.rebuild()
+	assert _ids(index.search('rockets')) == ['c4', 'c1']
+	assert dict(index.terms(50))['tesla'] == 2
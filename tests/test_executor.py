@@ -0,0 +1,143 @@
+import pytest
+from googleapiclient.errors import HttpError
+
+from conftest import Clock
+from ytinspector.cache import MemoryCache
+from ytinspector.executor import RequestExecutor
+from ytinspector.quota import QuotaLedger
+from ytinspector.records import CompactVideo
+from ytinspector.retry import RetryPolicy
+from ytinspector.youtube import YouTube
+
+
+def _videoRequests(service, count):
+	return [service.videos().list(id='v{0}'.format(i), part='snippet') for i in range(count)]
+
+
+def test_execute_batch_converts_responses_as_batches_arrive(youtube_service):
+	service, http = youtube_service()
+	converted_after_batches = []
+
+	def convert(response):
+		converted_after_batches.append(http.batches)
+		return response['items'][0]['id']
+
+	executor = RequestExecutor()
+	responses = executor.execute_batch(_videoRequests(service, 6), service.new_batch_http_request, 2, convert)
+	assert responses == ['v0', 'v1', 'v2', 'v3', 'v4', 'v5']
+	# each response is converted in the callback of its own batch, not after the last one
+	assert converted_after_batches == [1, 1, 2, 2, 3, 3]
+
+
+def test_hydrate_videos_compact(youtube_service):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service()
+	videos = yt.hydrateVideos(['v{0}'.format(i) for i in range(120)], requests_per_batch=2, compact=True)
+	assert [video.video_id for video in videos] == ['v{0}'.format(i) for i in range(120)]
+	assert all(isinstance(video, CompactVideo) for video in videos)
+	assert videos[0].duration == 62
+
+
+def _flakyHandler(failures):
+	"""videos handler answering 503 to the first failures[video_id] requests for each video"""
+	def handler(resource, params):
+		video_id = params['id']
+		if failures.get(video_id, 0) > 0:
+			failures[video_id] -= 1
+			return 503, {'error': {'code': 503, 'message': 'backendError', 'errors': [{'reason': 'backendError'}]}}
+		return 200, {'etag': 'etag-' + video_id, 'items': [{'id': video_id}]}
+	return handler
+
+
+def test_execute_batch_retries_failed_sub_requests(youtube_service):
+	service, http = youtube_service(_flakyHandler({'v1': 1, 'v3': 2}))
+	executor = RequestExecutor(retry=RetryPolicy(max_retries=3, base_delay=0))
+
+	responses = executor.execute_batch(_videoRequests(service, 4), service.new_batch_http_request)
+	assert [response['items'][0]['id'] for response in responses] == ['v0', 'v1', 'v2', 'v3']
+	# the failed sub-requests are resent together in later batches
+	assert http.batches == 3
+	stats = executor.stats()
+	assert stats['retries'] == 3
+	assert stats['retried_statuses'] == {503: 3}
+	assert stats['gave_up'] == 0
+
+
+def test_execute_batch_gives_up_after_max_retries(youtube_service):
+	service, http = youtube_service(_flakyHandler({'v0': 5}))
+	executor = RequestExecutor(retry=RetryPolicy(max_retries=2, base_delay=0))
+
+	with pytest.raises(HttpError):
+		executor.execute_batch(_videoRequests(service, 2), service.new_batch_http_request)
+	assert executor.stats()['gave_up'] == 1
+	assert [params['id'] for _, params in http.calls].count('v0') == 3
+
+
+def test_execute_batch_serves_cached_responses(youtube_service):
+	service, http = youtube_service(_flakyHandler({}))
+	ledger = QuotaLedger()
+	executor = RequestExecutor(cache=MemoryCache(), ledger=ledger)
+
+	first = executor.execute_batch(_videoRequests(service, 3), service.new_batch_http_request)
+	second = executor.execute_batch(_videoRequests(service, 3), service.new_batch_http_request)
+	assert first == second
+	assert len(http.calls) == 3
+	# cache hits are not charged
+	assert ledger.spent == 3
+
+	# only the requests missing from the cache are sent
+	executor.execute_batch(_videoRequests(service, 5), service.new_batch_http_request)
+	assert [params['id'] for _, params in http.calls[3:]] == ['v3', 'v4']
+
+
+def _etagHandler(http_holder, changed=False):
+	"""videos handler answering 304 when If-None-Match carries the current ETag"""
+	def handler(resource, params):
+		if http_holder[0].headers[-1].get('If-None-Match') == 'etag-1' and not changed:
+			return 304, {}
+		return 200, {'etag': 'etag-2' if changed else 'etag-1', 'items': [{'id': params['id']}]}
+	return handler
+
+
+def _etagClient(youtube_service, monkeypatch, changed=False):
+	clock = Clock()
+	monkeypatch.setattr('ytinspector.cache.time', clock)
+	http_holder = []
+	service, http = youtube_service(_etagHandler(http_holder, changed))
+	http_holder.append(http)
+	executor = RequestExecutor(cache=MemoryCache(ttls={'youtube.videos.list': 60}), ledger=QuotaLedger(daily_limit=100))
+	return service, http, executor, clock
+
+
+def test_expired_entry_is_revalidated_with_etag(youtube_service, monkeypatch):
+	service, http, executor, clock = _etagClient(youtube_service, monkeypatch)
+	first = executor.execute(service.videos().list(id='v1', part='snippet'))
+	assert 'If-None-Match' not in http.headers[0]
+
+	# still fresh: served from the cache without a request or a charge
+	assert executor.execute(service.videos().list(id='v1', part='snippet')) == first
+	assert len(http.calls) == 1
+	assert executor.ledger.spent == 1
+
+	clock.advance(61)
+	assert executor.execute(service.videos().list(id='v1', part='snippet')) == first
+	assert http.headers[1]['If-None-Match'] == 'etag-1'
+	# the 304 is served from the cache: one charge for the conditional request, none for the body
+	assert executor.ledger.spent == 2
+	assert executor.stats()['retries'] == 0
+	assert executor.cache.stats()['revalidations'] == 1
+
+	# the revalidated entry is fresh again
+	assert executor.execute(service.videos().list(id='v1', part='snippet')) == first
+	assert len(http.calls) == 2
+	assert executor.ledger.spent == 2
+
+
+def test_changed_resource_replaces_expired_entry(youtube_service, monkeypatch):
+	service, http, executor, clock = _etagClient(youtube_service, monkeypatch, changed=True)
+	executor.execute(service.videos().list(id='v1', part='snippet'))
+	clock.advance(61)
+	response = executor.execute(service.videos().list(id='v1', part='snippet'))
+	assert http.headers[1]['If-None-Match'] == 'etag-2'
+	assert response['etag'] == 'etag-2'
+	assert executor.cache.stats()['revalidations'] == 0
@@ -0,0 +1,35 @@
+from ytinspector.fields import AUTO, PAGE_FIELDS, resolve_fields, with_page_fields
+from ytinspector.youtube import YouTube
+
+
+def test_custom_mask_gets_page_fields():
+	assert with_page_fields('items(snippet/title)') == 'etag,nextPageToken,pageInfo/totalResults,items(snippet/title)'
+	assert with_page_fields('nextPageToken,pageInfo,items(id)') == 'etag,nextPageToken,pageInfo,items(id)'
+	# commas inside a sub-selection are not top-level selections
+	assert with_page_fields('items(etag,id)').startswith('etag,nextPageToken,')
+	assert with_page_fields('*') == '*'
+
+
+def test_resolve_fields():
+	assert resolve_fields(None, ['snippet/title']) is None
+	assert resolve_fields(AUTO, ['snippet/title']) == ','.join(PAGE_FIELDS) + ',items(snippet(title))'
+	assert resolve_fields('items(id)').endswith('items(id)')
+
+
+def test_search_with_custom_mask_keeps_paging(youtube_service):
+	def handler(resource, params):
+		start = int(params.get('pageToken', 0))
+		response = {'pageInfo': {'totalResults': 120}, 'items': [
+			{'id': {'videoId': 'v{0}'.format(i)}, 'snippet': {'title': 't', 'channelId': 'c', 'channelTitle': 'ct', 'description': '',
+			 'publishedAt': '2022-01-01T00:00:00Z', 'thumbnails': {'default': {'url': 'u'}}}}
+			for i in range(start, min(start + 50, 120))
+		]}
+		if start + 50 < 120:
+			response['nextPageToken'] = str(start + 50)
+		return 200, response
+
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(handler)
+	results = yt.searchVideos('tesla', result_limit=120, fields='items(id/videoId,snippet(title,channelId,channelTitle,description,publishedAt,thumbnails))')
+	assert len(results) == 120
+	assert all('nextPageToken' in params['fields'] and 'pageInfo/totalResults' in params['fields'] for _, params in http.calls)
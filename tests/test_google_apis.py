@@ -0,0 +1,34 @@
+import datetime
+import os
+import pickle
+
+from google.oauth2.credentials import Credentials
+
+from ytinspector import google_apis
+from ytinspector.youtube import YouTube
+
+
+def _writeToken(directory):
+	credentials = Credentials('token', expiry=datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+	os.mkdir(directory / 'token files')
+	with open(directory / 'token files' / 'token_youtube_v3None.pickle', 'wb') as f:
+		pickle.dump(credentials, f)
+
+
+def test_clients_get_their_own_service_and_transport(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	_writeToken(tmp_path)
+	google_apis.clear_credentials_cache()
+
+	first, second = YouTube('client-secret.json'), YouTube('client-secret.json')
+	first.initService()
+	loads = []
+	monkeypatch.setattr(google_apis.pickle, 'load', lambda f: loads.append(f))
+	second.initService()
+
+	assert first.service is not second.service
+	assert first.service._http is not second.service._http
+	# the second client reuses the credentials loaded by the first
+	assert loads == []
+	assert google_apis.service_credentials(first.service) is google_apis.service_credentials(second.service)
+	google_apis.clear_credentials_cache()
@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import page
+from ytinspector.exceptions import NoCommentsReturned, NoVideosReturned, SearchResultReturnsNone
+from ytinspector.pagination import iter_items, iter_pages
+from ytinspector.youtube import YouTube
+
+
+def _search_item(i):
+	return {'id': {'videoId': 'v{0}'.format(i)}, 'snippet': {
+		'title': 't', 'channelId': 'UC1', 'channelTitle': 'Channel', 'description': '',
+		'publishedAt': '2022-01-01T00:00:00Z', 'thumbnails': {'default': {'url': 'u'}},
+	}}
+
+
+def _pagedHandler(count, size=50):
+	items = [_search_item(i) for i in range(count)]
+
+	def handler(resource, params):
+		return 200, page(items, params, int(params.get('maxResults', size)))
+	return handler
+
+
+def test_iter_pages_stops_after_the_page_crossing_item_limit(youtube_service):
+	service, http = youtube_service(_pagedHandler(200))
+	pages = list(iter_pages(service.search().list, item_limit=70, part='snippet', maxResults=50))
+	# the second page crosses the limit and is still yielded in full
+	assert [len(response['items']) for response in pages] == [50, 50]
+	assert [params.get('pageToken') for _, params in http.calls] == [None, '50']
+
+
+def test_iter_pages_is_lazy_and_starts_from_a_page_token(youtube_service):
+	service, http = youtube_service(_pagedHandler(200))
+	pages = iter_pages(service.search().list, part='snippet', maxResults=50, pageToken='100')
+	assert http.calls == []
+	assert next(pages)['items'][0]['id']['videoId'] == 'v100'
+	assert len(http.calls) == 1
+	assert len(list(pages)) == 1
+
+
+def test_iter_items_walks_every_page(youtube_service):
+	service, http = youtube_service(_pagedHandler(120))
+	items = list(iter_items(service.search().list, part='snippet', maxResults=50))
+	assert [item['id']['videoId'] for item in items] == ['v{0}'.format(i) for i in range(120)]
+	assert len(http.calls) == 3
+
+
+def test_iter_search_videos_fetches_pages_on_demand(youtube_service):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(_pagedHandler(200))
+	results = yt.iterSearchVideos('tesla', result_limit=500)
+	first = [next(results) for _ in range(3)]
+	assert [result.video_id for result in first] == ['v0', 'v1', 'v2']
+	assert len(http.calls) == 1
+	assert len(yt.searchVideos('tesla', result_limit=60)) == 100
+
+
+@pytest.mark.parametrize('call, error', [
+	(lambda yt: yt.searchVideos('nothing'), SearchResultReturnsNone),
+	(lambda yt: yt.searchChannels('nothing'), SearchResultReturnsNone),
+	(lambda yt: yt.retrieveVideoComments('v1'), NoCommentsReturned),
+	(lambda yt: yt.retrieveChannelVideos('UC1'), NoVideosReturned),
+])
+def test_empty_results_raise(youtube_service, call, error):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(lambda resource, params: (200, page([], params, 50)))
+	with pytest.raises(error):
+		call(yt)
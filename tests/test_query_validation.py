@@ -0,0 +1,37 @@
+import logging
+
+import pytest
+
+from ytinspector.exceptions import InvalidQuery
+from ytinspector.ytanalytics import query_problems, unknown_names, validate_query
+
+
+@pytest.mark.parametrize('metrics, dimensions', [
+	('engagedViews', 'day'),
+	('playlistViews', 'playlist'),
+	('views', 'creatorContentType'),
+	('views', 'city'),
+])
+def test_valid_api_names_pass(metrics, dimensions):
+	assert query_problems(metrics, dimensions) == []
+	validate_query(metrics, dimensions)
+
+
+def test_unknown_names_warn_unless_strict(caplog):
+	with caplog.at_level(logging.WARNING, logger='ytinspector.ytanalytics'):
+		validate_query('views,estimatedMinutesWatchd', 'day')
+	assert 'estimatedMinutesWatched' in caplog.text
+	assert unknown_names('views', 'contry') == ["unknown dimension 'contry' (did you mean country or city?)"]
+	with pytest.raises(InvalidQuery, match='unknown metric'):
+		validate_query('views,estimatedMinutesWatchd', 'day', strict=True)
+
+
+def test_incompatible_combinations_raise():
+	with pytest.raises(InvalidQuery, match='cannot be combined'):
+		validate_query('views', 'day,month')
+	with pytest.raises(InvalidQuery, match='requires a .country. filter'):
+		validate_query('views', 'province')
+	with pytest.raises(InvalidQuery, match='only supports the metrics viewerPercentage'):
+		validate_query('views', 'ageGroup')
+	with pytest.raises(InvalidQuery, match='sort field'):
+		validate_query('views', 'day', sort='-likes')
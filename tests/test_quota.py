@@ -0,0 +1,101 @@
+import pytest
+
+from ytinspector.exceptions import QuotaExceeded
+from ytinspector.quota import QuotaLedger, QuotaScheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from ytinspector.youtube import YouTube
+
+
+def test_ledger_enforces_daily_limit():
+	ledger = QuotaLedger(daily_limit=150)
+	ledger.charge('youtube.search.list')
+	with pytest.raises(QuotaExceeded):
+		ledger.charge('youtube.search.list')
+	assert ledger.spent == 100
+	assert ledger.report()['by_endpoint'] == {'youtube.search.list': {'calls': 1, 'units': 100}}
+
+
+def test_scheduler_defers_low_priority_past_reserve():
+	ledger = QuotaLedger(daily_limit=100)
+	scheduler = QuotaScheduler(ledger, low_priority_reserve=0.5, burst=1.0)
+	scheduler.submit('high', lambda: ledger.charge('youtube.videos.list', 60) and 'done', 60, PRIORITY_HIGH)
+	scheduler.submit('low', lambda: 'never', 10, PRIORITY_LOW)
+
+	results, deferred, failed = scheduler.run()
+	assert results == {'high': 'done'}
+	assert deferred == ['low']
+	assert failed == {}
+	# deferred jobs stay queued for the next run
+	assert [job[2] for job in scheduler._jobs] == ['low']
+
+
+def test_scheduler_defers_jobs_raising_quota_exceeded():
+	ledger = QuotaLedger(daily_limit=100)
+	scheduler = QuotaScheduler(ledger, burst=1.0)
+
+	def job():
+		raise QuotaExceeded('no units left')
+
+	scheduler.submit('job', job, 1)
+	assert scheduler.run() == ({}, ['job'], {})
+	assert len(scheduler._jobs) == 1
+
+
+def test_scheduler_collects_failures_without_losing_jobs():
+	ledger = QuotaLedger(daily_limit=100)
+	scheduler = QuotaScheduler(ledger, low_priority_reserve=0.9, burst=1.0)
+	error = ValueError('broken')
+
+	def failing():
+		raise error
+
+	scheduler.submit('first', lambda: 1, 1, PRIORITY_HIGH)
+	scheduler.submit('low', lambda: 2, 20, PRIORITY_LOW)
+	scheduler.submit('failing', failing, 1, PRIORITY_NORMAL)
+	scheduler.submit('last', lambda: 3, 1, PRIORITY_NORMAL)
+
+	results, deferred, failed = scheduler.run()
+	assert results == {'first': 1, 'last': 3}
+	assert deferred == ['low']
+	assert failed == {'failing': error}
+	assert [job[2] for job in scheduler._jobs] == ['low']
+
+
+def test_scheduler_requeues_deferred_jobs_when_interrupted():
+	ledger = QuotaLedger(daily_limit=100)
+	scheduler = QuotaScheduler(ledger, low_priority_reserve=0.9, burst=1.0)
+
+	def interrupt():
+		raise KeyboardInterrupt
+
+	scheduler.submit('low', lambda: 1, 20, PRIORITY_LOW)
+	scheduler.submit('interrupt', interrupt, 1, PRIORITY_LOW)
+	with pytest.raises(KeyboardInterrupt):
+		scheduler.run()
+	assert [job[2] for job in scheduler._jobs] == ['low']
+
+
+def test_hydrate_videos_raises_quota_exceeded(youtube_service):
+	ledger = QuotaLedger(daily_limit=1)
+	yt = YouTube('client-secret.json', ledger=ledger)
+	yt.service, http = youtube_service()
+
+	with pytest.raises(QuotaExceeded):
+		yt.hydrateVideos(['v{0}'.format(i) for i in range(120)])
+	assert http.calls == []
+
+	scheduler = QuotaScheduler(ledger, burst=1.0)
+	scheduler.submit('hydrate', lambda: yt.hydrateVideos(['v{0}'.format(i) for i in range(120)]), 0, PRIORITY_HIGH)
+	assert scheduler.run() == ({}, ['hydrate'], {})
+
+
+def test_video_categories_job_is_deferred_on_quota_exceeded(youtube_service):
+	ledger = QuotaLedger(daily_limit=0)
+	yt = YouTube('client-secret.json', ledger=ledger)
+	yt.service, http = youtube_service()
+
+	with pytest.raises(QuotaExceeded):
+		yt.retrieveVideoCategoriesList()
+	scheduler = QuotaScheduler(ledger, burst=1.0)
+	scheduler.submit('categories', yt.retrieveVideoCategoriesList, 0, PRIORITY_HIGH)
+	assert scheduler.run() == ({}, ['categories'], {})
+	assert http.calls == []
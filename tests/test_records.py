@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from conftest import comment, comment_thread, video
+from ytinspector.records import CompactVideo, to_compact_video, to_compact_video_comment
+from ytinspector.utility import to_video_comment, to_video_reply
+
+
+def _thread():
+	return comment_thread('t1', '2022-01-01T00:00:00Z', reply_count=1, replies=[comment('t1.r0', '2022-01-02T00:00:00Z', parent_id='t1')])
+
+
+def _replies(thread):
+	return [to_video_reply(reply, 't1') for reply in thread['replies']['comments']]
+
+
+def test_compact_record_behaves_like_its_namedtuple():
+	thread = _thread()
+	record = to_video_comment(thread, _replies(thread))
+	compact = to_compact_video_comment(thread, _replies(thread))
+
+	assert compact._fields == record._fields
+	assert len(compact) == len(record)
+	assert compact[0] == record[0] == 'v1'
+	assert compact[-1][0].comment_reply_id == record[-1][0].comment_reply_id
+	assert compact[1:3] == record[1:3]
+	video_id, comment_thread_id, *_ = compact
+	assert (video_id, comment_thread_id) == ('v1', 't1')
+	with pytest.raises(IndexError):
+		compact[len(record)]
+
+
+def test_compact_records_hash_by_value():
+	thread = _thread()
+	first, second = to_compact_video_comment(thread, _replies(thread)), to_compact_video_comment(thread, _replies(thread))
+	assert first == second
+	assert hash(first) == hash(second)
+	assert len({first, second}) == 1
+
+	videos = {to_compact_video(video('v1')): 'seen'}
+	assert videos[to_compact_video(video('v1'))] == 'seen'
+	assert to_compact_video(video('v2')) not in videos
+
+
+def test_compact_record_pickles():
+	record = to_compact_video(video('v1'))
+	assert pickle.loads(pickle.dumps(record)) == record
+	assert record._asdict()['duration'] == 62
+	with pytest.raises(TypeError):
+		CompactVideo('v1')
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from conftest import comment, comment_thread, page
+from ytinspector.youtube import YouTube
+
+
+def _replies(thread_id, count):
+	return [comment('{0}.r{1}'.format(thread_id, i), '2022-01-02T00:00:{0:02d}Z'.format(i), parent_id=thread_id) for i in range(count)]
+
+
+def _handler(threads, reply_counts, delays=None):
+	"""commentThreads pages of threads; comments().list answers with reply_counts[parentId] replies, 2 per page"""
+	def handler(resource, params):
+		if resource == 'commentThreads':
+			return 200, page(threads, params, 100)
+		if delays:
+			time.sleep(delays.get(params['parentId'], 0))
+		return 200, page(_replies(params['parentId'], reply_counts[params['parentId']]), params, 2)
+	return handler
+
+
+def _client(youtube_service, handler, max_workers=8):
+	yt = YouTube('client-secret.json', max_workers=max_workers)
+	yt.service, http = youtube_service(handler)
+	return yt, http
+
+
+def _replyIds(comments):
+	return {c.comment_thread_id: [reply.comment_reply_id for reply in c.replies] for c in comments}
+
+
+def test_only_threads_with_missing_replies_are_fetched(youtube_service):
+	threads = [
+		comment_thread('t0', '2022-01-01T00:00:03Z'),
+		comment_thread('t1', '2022-01-01T00:00:02Z', reply_count=2, replies=_replies('t1', 2)),
+		# commentThreads embed at most 5 replies
+		comment_thread('t2', '2022-01-01T00:00:01Z', reply_count=7, replies=_replies('t2', 5)),
+	]
+	yt, http = _client(youtube_service, _handler(threads, {'t2': 7}))
+
+	comments = yt.retrieveVideoComments('v1', include_replies=True)
+	assert _replyIds(comments) == {
+		't0': [], 't1': ['t1.r0', 't1.r1'], 't2': ['t2.r{0}'.format(i) for i in range(7)],
+	}
+	assert http.calls[0][1]['part'] == 'snippet,replies'
+	assert [params['parentId'] for resource, params in http.calls if resource == 'comments'] == ['t2'] * 4
+
+
+def test_fetch_strategy_requests_replies_of_every_thread_with_replies(youtube_service):
+	threads = [
+		comment_thread('t0', '2022-01-01T00:00:02Z', reply_count=3),
+		comment_thread('t1', '2022-01-01T00:00:01Z'),
+	]
+	yt, http = _client(youtube_service, _handler(threads, {'t0': 3}))
+
+	comments = yt.retrieveVideoComments('v1', include_replies=True, reply_strategy='fetch')
+	assert _replyIds(comments) == {'t0': ['t0.r0', 't0.r1', 't0.r2'], 't1': []}
+	assert http.calls[0][1]['part'] == 'snippet'
+	assert sorted({params['parentId'] for resource, params in http.calls if resource == 'comments'}) == ['t0']
+
+
+def test_concurrent_reply_fetches_keep_thread_order(youtube_service):
+	count = 6
+	threads = [comment_thread('t{0}'.format(i), '2022-01-01T00:00:{0:02d}Z'.format(59 - i), reply_count=i + 1) for i in range(count)]
+	# the first threads answer last
+	delays = {'t{0}'.format(i): 0.01 * (count - i) for i in range(count)}
+	fetching_threads = set()
+
+	def handler(resource, params):
+		fetching_threads.add(threading.current_thread().name)
+		return _handler(threads, {'t{0}'.format(i): i + 1 for i in range(count)}, delays)(resource, params)
+
+	yt, http = _client(youtube_service, handler, max_workers=4)
+	comments = list(yt.iterVideoComments('v1', include_replies=True, reply_strategy='fetch'))
+	assert [c.comment_thread_id for c in comments] == ['t{0}'.format(i) for i in range(count)]
+	assert [len(c.replies) for c in comments] == list(range(1, count + 1))
+	assert all(reply.comment_thread_id == c.comment_thread_id for c in comments for reply in c.replies)
+	assert len(fetching_threads) > 2
@@ -0,0 +1,38 @@
+import datetime
+
+from ytinspector.sharding import merge_shards, parse_rfc_datetime, split_window, window_params
+from ytinspector.utility import SearchResultsVideo
+
+
+def _video(video_id, title, published_at):
+	return SearchResultsVideo(video_id, title, 'UC1', 'Channel', '', published_at, 'us', '', '')
+
+
+def test_parse_rfc_datetime_returns_naive_utc():
+	assert parse_rfc_datetime('2022-01-01T10:00:00Z') == datetime.datetime(2022, 1, 1, 10)
+	assert parse_rfc_datetime('2022-01-01T12:00:00+02:00') == datetime.datetime(2022, 1, 1, 10)
+
+
+def test_split_window_newest_half_first():
+	window = (datetime.datetime(2022, 1, 1), datetime.datetime(2022, 1, 2, 0, 0, 1))
+	newer, older = split_window(window)
+	assert newer == (datetime.datetime(2022, 1, 1, 12), datetime.datetime(2022, 1, 2, 0, 0, 1))
+	assert older == (datetime.datetime(2022, 1, 1), datetime.datetime(2022, 1, 1, 12))
+	assert window_params(older) == {'publishedAfter': '2022-01-01T00:00:00Z', 'publishedBefore': '2022-01-01T12:00:00Z'}
+
+
+def test_merge_shards_by_date_removes_duplicates():
+	newer = [_video('b', 'B', '2022-01-02T00:00:00Z'), _video('c', 'C', '2022-01-03T00:00:00Z')]
+	# a video published on a window boundary is returned by both windows
+	older = [_video('b', 'B', '2022-01-02T00:00:00Z'), _video('a', 'A', '2022-01-01T00:00:00Z')]
+	assert [result.video_id for result in merge_shards([newer, older], 'date')] == ['c', 'b', 'a']
+
+
+def test_merge_shards_by_title_sorts_across_shards():
+	shards = [[_video('1', 'delta', ''), _video('2', 'Alpha', '')], [_video('3', 'charlie', ''), _video('2', 'Alpha', '')]]
+	assert [result.video_title for result in merge_shards(shards, 'title')] == ['Alpha', 'charlie', 'delta']
+
+
+def test_merge_shards_interleaves_other_orders():
+	shards = [[_video('a1', '', ''), _video('a2', '', ''), _video('a3', '', '')], [_video('b1', '', ''), _video('a2', '', '')]]
+	assert [result.video_id for result in merge_shards(shards, 'viewCount')] == ['a1', 'b1', 'a2', 'a3']
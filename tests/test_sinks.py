@@ -0,0 +1,96 @@
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from ytinspector.records import CompactVideoReply
+from ytinspector.sinks import CSVSink, JSONLSink, ParquetSink, SQLiteSink, to_row
+
+
+def _rows(*values):
+	return [{'id': key, 'views': views} for key, views in values]
+
+
+def _readJSONL(path):
+	with open(path) as f:
+		return [json.loads(line) for line in f]
+
+
+def _readCSV(path):
+	with open(path, newline='') as f:
+		return [{'id': row['id'], 'views': int(row['views'])} for row in csv.DictReader(f)]
+
+
+def _readParquet(path):
+	import pyarrow.parquet
+	return pyarrow.parquet.read_table(path).to_pylist()
+
+
+@pytest.mark.parametrize('sink_class, suffix, read', [
+	(JSONLSink, '.jsonl', _readJSONL),
+	(CSVSink, '.csv', _readCSV),
+	(ParquetSink, '.parquet', _readParquet),
+])
+def test_file_sink_upsert_replaces_rows_with_the_same_key(tmp_path, sink_class, suffix, read):
+	if sink_class is ParquetSink:
+		pytest.importorskip('pyarrow')
+	path = str(tmp_path / ('videos' + suffix))
+	with sink_class(path) as sink:
+		sink.write_all(_rows(('a', 1), ('b', 2)))
+
+	with sink_class(path, batch_size=2, mode='upsert', key='id') as sink:
+		# c is written twice in the same session; only its last version is kept
+		sink.write_all(_rows(('b', 20), ('c', 3), ('c', 30)))
+	assert read(path) == _rows(('a', 1), ('b', 20), ('c', 30))
+	assert not (tmp_path / ('videos' + suffix + '.tmp')).exists()
+
+	with sink_class(path) as sink:
+		sink.write_all(_rows(('d', 4)))
+	assert read(path) == _rows(('a', 1), ('b', 20), ('c', 30), ('d', 4))
+
+	with sink_class(path, mode='overwrite') as sink:
+		sink.write_all(_rows(('e', 5)))
+	assert read(path) == _rows(('e', 5))
+
+
+def test_sqlite_sink_upsert(tmp_path):
+	path = str(tmp_path / 'videos.sqlite3')
+	with SQLiteSink(path, 'videos', mode='upsert', key='id') as sink:
+		sink.write_all(_rows(('a', 1), ('b', 2)))
+	with SQLiteSink(path, 'videos', mode='upsert', key='id') as sink:
+		sink.write_all(_rows(('b', 20), ('c', 3)))
+		# a field the table does not have yet adds a column
+		sink.write({'id': 'a', 'views': 10, 'likes': 1})
+
+	with sqlite3.connect(path) as conn:
+		assert sorted(conn.execute('SELECT id, views, likes FROM videos')) == [('a', 10, 1), ('b', 20, None), ('c', 3, None)]
+
+
+def test_upsert_requires_a_key(tmp_path):
+	with pytest.raises(ValueError):
+		JSONLSink(str(tmp_path / 'videos.jsonl'), mode='upsert')
+
+
+def test_to_row_of_compact_records():
+	reply = CompactVideoReply('r1', 't1', 'text', 'name', 'url', 0, 1, 2)
+	assert to_row(reply)['comment_reply_id'] == 'r1'
+	with pytest.raises(TypeError):
+		to_row(1)
+
+
+def test_sqlite_sink_upsert_into_a_table_written_in_append_mode(tmp_path):
+	path = str(tmp_path / 'videos.sqlite3')
+	with SQLiteSink(path, 'videos') as sink:
+		sink.write_all(_rows(('a', 1)))
+	with SQLiteSink(path, 'videos', mode='upsert', key='id') as sink:
+		sink.write_all(_rows(('a', 2), ('b', 3)))
+
+	with sqlite3.connect(path) as conn:
+		assert sorted(conn.execute('SELECT id, views FROM videos')) == [('a', 2), ('b', 3)]
+
+	with SQLiteSink(path, 'duplicates') as sink:
+		sink.write_all(_rows(('a', 1), ('a', 2)))
+	with pytest.raises(ValueError, match='same id'):
+		with SQLiteSink(path, 'duplicates', mode='upsert', key='id') as sink:
+			sink.write_all(_rows(('a', 3)))
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from ytinspector.stats_store import DAY, HIDDEN, StatsStore
+
+HOUR = 60 * 60
+
+
+def _video(video_id, views, likes=1, comments=None):
+	statistics = {'viewCount': str(views), 'likeCount': str(likes)}
+	if comments is not None:
+		statistics['commentCount'] = str(comments)
+	return {'id': video_id, 'statistics': statistics}
+
+
+def test_append_writes_only_changed_videos(tmp_path):
+	store = StatsStore(str(tmp_path))
+	assert store.append('UC1', [_video('a', 10), _video('b', 0, 0, 0)], timestamp=100) == 2
+	assert store.append('UC1', [_video('a', 10), _video('b', 5, 0, 0)], timestamp=200) == 1
+	assert store.append('UC1', [_video('a', 10), _video('b', 5, 0, 0)], timestamp=300) == 0
+	with pytest.raises(ValueError):
+		store.append('UC1', [_video('a', 11)], timestamp=250)
+
+	assert store.values_at('UC1', 150) == {
+		'a': {'viewCount': 10, 'likeCount': 1, 'commentCount': HIDDEN},
+		'b': {'viewCount': 0, 'likeCount': 0, 'commentCount': 0},
+	}
+	times, values = store.series('UC1', 'viewCount')['b']
+	assert times.tolist() == [100, 200] and values.tolist() == [0, 5]
+	assert store.change('UC1', 'viewCount', start=150) == {'a': 0, 'b': 5}
+	assert store.snapshots('UC1').tolist() == [100, 200, 300]
+
+
+def test_compact_keeps_the_last_old_snapshot_per_day(tmp_path):
+	store = StatsStore(str(tmp_path))
+	old_start = (int(time.time()) // DAY - 10) * DAY
+	# two days of hourly snapshots ten days ago, views growing every hour
+	old_times = [old_start + hour * HOUR for hour in range(48)]
+	for views, timestamp in enumerate(old_times):
+		store.append('UC1', [_video('a', views)], timestamp=timestamp)
+	recent_times = [int(time.time()) - 2 * HOUR, int(time.time()) - HOUR]
+	for views, timestamp in enumerate(recent_times, 100):
+		store.append('UC1', [_video('a', views)], timestamp=timestamp)
+	checkpoints = [old_start + DAY - 1, old_start + 2 * DAY - 1, recent_times[0], recent_times[1]]
+	before = [store.values_at('UC1', timestamp) for timestamp in checkpoints]
+
+	assert store.compact('UC1', older_than=7 * DAY, resolution=DAY) == (50, 4)
+	assert store.snapshots('UC1').tolist() == [old_times[23], old_times[47]] + recent_times
+	# values at the end of every compacted day, and every recent value, are unchanged
+	assert [store.values_at('UC1', timestamp) for timestamp in checkpoints] == before
+	times, values = store.series('UC1', 'viewCount')['a']
+	assert times.tolist() == [old_times[23], old_times[47]] + recent_times
+	assert values.tolist() == [23, 47, 100, 101]
+
+	# a store reopened from disk reads the compacted log
+	assert StatsStore(str(tmp_path)).values_at('UC1') == store.values_at('UC1')
@@ -0,0 +1,131 @@
+from conftest import comment_thread, page, videos_handler
+from ytinspector.sync import ChannelSyncState, CommentSyncState
+from ytinspector.youtube import YouTube
+
+
+def _timestamp(minute):
+	return '2022-01-01T00:{0:02d}:00Z'.format(minute)
+
+
+def _threadsHandler(threads, page_size=3):
+	def handler(resource, params):
+		assert resource == 'commentThreads'
+		return 200, page(threads, params, page_size)
+	return handler
+
+
+def _client(youtube_service, threads):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(_threadsHandler(threads))
+	return yt, http
+
+
+def _threads(count, edited=()):
+	# newest first, as listed with order=time
+	return [
+		comment_thread('c{0}'.format(i), _timestamp(i), _timestamp(50 + i) if i in edited else None)
+		for i in reversed(range(count))
+	]
+
+
+def test_first_sync_returns_every_thread(youtube_service):
+	yt, http = _client(youtube_service, _threads(10))
+	new, edited, state = yt.syncVideoComments('v1')
+	assert [c.comment_thread_id for c in new] == ['c{0}'.format(i) for i in reversed(range(10))]
+	assert edited == []
+	assert state.newest_published_at == _timestamp(9)
+
+
+def test_sync_stops_at_the_watermark(youtube_service):
+	yt, http = _client(youtube_service, _threads(10))
+	state = CommentSyncState('v1').advance(_threads(6))
+
+	new, edited, state = yt.syncVideoComments('v1', state)
+	assert [c.comment_thread_id for c in new] == ['c9', 'c8', 'c7', 'c6']
+	assert edited == []
+	# the second page reaches a known thread, so the third page is never requested
+	assert len(http.calls) == 2
+	assert state.newest_published_at == _timestamp(9)
+
+
+def test_sync_since_a_comment_id(youtube_service):
+	yt, http = _client(youtube_service, _threads(10))
+	new, edited, state = yt.syncVideoComments('v1', CommentSyncState.since('v1', comment_id='c3'))
+	assert [c.comment_thread_id for c in new] == ['c9', 'c8', 'c7', 'c6', 'c5', 'c4']
+	assert edited == []
+
+
+def test_sync_reports_edited_threads_within_the_lookback(youtube_service):
+	state = CommentSyncState('v1').advance(_threads(6))
+	yt, http = _client(youtube_service, _threads(8, edited={4}))
+	new, edited, state = yt.syncVideoComments('v1', state, edit_lookback=3)
+	assert [c.comment_thread_id for c in new] == ['c7', 'c6']
+	assert [c.comment_thread_id for c in edited] == ['c4']
+	assert state.recent_comments['c4'] == _timestamp(54)
+
+
+def test_comment_state_save_load_round_trip(tmp_path):
+	state = CommentSyncState('v1').advance(_threads(4, edited={1}))
+	path = str(tmp_path / 'state.json')
+	state.save(path)
+	loaded = CommentSyncState.load(path)
+	assert loaded.to_dict() == state.to_dict()
+	assert loaded.classify(_threads(4)[0]) == CommentSyncState.KNOWN
+	assert loaded.classify(comment_thread('c4', _timestamp(4))) == CommentSyncState.NEW
+
+
+def _upload(number):
+	return {'contentDetails': {'videoId': 'v{0}'.format(number), 'videoPublishedAt': _timestamp(number)}}
+
+
+def _uploadsHandler(uploads):
+	def handler(resource, params):
+		if resource == 'channels':
+			return 200, {'pageInfo': {'totalResults': 1}, 'items': [{'contentDetails': {'relatedPlaylists': {'uploads': 'UU1'}}}]}
+		if resource == 'playlistItems':
+			return 200, page(uploads, params, 3)
+		return videos_handler(resource, params)
+	return handler
+
+
+def test_channel_state_classifies_against_the_watermark():
+	state = ChannelSyncState('UC1').advance([_upload(5), _upload(4)], 'UU1')
+	assert (state.newest_video_id, state.newest_published_at, state.playlist_id) == ('v5', _timestamp(5), 'UU1')
+	assert state.is_known(_upload(5))
+	# older than the watermark, e.g. an upload that fell out of the remembered ids
+	assert state.is_known(_upload(1))
+	assert not state.is_known(_upload(6))
+	# a video published earlier but only just added to the uploads (e.g. made public) is recognised by id only
+	assert not state.is_known({'contentDetails': {'videoId': 'v9'}})
+
+
+def test_channel_state_remembers_the_most_recent_ids():
+	state = ChannelSyncState('UC1', recent_video_ids=['old'])
+	state = state.advance([_upload(number) for number in reversed(range(ChannelSyncState.RECENT_IDS))])
+	assert len(state.recent_video_ids) == ChannelSyncState.RECENT_IDS
+	assert state.recent_video_ids[0] == 'v{0}'.format(ChannelSyncState.RECENT_IDS - 1)
+	assert 'old' not in state.recent_video_ids
+
+
+def test_channel_state_save_load_round_trip(tmp_path):
+	state = ChannelSyncState('UC1').advance([_upload(3), _upload(2)], 'UU1')
+	path = str(tmp_path / 'channel.json')
+	state.save(path)
+	loaded = ChannelSyncState.load(path)
+	assert loaded.to_dict() == state.to_dict()
+	assert loaded.is_known(_upload(2))
+	assert not loaded.is_known(_upload(4))
+
+
+def test_sync_channel_videos_returns_only_new_uploads(youtube_service):
+	yt = YouTube('client-secret.json')
+	yt.service, http = youtube_service(_uploadsHandler([_upload(number) for number in reversed(range(8))]))
+	videos, state = yt.syncChannelVideos('UC1')
+	assert [v['id'] for v in videos] == ['v{0}'.format(number) for number in reversed(range(8))]
+
+	yt.service, http = youtube_service(_uploadsHandler([_upload(number) for number in reversed(range(10))]))
+	videos, state = yt.syncChannelVideos('UC1', state)
+	assert [v['id'] for v in videos] == ['v9', 'v8']
+	assert state.newest_video_id == 'v9'
+	# the known playlist is reused and the scan stops at the first page holding a known upload
+	assert [resource for resource, params in http.calls] == ['playlistItems', 'videos']
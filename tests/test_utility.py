@@ -0,0 +1,32 @@
+import pytest
+
+from ytinspector.utility import convert_duration
+
+
+@pytest.mark.parametrize('duration, seconds', [
+	('PT1M2S', 62),
+	('PT1H2M3S', 3723),
+	# live streams have a zero duration
+	('P0D', 0),
+	('PT0S', 0),
+	('P1D', 86400),
+	('P1DT2H', 93600),
+	('P1W', 604800),
+	('P1W2DT3H4M5S', 604800 + 2 * 86400 + 3 * 3600 + 4 * 60 + 5),
+	# missing parts
+	('PT1H', 3600),
+	('PT1H5S', 3605),
+	('PT5M', 300),
+	# fractional seconds are truncated
+	('PT1.5S', 1),
+])
+def test_convert_duration(duration, seconds):
+	assert convert_duration(duration) == seconds
+
+
+@pytest.mark.parametrize('duration', ['', 'P', 'PT', 'P1DT', '1H', 'PT1X', 'PT1S2M', None])
+def test_convert_duration_of_an_invalid_duration_is_zero(duration, caplog):
+	# results are cached: the warning is only logged the first time a duration is parsed
+	convert_duration.cache_clear()
+	assert convert_duration(duration) == 0
+	assert 'Cannot parse duration' in caplog.text
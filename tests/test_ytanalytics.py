@@ -0,0 +1,31 @@
+import pytest
+
+from ytinspector.exceptions import QuotaExceeded
+from ytinspector.quota import QuotaLedger, QuotaScheduler
+from ytinspector.ytanalytics import YTAnalytics
+
+
+def test_query_all_stitches_day_chunks(analytics_service):
+	yt_analytics = YTAnalytics('client-secret.json')
+	yt_analytics.service, http = analytics_service()
+
+	columns, rows = yt_analytics.queryAll('2022-01-01', '2022-01-10', ['views'], ['day'], chunk_days=3, max_workers=1)
+	assert columns == ['day', 'views']
+	assert [row[0] for row in rows] == ['2022-01-01', '2022-01-04', '2022-01-07', '2022-01-10']
+
+
+def test_query_all_raises_quota_exceeded(analytics_service):
+	ledger = QuotaLedger(daily_limit=0)
+	yt_analytics = YTAnalytics('client-secret.json', ledger=ledger)
+	yt_analytics.service, http = analytics_service()
+
+	def job():
+		return yt_analytics.queryAll('2022-01-01', '2022-01-10', ['views'], ['day'], chunk_days=3)
+
+	with pytest.raises(QuotaExceeded):
+		job()
+	assert http.calls == []
+
+	scheduler = QuotaScheduler(ledger, burst=1.0)
+	scheduler.submit('report', job, 4)
+	assert scheduler.run() == ({}, ['report'], {})
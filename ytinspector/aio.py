@@ -0,0 +1,380 @@
+import asyncio
+import datetime
+from itertools import takewhile
+
+import httplib2
+
+from .exceptions import YouTubeException, YTAnalyticsException
+from .checkpoint import as_checkpoint, checkpoint_key
+from .fields import converter_fields, fields_mask, resolve_fields
+from .google_apis import service_credentials
+from .pagination import aiter_pages, aiter_items
+from .sharding import parse_rfc_datetime, split_window, window_params, merge_shards
+from .sync import ChannelSyncState
+from .utility import to_video_reply
+from .youtube import YouTube
+from .ytanalytics import YTAnalytics
+
+
+class AsyncTransport:
+	"""
+	Pooled asyncio HTTP transport (httpx) that executes googleapiclient requests.
+	Requests are still built by the discovery service; only the network round trip is asynchronous.
+	"""
+	def __init__(self, credentials=None, max_connections=100, timeout=60, http_transport=None):
+		"""
+		:param credentials: google.auth credentials used to authorize requests.
+		:param max_connections: Maximum number of pooled connections (and requests in flight).
+		:param timeout: Request timeout in seconds.
+		:param http_transport: httpx transport requests are sent with instead of the network (e.g. httpx.MockTransport).
+		"""
+		try:
+			import httpx
+		except ImportError:
+			raise ImportError('The asyncio clients require httpx. Install it with: pip install ytinspector[async]')
+
+		self._transport_error = httpx.TransportError
+		self.credentials = credentials
+		self.max_connections = max_connections
+		self._client = httpx.AsyncClient(
+			limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+			timeout=httpx.Timeout(timeout, pool=None),
+			transport=http_transport
+		)
+		self._refresh_lock = None
+
+	async def _refreshCredentials(self, force=False):
+		if self._refresh_lock is None:
+			self._refresh_lock = asyncio.Lock()
+		async with self._refresh_lock:
+			if force or not self.credentials.valid:
+				# google-auth refresh is blocking; keep it off the event loop
+				from google.auth.transport.requests import Request
+				loop = asyncio.get_event_loop()
+				await loop.run_in_executor(None, self.credentials.refresh, Request())
+
+	async def send(self, request, force_refresh=False):
+		"""
+		Send a googleapiclient HttpRequest.
+		Returns (httplib2.Response, content) so the request's own postproc can be applied.
+		"""
+		headers = dict(request.headers)
+		if self.credentials is not None:
+			if force_refresh or not self.credentials.valid:
+				await self._refreshCredentials(force_refresh)
+			self.credentials.apply(headers)
+
+		try:
+			response = await self._client.request(request.method, request.uri, headers=headers, content=request.body)
+		except self._transport_error as e:
+			# surface network failures as ConnectionError so the executor can retry them
+			raise ConnectionError(e) from e
+		if response.status_code == 401 and self.credentials is not None and not force_refresh:
+			return await self.send(request, force_refresh=True)
+
+		info = dict(response.headers)
+		info['status'] = str(response.status_code)
+		return httplib2.Response(info), response.content
+
+	async def execute(self, request):
+		resp, content = await self.send(request)
+		return request.postproc(resp, content)
+
+	async def aclose(self):
+		await self._client.aclose()
+
+
+class _AsyncClientMixin:
+	def __init__(self, client_secret_file, max_connections=100, timeout=60, **kwargs):
+		"""
+		:param max_connections: Maximum number of pooled connections (and requests in flight).
+		:param timeout: Request timeout in seconds.
+		:param kwargs: Options of the synchronous client (cache, ledger, retry, rate_limit, ...).
+		"""
+		super().__init__(client_secret_file, **kwargs)
+		self.max_connections = max_connections
+		self.timeout = timeout
+		self.transport = None
+
+	def initService(self, prefix=None):
+		super().initService(prefix)
+		self.transport = AsyncTransport(service_credentials(self.service), self.max_connections, self.timeout)
+
+	async def _execute(self, request):
+		return await self.executor.execute_async(request, self.transport)
+
+	async def aclose(self):
+		if self.transport is not None:
+			await self.transport.aclose()
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.aclose()
+
+
+class AsyncYouTube(_AsyncClientMixin, YouTube):
+	"""
+	asyncio counterpart of YouTube.
+	Retrieve/search methods are coroutines and iter* methods are async generators; arguments are the same.
+	"""
+	async def _iterPages(self, list_method, empty_error=None, item_limit=None, checkpoint=None, resume=False, **params):
+		checkpoint = as_checkpoint(checkpoint)
+		if checkpoint is not None:
+			page_token, items = checkpoint.start(checkpoint_key(list_method, params), resume)
+			if page_token:
+				yield {'items': items}
+				params['pageToken'] = page_token
+				empty_error = None
+				if item_limit is not None:
+					item_limit -= len(items)
+					if item_limit <= 0:
+						checkpoint.complete()
+						return
+
+		page_number = 0
+		async for response in aiter_pages(list_method, self._execute, item_limit=item_limit, **params):
+			if page_number == 0 and empty_error is not None and response['pageInfo']['totalResults'] == 0:
+				raise empty_error
+			page_number += 1
+			if checkpoint is not None:
+				checkpoint.update(response)
+			yield response
+
+		if checkpoint is not None:
+			checkpoint.complete()
+
+	async def _iterResults(self, pages, convert, *args):
+		async for response in pages:
+			for item in response['items']:
+				yield convert(item, *args)
+
+	async def _collect(self, results, sink=None):
+		if sink is not None:
+			count = sink.count
+			async for result in results:
+				sink.write(result)
+			sink.flush()
+			return sink.count - count
+		return [result async for result in results]
+
+	async def _retrieveCommentReplies(self, comment_threads_item, output_type='plainText'):
+		comment_replies = self._completeReplies(comment_threads_item)
+		if comment_replies is not None:
+			return comment_replies
+
+		comment_thread_id = comment_threads_item['snippet']['topLevelComment']['id']
+		return [
+			to_video_reply(comment_replies_item, comment_thread_id)
+			async for comment_replies_item in aiter_items(
+				self.service.comments().list,
+				self._execute,
+				part='snippet',
+				parentId=comment_thread_id,
+				maxResults=100,
+				textFormat=output_type,
+				fields=fields_mask(converter_fields(to_video_reply))
+			)
+		]
+
+	async def _iterComments(self, pages, convert, output_type='plainText', include_replies=False):
+		async for response_commentThreads in pages:
+			comment_threads_items = response_commentThreads['items']
+			if include_replies:
+				replies = await asyncio.gather(*[
+					self._retrieveCommentReplies(comment_threads_item, output_type) for comment_threads_item in comment_threads_items
+				])
+			else:
+				replies = [None] * len(comment_threads_items)
+			for comment_threads_item, comment_replies in zip(comment_threads_items, replies):
+				yield convert(comment_threads_item, comment_replies)
+
+	async def _syncComments(self, state, convert, output_type, include_replies, edit_lookback, item_limit, **params):
+		new_items, edited_items, scanned_items = [], [], []
+		known_count = 0
+		pages = self._iterPages(self.service.commentThreads().list, item_limit=item_limit, order='time', maxResults=100, textFormat=output_type, **params)
+		async for response in pages:
+			scanned_items.extend(response['items'])
+			known_count += self._classifyCommentThreads(state, response['items'], new_items, edited_items)
+			if known_count > edit_lookback:
+				break
+
+		async def changedPages():
+			yield {'items': new_items + edited_items}
+
+		comments = await self._collect(self._iterComments(changedPages(), convert, output_type, include_replies))
+		return comments[:len(new_items)], comments[len(new_items):], state.advance(scanned_items)
+
+	async def _iterUploadVideoIds(self, channel_id, id_type='by id', checkpoint=None, resume=False):
+		playlist_id = self._uploadsPlaylistId(await self._execute(self._channelsRequest(channel_id, id_type)))
+		pages = self._iterPages(
+			self.service.playlistItems().list, checkpoint=checkpoint, resume=resume,
+			part='contentDetails', playlistId=playlist_id, maxResults=50, fields=self.UPLOADS_FIELDS
+		)
+		async for response in pages:
+			for v in response['items']:
+				yield v['contentDetails']['videoId']
+
+	async def hydrateVideos(self, video_ids, part='snippet,contentDetails,statistics', compact=False):
+		"""
+		Retrieve video resources for a list of video ids, preserving the input order.
+		The videos().list calls (50 ids each) run concurrently over the connection pool.
+		"""
+		video_ids = list(video_ids)
+
+		async def videosPage(request):
+			return self._videosPage(await self._execute(request), compact)
+
+		pages = await asyncio.gather(*[
+			videosPage(self.service.videos().list(id=','.join(video_ids[i: i + 50]), part=part, maxResults=50))
+			for i in range(0, len(video_ids), 50)
+		])
+		return [video for page in pages for video in page]
+
+	async def iterChannelVideos(self, channel_id, id_type='by id', hydrate_chunk_size=500, checkpoint=None, resume=False, compact=False):
+		try:
+			video_ids = []
+			async for video_id in self._iterUploadVideoIds(channel_id, id_type, checkpoint, resume):
+				video_ids.append(video_id)
+				if len(video_ids) >= hydrate_chunk_size:
+					for video in await self.hydrateVideos(video_ids, compact=compact):
+						yield video
+					video_ids = []
+			for video in await self.hydrateVideos(video_ids, compact=compact):
+				yield video
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
+
+	async def retrieveChannelVideos(self, channel_id, id_type='by id', checkpoint=None, resume=False, compact=False, sink=None):
+		if sink is not None:
+			return await self._collect(self.iterChannelVideos(channel_id, id_type, checkpoint=checkpoint, resume=resume, compact=compact), sink)
+		try:
+			video_ids = [video_id async for video_id in self._iterUploadVideoIds(channel_id, id_type, checkpoint, resume)]
+			return await self.hydrateVideos(video_ids, compact=compact)
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
+
+	async def syncChannelVideos(self, channel_id, state=None, id_type='by id'):
+		state = state or ChannelSyncState(channel_id)
+		try:
+			playlist_id = state.playlist_id or self._uploadsPlaylistId(await self._execute(self._channelsRequest(channel_id, id_type)))
+			new_items = []
+			pages = self._iterPages(self.service.playlistItems().list, part='contentDetails', playlistId=playlist_id, maxResults=50, fields=self.UPLOADS_FIELDS)
+			async for response in pages:
+				page_items = list(takewhile(lambda item: not state.is_known(item), response['items']))
+				new_items.extend(page_items)
+				if len(page_items) < len(response['items']):
+					break
+			new_videos = await self.hydrateVideos([item['contentDetails']['videoId'] for item in new_items])
+			return new_videos, state.advance(new_items, playlist_id)
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
+
+	async def _iterShardedSearch(self, convert, published_after, published_before, order_by, region_code, shard_limit, min_window, fields, **params):
+		params.update(part='snippet', order=order_by, regionCode=region_code, maxResults=50, fields=resolve_fields(fields, converter_fields(convert)))
+		root_window = (
+			parse_rfc_datetime(published_after),
+			parse_rfc_datetime(published_before) if published_before else datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+		)
+
+		async def searchWindow(window):
+			splittable = window[1] - window[0] > min_window
+			results = []
+			page_number = 0
+			async for response in aiter_pages(self.service.search().list, self._execute, item_limit=shard_limit, **window_params(window), **params):
+				if splittable and page_number == 0 and response['pageInfo']['totalResults'] > shard_limit:
+					break
+				page_number += 1
+				results.extend(convert(item, region_code) for item in response['items'])
+			else:
+				if not splittable or len(results) < shard_limit:
+					return results, None
+			return None, [asyncio.ensure_future(searchWindow(half)) for half in split_window(window)]
+
+		async def collectShards(task, shards):
+			results, halves = await task
+			if halves is None:
+				shards.append(results)
+				return
+			for half in halves:
+				await collectShards(half, shards)
+
+		# every window runs concurrently; results are merged once all windows are done
+		shards = []
+		await collectShards(asyncio.ensure_future(searchWindow(root_window)), shards)
+		for result in merge_shards(shards, order_by):
+			yield result
+
+	async def retrieveVideoCategoriesList(self, region_code='us'):
+		try:
+			video_categories = {}
+			response = await self._execute(self.service.videoCategories().list(
+				part='snippet',
+				regionCode=region_code
+			))
+
+			for item in response['items']:
+				video_categories[item['id']] = item['snippet']['title']
+			return video_categories
+		except YouTubeException:
+			raise
+		except TypeError as e:
+			raise YouTubeException('Invalid region code') from e
+		except Exception as e:
+			raise YouTubeException('Error retrieving video categories') from e
+
+
+class AsyncYTAnalytics(_AsyncClientMixin, YTAnalytics):
+	"""
+	asyncio counterpart of YTAnalytics. Report methods are coroutines; arguments are the same.
+	"""
+	async def _report(self, output_format=None, **params):
+		self._validate(params)
+		plan = self.day_cache.plan(params) if self.day_cache is not None else None
+		if plan is not None:
+			reports = await asyncio.gather(*[self._reportPages(self.DAY_CACHE_PAGE_SIZE, **fetch_params) for fetch_params in plan.fetches])
+			return self._format(*self.day_cache.merge(plan, reports), output_format)
+
+		response = await self._execute(self.service.reports().query(ids='channel==MINE', **params))
+		return self._format(*self._headersRows(response), output_format)
+
+	async def query(self, *args, **kwargs):
+		try:
+			return await super().query(*args, **kwargs)
+		except YTAnalyticsException:
+			raise
+		except Exception as e:
+			raise YTAnalyticsException(e)
+
+	async def _reportPages(self, page_size, execute=None, **params):
+		column_headers, rows = [], []
+		start_index = 1
+		while True:
+			response = await self._execute(self.service.reports().query(ids='channel==MINE', startIndex=start_index, maxResults=page_size, **params))
+			column_headers, page_rows = self._headersRows(response)
+			rows.extend(page_rows)
+			if len(page_rows) < page_size:
+				return column_headers, rows
+			start_index += page_size
+
+	async def _queryAll(self, chunks, page_size, max_workers, output_format=None, **params):
+		# max_workers does not apply; chunks are bounded by the transport's connection pool
+		reports = await asyncio.gather(*[
+			self._reportPages(page_size, startDate=chunk_start, endDate=chunk_end, **params) for chunk_start, chunk_end in chunks
+		])
+		return self._format(*self._stitch(reports), output_format)
+
+	async def queryAll(self, *args, **kwargs):
+		try:
+			return await super().queryAll(*args, **kwargs)
+		except YTAnalyticsException:
+			raise
+		except Exception as e:
+			raise YTAnalyticsException(e)
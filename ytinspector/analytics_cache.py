@@ -0,0 +1,199 @@
+import datetime
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+
+from .quota import quota_day
+
+# metrics whose value over a date range is the sum of their daily values
+ADDITIVE_METRICS = {
+	'views', 'redViews', 'comments', 'likes', 'dislikes', 'shares', 'subscribersGained', 'subscribersLost',
+	'estimatedMinutesWatched', 'estimatedRedMinutesWatched', 'videosAddedToPlaylists', 'videosRemovedFromPlaylists',
+	'estimatedRevenue', 'estimatedAdRevenue', 'grossRevenue', 'estimatedRedPartnerRevenue', 'monetizedPlaybacks',
+	'adImpressions', 'annotationImpressions', 'annotationClickableImpressions', 'annotationClosableImpressions',
+	'annotationClicks', 'annotationCloses', 'cardImpressions', 'cardClicks', 'cardTeaserImpressions',
+	'cardTeaserClicks', 'playlistStarts',
+}
+
+# dimensions that can be reported together with day, so totals can be rolled up from daily partitions
+ROLLUP_DIMENSIONS = {
+	'country', 'deviceType', 'operatingSystem', 'subscribedStatus', 'liveOrOnDemand', 'youtubeProduct',
+	'insightTrafficSourceType', 'insightPlaybackLocationType', 'sharingService',
+}
+
+# dimensions of ranked reports (top videos, top playlists, traffic source details): the API requires their sort and
+# maxResults, which daily fetches do not send, so these queries are not split into days
+RANKED_DIMENSIONS = {'video', 'playlist', 'insightTrafficSourceDetail', 'insightPlaybackLocationDetail'}
+
+# parameters applied to the merged result rather than sent with the daily fetches
+RESULT_PARAMS = ('startDate', 'endDate', 'sort', 'maxResults', 'startIndex')
+
+DayCachePlan = namedtuple('DayCachePlan', ['shape', 'days', 'cached', 'fetches', 'finalized_before', 'rollup', 'sort', 'start_index', 'max_results'])
+
+
+def _dateRange(start_date, end_date):
+	day = datetime.date.fromisoformat(start_date)
+	end = datetime.date.fromisoformat(end_date)
+	while day <= end:
+		yield day.isoformat()
+		day += datetime.timedelta(days=1)
+
+def _runs(days):
+	"""Group consecutive ISO dates into (start_date, end_date) ranges"""
+	runs = []
+	for day in days:
+		if runs and datetime.date.fromisoformat(runs[-1][1]) + datetime.timedelta(days=1) == datetime.date.fromisoformat(day):
+			runs[-1][1] = day
+		else:
+			runs.append([day, day])
+	return [tuple(run) for run in runs]
+
+def _sortRows(column_headers, rows, sort):
+	"""Apply a reports sort parameter (e.g. -views,country) to rows"""
+	names = [column_header['name'] for column_header in column_headers]
+	for field in reversed(sort.split(',')):
+		descending = field.startswith('-')
+		index = names.index(field.lstrip('-'))
+		rows.sort(key=lambda row: row[index], reverse=descending)
+	return rows
+
+
+class AnalyticsDayCache:
+	"""
+	On-disk cache of YouTube Analytics report rows partitioned by (query shape, day).
+	Days older than finalized_after_days are considered final: once fetched they are served locally and only
+	the missing or recent days of a date range go to the API. Queries with a day dimension are cached as is;
+	queries without one are cached when all their metrics are additive, by fetching daily rows and summing them.
+	Other queries, including ranked reports (RANKED_DIMENSIONS, e.g. top videos), are not cacheable and go straight
+	to the API unchanged.
+	:param path: SQLite database file.
+	:param finalized_after_days: Number of most recent days that are always fetched again.
+	"""
+	def __init__(self, path='ytinspector_analytics.sqlite3', finalized_after_days=3):
+		self.path = path
+		self.finalized_after_days = finalized_after_days
+		self.days_served = 0
+		self.days_fetched = 0
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute(
+			'CREATE TABLE IF NOT EXISTS partitions (shape TEXT NOT NULL, day TEXT NOT NULL, rows TEXT NOT NULL, PRIMARY KEY (shape, day))'
+		)
+		self._conn.execute('CREATE TABLE IF NOT EXISTS headers (shape TEXT PRIMARY KEY, column_headers TEXT NOT NULL)')
+		self._conn.commit()
+
+	def plan(self, params):
+		"""
+		Plan a reports().query: which days are served locally and which date ranges must be fetched.
+		Returns None if the query cannot be served from daily partitions.
+		"""
+		dimensions = params['dimensions'].split(',') if params.get('dimensions') else []
+		metrics = params['metrics'].split(',')
+		if RANKED_DIMENSIONS & set(dimensions):
+			return None
+		rollup = 'day' not in dimensions
+		if rollup:
+			if not set(dimensions) <= ROLLUP_DIMENSIONS or not set(metrics) <= ADDITIVE_METRICS:
+				return None
+			dimensions = ['day'] + dimensions
+
+		fetch_params = {name: value for name, value in params.items() if name not in RESULT_PARAMS and value is not None}
+		fetch_params['dimensions'] = ','.join(dimensions)
+		shape = json.dumps(fetch_params, sort_keys=True)
+
+		days = list(_dateRange(params['startDate'], params['endDate']))
+		if not days:
+			return None
+		# days before finalized_before are final; the finalized_after_days most recent days are always fetched
+		finalized_before = (quota_day() - datetime.timedelta(days=self.finalized_after_days - 1)).isoformat()
+		cached = {day: rows for day, rows in self._load(shape, days[0], days[-1]).items() if day < finalized_before}
+		if cached and not self._headers(shape):
+			cached = {}
+
+		fetches = [
+			dict(fetch_params, startDate=start_date, endDate=end_date)
+			for start_date, end_date in _runs([day for day in days if day not in cached])
+		]
+		return DayCachePlan(
+			shape, days, cached, fetches, finalized_before, rollup, params.get('sort'), params.get('startIndex') or 1, params.get('maxResults')
+		)
+
+	def merge(self, plan, reports):
+		"""
+		Store the finalized days of the fetched (column_headers, rows) reports and merge them with the cached
+		days. Returns (column_headers, rows) shaped like the original query.
+		"""
+		column_headers = reports[0][0] if reports else self._headers(plan.shape)
+		day_index = [column_header['name'] for column_header in column_headers].index('day')
+
+		partitions = dict(plan.cached)
+		fetched_days = [day for fetch in plan.fetches for day in _dateRange(fetch['startDate'], fetch['endDate'])]
+		for day in fetched_days:
+			partitions[day] = []
+		for report_headers, rows in reports:
+			for row in rows:
+				partitions[row[day_index]].append(row)
+		self._store(plan.shape, column_headers, {day: partitions[day] for day in fetched_days if day < plan.finalized_before})
+		with self._lock:
+			self.days_served += len(plan.cached)
+			self.days_fetched += len(fetched_days)
+
+		rows = [row for day in plan.days for row in partitions[day]]
+		if plan.rollup:
+			column_headers, rows = self._rollup(column_headers, rows, day_index)
+		if plan.sort:
+			rows = _sortRows(column_headers, rows, plan.sort)
+		start = plan.start_index - 1
+		return column_headers, rows[start: start + plan.max_results] if plan.max_results else rows[start:]
+
+	@staticmethod
+	def _rollup(column_headers, rows, day_index):
+		"""Sum daily rows over the date range, keyed by the remaining dimensions"""
+		column_headers = column_headers[:day_index] + column_headers[day_index + 1:]
+		dimension_count = sum(1 for column_header in column_headers if column_header.get('columnType') == 'DIMENSION')
+		totals = {}
+		for row in rows:
+			row = row[:day_index] + row[day_index + 1:]
+			key = tuple(row[:dimension_count])
+			if key in totals:
+				totals[key] = [total + value for total, value in zip(totals[key], row[dimension_count:])]
+			else:
+				totals[key] = list(row[dimension_count:])
+		return column_headers, [list(key) + values for key, values in totals.items()]
+
+	def stats(self):
+		with self._lock:
+			return {'days_served': self.days_served, 'days_fetched': self.days_fetched}
+
+	def _headers(self, shape):
+		with self._lock:
+			row = self._conn.execute('SELECT column_headers FROM headers WHERE shape = ?', (shape,)).fetchone()
+		return json.loads(row[0]) if row else None
+
+	def _load(self, shape, start_date, end_date):
+		with self._lock:
+			rows = self._conn.execute(
+				'SELECT day, rows FROM partitions WHERE shape = ? AND day >= ? AND day <= ?', (shape, start_date, end_date)
+			).fetchall()
+		return {day: json.loads(day_rows) for day, day_rows in rows}
+
+	def _store(self, shape, column_headers, partitions):
+		if not partitions:
+			return
+		with self._lock:
+			self._conn.execute('INSERT OR REPLACE INTO headers (shape, column_headers) VALUES (?, ?)', (shape, json.dumps(column_headers)))
+			self._conn.executemany(
+				'INSERT OR REPLACE INTO partitions (shape, day, rows) VALUES (?, ?, ?)',
+				[(shape, day, json.dumps(day_rows)) for day, day_rows in partitions.items()]
+			)
+			self._conn.commit()
+
+	def clear(self):
+		with self._lock:
+			self._conn.execute('DELETE FROM partitions')
+			self._conn.execute('DELETE FROM headers')
+			self._conn.commit()
+
+	def close(self):
+		self._conn.close()
@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+# Seconds a cached response stays fresh, keyed by API method id
+DEFAULT_TTLS = {
+	'youtube.videoCategories.list': 24 * 60 * 60,
+	'youtube.search.list': 60 * 60,
+	'youtube.channels.list': 60 * 60,
+	'youtube.playlistItems.list': 15 * 60,
+	'youtube.videos.list': 15 * 60,
+	'youtube.commentThreads.list': 5 * 60,
+	'youtube.comments.list': 5 * 60,
+	'youtubeAnalytics.reports.query': 60 * 60,
+}
+
+
+def cache_key(request):
+	"""
+	Cache key of a googleapiclient HttpRequest: API method id plus its normalized (sorted) parameters.
+	"""
+	params = sorted(parse_qsl(urlparse(request.uri).query, keep_blank_values=True))
+	key = '{0}?{1}'.format(request.methodId, urlencode(params))
+	if request.body:
+		key += '#' + (request.body.decode() if isinstance(request.body, bytes) else request.body)
+	return key
+
+
+class ResponseCache:
+	"""
+	Response cache base class. Backends implement _load, _store, _evict and __len__.
+	:param default_ttl: Seconds a response stays fresh when its endpoint is not in ttls.
+	:param ttls: Per-endpoint TTLs keyed by API method id (e.g. youtube.search.list), merged over DEFAULT_TTLS.
+		A TTL of 0 disables caching for that endpoint.
+	:param max_entries: Size cap; least recently used entries are evicted beyond it.
+	"""
+	def __init__(self, default_ttl=300, ttls=None, max_entries=1024):
+		self.default_ttl = default_ttl
+		self.ttls = dict(DEFAULT_TTLS)
+		if ttls:
+			self.ttls.update(ttls)
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.revalidations = 0
+		self._lock = threading.RLock()
+
+	def ttl(self, method_id):
+		return self.ttls.get(method_id, self.default_ttl)
+
+	def lookup(self, key):
+		"""
+		Return (response, fresh) for key, or None if nothing is cached.
+		Expired responses are still returned (fresh=False) so they can be revalidated with their ETag.
+		"""
+		with self._lock:
+			entry = self._load(key)
+			fresh = entry is not None and entry[1] >= time.time()
+			if fresh:
+				self.hits += 1
+			else:
+				self.misses += 1
+			return None if entry is None else (entry[0], fresh)
+
+	def get(self, key):
+		"""Return the cached response for key, or None if missing or expired"""
+		entry = self.lookup(key)
+		if entry is None or not entry[1]:
+			return None
+		return entry[0]
+
+	def set(self, key, method_id, response):
+		ttl = self.ttl(method_id)
+		if not ttl:
+			return
+		with self._lock:
+			self._store(key, response, time.time() + ttl)
+			self.evictions += self._evict(self.max_entries)
+
+	def revalidate(self, key, method_id, response):
+		"""Renew the TTL of an expired response the server confirmed unchanged (304 Not Modified)"""
+		with self._lock:
+			self.revalidations += 1
+		self.set(key, method_id, response)
+
+	def stats(self):
+		with self._lock:
+			return {
+				'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations,
+				'evictions': self.evictions, 'size': len(self)
+			}
+
+	def _load(self, key):
+		"""Return (response, expires_at) and mark the entry as recently used"""
+		raise NotImplementedError
+
+	def _store(self, key, response, expires_at):
+		raise NotImplementedError
+
+	def _evict(self, max_entries):
+		"""Drop least recently used entries beyond max_entries, returning how many were dropped"""
+		raise NotImplementedError
+
+	def clear(self):
+		raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+	"""In-process LRU response cache"""
+	def __init__(self, default_ttl=300, ttls=None, max_entries=1024):
+		super().__init__(default_ttl, ttls, max_entries)
+		self._entries = OrderedDict()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def _load(self, key):
+		entry = self._entries.get(key)
+		if entry is not None:
+			self._entries.move_to_end(key)
+		return entry
+
+	def _store(self, key, response, expires_at):
+		self._entries[key] = (response, expires_at)
+		self._entries.move_to_end(key)
+
+	def _evict(self, max_entries):
+		evicted = 0
+		while len(self._entries) > max_entries:
+			self._entries.popitem(last=False)
+			evicted += 1
+		return evicted
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+	"""On-disk response cache backed by a SQLite database, shared across processes and runs"""
+	def __init__(self, path='ytinspector_cache.sqlite3', default_ttl=300, ttls=None, max_entries=100000):
+		super().__init__(default_ttl, ttls, max_entries)
+		self.path = path
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute(
+			'CREATE TABLE IF NOT EXISTS responses ('
+			'key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+		)
+		self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+		self._conn.commit()
+
+	def __len__(self):
+		return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+	def _load(self, key):
+		row = self._conn.execute('SELECT response, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+		if row is None:
+			return None
+		self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+		self._conn.commit()
+		return json.loads(row[0]), row[1]
+
+	def _store(self, key, response, expires_at):
+		self._conn.execute(
+			'INSERT OR REPLACE INTO responses (key, response, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+			(key, json.dumps(response), expires_at, time.time())
+		)
+		self._conn.commit()
+
+	def _evict(self, max_entries):
+		excess = len(self) - max_entries
+		if excess <= 0:
+			return 0
+		self._conn.execute(
+			'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)', (excess,)
+		)
+		self._conn.commit()
+		return excess
+
+	def clear(self):
+		with self._lock:
+			self._conn.execute('DELETE FROM responses')
+			self._conn.commit()
+
+	def close(self):
+		self._conn.close()
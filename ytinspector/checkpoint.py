@@ -0,0 +1,74 @@
+import json
+import os
+
+from .cache import cache_key
+
+
+def checkpoint_key(list_method, params):
+	"""Identity of a crawl: API method id plus its parameters (without the page token)"""
+	params = {name: value for name, value in params.items() if name != 'pageToken'}
+	return cache_key(list_method(**params))
+
+
+class Checkpoint:
+	"""
+	On-disk progress of a paginated crawl: the next page token and the raw items fetched so far.
+	A crawl started with resume=True continues from the saved page token instead of page 1.
+	The file is removed once the crawl runs to completion.
+	:param path: JSON file the checkpoint is written to.
+	:param every: Save after every this many pages.
+	"""
+	def __init__(self, path, every=10):
+		self.path = path
+		self.every = every
+		self.key = None
+		self.page_token = None
+		self.items = []
+		self._pages = 0
+
+	def __repr__(self):
+		return 'Checkpoint(path={0!r}, items={1}, page_token={2!r})'.format(self.path, len(self.items), self.page_token)
+
+	def start(self, key, resume=False):
+		"""
+		Begin a crawl. With resume, the saved progress of the same crawl (same key) is restored.
+		:return: Tuple(page_token, items) to continue from -- (None, []) when starting from page 1.
+		"""
+		self.key = key
+		self.page_token = None
+		self.items = []
+		self._pages = 0
+		if resume and os.path.exists(self.path):
+			with open(self.path) as f:
+				data = json.load(f)
+			if data.get('key') == key and data.get('page_token'):
+				self.page_token = data['page_token']
+				self.items = data['items']
+		return self.page_token, list(self.items)
+
+	def update(self, response):
+		"""Record a fetched page, saving to disk every `every` pages"""
+		self.items.extend(response.get('items', []))
+		self.page_token = response.get('nextPageToken')
+		self._pages += 1
+		if self.page_token and self._pages % self.every == 0:
+			self.save()
+
+	def save(self):
+		tmp_path = self.path + '.tmp'
+		with open(tmp_path, 'w') as f:
+			json.dump({'key': self.key, 'page_token': self.page_token, 'items': self.items}, f)
+		os.replace(tmp_path, self.path)
+
+	def complete(self):
+		"""Mark the crawl finished and remove the checkpoint file"""
+		self.page_token = None
+		if os.path.exists(self.path):
+			os.remove(self.path)
+
+
+def as_checkpoint(checkpoint):
+	"""Accept a Checkpoint or a file path"""
+	if checkpoint is None or isinstance(checkpoint, Checkpoint):
+		return checkpoint
+	return Checkpoint(checkpoint)
@@ -0,0 +1,157 @@
+from operator import itemgetter
+
+from .records import to_epoch
+from .utility import convert_duration
+
+OUTPUT_FORMATS = ('rows', 'numpy', 'pandas', 'arrow')
+
+# NumPy dtype of each columnHeaders dataType
+DATA_TYPES = {
+	'INTEGER': 'int64',
+	'FLOAT': 'float64',
+	'STRING': 'object',
+}
+
+# value of a null (or hidden) count in int64 columns, which have no NaN; null floats are NaN and null times NaT
+MISSING = -1
+
+# time dimensions are returned as YYYY-MM-DD / YYYY-MM strings
+TIME_DIMENSIONS = {
+	'day': 'datetime64[D]',
+	'month': 'datetime64[M]',
+}
+
+
+def _import(module, extra):
+	try:
+		return __import__(module)
+	except ImportError:
+		raise ImportError('This output format requires {0}. Install it with: pip install ytinspector[{1}]'.format(module, extra))
+
+
+def column_dtype(column_header):
+	"""NumPy dtype of a report column, from its columnHeaders name and dataType"""
+	if column_header['name'] in TIME_DIMENSIONS:
+		return TIME_DIMENSIONS[column_header['name']]
+	return DATA_TYPES.get(column_header.get('dataType'), 'object')
+
+
+def to_numpy(column_headers, rows):
+	"""
+	Dict of column name -> typed NumPy array.
+	Each column is pulled out of the rows with operator.itemgetter and converted in one NumPy call
+	(numeric columns are streamed straight into the array), so no per-row work happens in Python.
+	Null values are MISSING in INTEGER columns, NaN in FLOAT columns, NaT in time columns and None in strings.
+	"""
+	np = _import('numpy', 'numpy')
+	columns = {}
+	for index, column_header in enumerate(column_headers):
+		dtype = column_dtype(column_header)
+		values = map(itemgetter(index), rows)
+		if dtype in ('int64', 'float64'):
+			try:
+				columns[column_header['name']] = np.fromiter(values, dtype=dtype, count=len(rows))
+			except TypeError:
+				# a null value: only then are the values checked one by one
+				null = MISSING if dtype == 'int64' else float('nan')
+				values = (null if value is None else value for value in map(itemgetter(index), rows))
+				columns[column_header['name']] = np.fromiter(values, dtype=dtype, count=len(rows))
+		else:
+			columns[column_header['name']] = np.array(list(values), dtype=dtype)
+	return columns
+
+
+def to_pandas(column_headers, rows):
+	pd = _import('pandas', 'pandas')
+	return pd.DataFrame(to_numpy(column_headers, rows), copy=False)
+
+
+def to_arrow(column_headers, rows):
+	pa = _import('pyarrow', 'arrow')
+	arrays = to_numpy(column_headers, rows)
+	return pa.table({name: pa.array(array) for name, array in arrays.items()})
+
+
+def format_report(column_headers, rows, output_format='rows'):
+	"""
+	Format a report in one of OUTPUT_FORMATS:
+	rows -- Tuple(columns, rows) as returned by the API; numpy -- dict of typed arrays;
+	pandas -- DataFrame; arrow -- pyarrow Table.
+	"""
+	if output_format == 'rows':
+		return [column_header['name'] for column_header in column_headers], rows
+	if output_format == 'numpy':
+		return to_numpy(column_headers, rows)
+	if output_format == 'pandas':
+		return to_pandas(column_headers, rows)
+	if output_format == 'arrow':
+		return to_arrow(column_headers, rows)
+	raise ValueError('output_format must be one of {0}'.format(', '.join(OUTPUT_FORMATS)))
+
+
+# columns of video_features; counts hidden by the channel, and durations not requested, are MISSING
+VIDEO_FEATURES = ('video_id', 'published_at', 'duration', 'view_count', 'like_count', 'comment_count')
+
+_EMPTY = {}
+
+
+def _count(value):
+	return int(value) if value is not None else MISSING
+
+
+def parse_durations(durations):
+	"""int64 array of the seconds of ISO 8601 durations (contentDetails.duration values), see utility.convert_duration"""
+	np = _import('numpy', 'numpy')
+	return np.fromiter(map(convert_duration, durations), dtype='int64', count=len(durations))
+
+
+def _publishedTimes(np, values):
+	if all(isinstance(value, str) and value.endswith('Z') for value in values):
+		# UTC RFC 3339 strings are parsed by NumPy in one call
+		return np.array([value[:-1] for value in values], dtype='datetime64[s]')
+	times = [to_epoch(value) if isinstance(value, str) else value for value in values]
+	return np.array(times, dtype='int64').astype('datetime64[s]')
+
+
+def video_features(videos, output_format='numpy'):
+	"""
+	Columns of VIDEO_FEATURES for a catalogue of videos, in one pass over it: duration in seconds,
+	publish time as datetime64[s] and statistics counts as int64 (MISSING when hidden).
+	:param videos: Raw videos resources (part=snippet,contentDetails,statistics) or records.CompactVideo records.
+	:param output_format: {numpy; pandas; arrow} dict of arrays, DataFrame or pyarrow Table.
+	"""
+	np = _import('numpy', 'numpy')
+	video_ids, published, durations, view_counts, like_counts, comment_counts = [], [], [], [], [], []
+	for video in videos:
+		if isinstance(video, dict):
+			statistics = video.get('statistics', _EMPTY)
+			duration = video.get('contentDetails', _EMPTY).get('duration')
+			video_ids.append(video['id'])
+			published.append(video['snippet']['publishedAt'])
+			durations.append(convert_duration(duration) if duration is not None else MISSING)
+			view_counts.append(_count(statistics.get('viewCount')))
+			like_counts.append(_count(statistics.get('likeCount')))
+			comment_counts.append(_count(statistics.get('commentCount')))
+		else:
+			video_ids.append(video.video_id)
+			published.append(video.published_at)
+			durations.append(_count(video.duration))
+			view_counts.append(_count(video.view_count))
+			like_counts.append(_count(video.like_count))
+			comment_counts.append(_count(video.comment_count))
+
+	columns = {
+		'video_id': np.array(video_ids, dtype='object'),
+		'published_at': _publishedTimes(np, published),
+	}
+	for name, values in zip(VIDEO_FEATURES[2:], (durations, view_counts, like_counts, comment_counts)):
+		columns[name] = np.array(values, dtype='int64')
+
+	if output_format == 'numpy':
+		return columns
+	if output_format == 'pandas':
+		return _import('pandas', 'pandas').DataFrame(columns, copy=False)
+	if output_format == 'arrow':
+		pa = _import('pyarrow', 'arrow')
+		return pa.table({name: pa.array(array) for name, array in columns.items()})
+	raise ValueError('output_format must be one of numpy, pandas, arrow')
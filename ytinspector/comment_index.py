@@ -0,0 +1,235 @@
+import datetime
+import heapq
+import html
+import pickle
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .records import to_epoch
+
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def tokenize(text):
+	"""
+	Index terms of a comment text: HTML tags and entities (textFormat=html) removed, case and accents folded,
+	split on non-word characters, e.g. 'Café <b>TESLA</b>!' -> ['cafe', 'tesla'].
+	"""
+	if '<' in text or '&' in text:
+		text = html.unescape(TAG_PATTERN.sub(' ', text))
+	text = text.casefold()
+	if not text.isascii():
+		text = unicodedata.normalize('NFKD', text)
+		text = ''.join(character for character in text if not unicodedata.combining(character))
+	return TOKEN_PATTERN.findall(text)
+
+def _timestamp(value):
+	"""Epoch seconds of a record timestamp (compact records already store them), or of a query bound"""
+	if value is None or isinstance(value, int):
+		return value
+	if isinstance(value, str):
+		return to_epoch(value)
+	if value.tzinfo is None:
+		value = value.replace(tzinfo=datetime.timezone.utc)
+	return int(value.timestamp())
+
+def _authorKeys(name, channel_url):
+	keys = []
+	if name:
+		keys.append(name.casefold())
+	if channel_url:
+		keys.append(channel_url)
+		# e.g. http://www.youtube.com/channel/UC... also matches by channel id
+		keys.append(channel_url.rstrip('/').rsplit('/', 1)[-1])
+	return keys
+
+def _posting(postings, key):
+	# not setdefault, which would allocate an array for every call
+	posting = postings.get(key)
+	if posting is None:
+		posting = postings[key] = array('I')
+	return posting
+
+def _contains(posting, doc):
+	position = bisect_left(posting, doc)
+	return position < len(posting) and posting[position] == doc
+
+def _intersect(postings):
+	"""Doc ids present in every sorted posting list"""
+	postings = sorted(postings, key=len)
+	docs = postings[0]
+	for posting in postings[1:]:
+		if not docs:
+			break
+		if len(docs) * 16 < len(posting):
+			# few candidates: binary search them in the long list
+			docs = [doc for doc in docs if _contains(posting, doc)]
+		else:
+			members = set(posting)
+			docs = [doc for doc in docs if doc in members]
+	return docs
+
+
+class CommentIndex:
+	"""
+	Local full-text index over downloaded comments: an inverted index from terms, authors and videos to the
+	comments containing them, so keyword, author, video and date range queries need no API calls.
+	Built from YouTube comment results (VideoComment, ChannelRelatedComment, VideoReply or their
+	ytinspector.records compact versions); the replies of a comment are indexed with it.
+	Updates are incremental: adding a comment already indexed replaces it when its text was edited.
+	"""
+	def __init__(self):
+		self.records = []
+		self.times = array('q')
+		# doc ids of every term / author key / video id, in increasing order
+		self._postings = {}
+		self._authors = {}
+		self._videos = {}
+		# comment or reply id -> doc id
+		self._ids = {}
+		self._deleted = set()
+		# doc ids ordered by time and their times, rebuilt on demand after additions
+		self._time_order = None
+		self._sorted_times = None
+
+	def __len__(self):
+		return len(self._ids)
+
+	def __repr__(self):
+		return 'CommentIndex(comments={0}, terms={1})'.format(len(self), len(self._postings))
+
+	def add(self, records):
+		"""
+		Index comment records (e.g. the result of retrieveVideoComments or syncVideoComments, or an iter* generator).
+		:return: Number of comments and replies added or updated.
+		"""
+		count = 0
+		for record in records:
+			video_id = getattr(record, 'video_id', None)
+			count += self._add(record, video_id)
+			for reply in getattr(record, 'replies', None) or ():
+				count += self._add(reply, video_id)
+		return count
+
+	def _add(self, record, video_id):
+		if hasattr(record, 'comment_reply_id'):
+			comment_id, text = record.comment_reply_id, record.reply_text
+			author_keys = _authorKeys(record.reply_commenter_name, record.reply_commenter_channel)
+		else:
+			comment_id, text = record.comment_thread_id, record.comment_text
+			author_keys = _authorKeys(record.commenter_name, record.commenter_channel)
+
+		doc = self._ids.get(comment_id)
+		if doc is not None:
+			previous = self.records[doc]
+			if previous.updated_timestamp == record.updated_timestamp and getattr(previous, 'like_count', None) == getattr(record, 'like_count', None):
+				return 0
+			if self._text(previous) == text:
+				# only the counts changed: the postings still apply
+				self.records[doc] = record
+				return 1
+			self._deleted.add(doc)
+			self.records[doc] = None
+
+		doc = len(self.records)
+		self._ids[comment_id] = doc
+		self.records.append(record)
+		self.times.append(_timestamp(record.published_timestamp) or 0)
+		for term in set(tokenize(text)):
+			_posting(self._postings, term).append(doc)
+		for key in author_keys:
+			_posting(self._authors, key).append(doc)
+		if video_id is not None:
+			_posting(self._videos, video_id).append(doc)
+		self._time_order = None
+		return 1
+
+	@staticmethod
+	def _text(record):
+		return record.reply_text if hasattr(record, 'comment_reply_id') else record.comment_text
+
+	def _timeRange(self, start, end):
+		"""Doc ids published between start and end, in time order"""
+		if self._time_order is None:
+			self._time_order = array('I', sorted(range(len(self.times)), key=self.times.__getitem__))
+			self._sorted_times = array('q', (self.times[doc] for doc in self._time_order))
+		low = bisect_left(self._sorted_times, start) if start is not None else 0
+		high = bisect_right(self._sorted_times, end) if end is not None else len(self._sorted_times)
+		return self._time_order[low:high]
+
+	def search(self, query=None, author=None, video_id=None, start=None, end=None, match='all', limit=None):
+		"""
+		Find indexed comments and replies, newest first.
+		:param query: Keywords, tokenized like the comments.
+		:param match: {all; any} whether a comment must contain all the keywords or any of them.
+		:param author: Author display name (case-insensitive), channel URL or channel id.
+		:param video_id: Only comments of this video (replies count as part of their comment's video).
+		:param start: Published at or after (RFC 3339 string, datetime or epoch seconds).
+		:param end: Published at or before.
+		:param limit: Maximum number of results.
+		:return: List of the indexed records.
+		"""
+		if match not in ('all', 'any'):
+			raise ValueError('match must be all or any')
+		start, end = _timestamp(start), _timestamp(end)
+		postings = []
+		if query is not None:
+			terms = set(tokenize(query))
+			if not terms:
+				# e.g. only punctuation: no comment can match it
+				return []
+			term_postings = [self._postings.get(term, ()) for term in terms]
+			if match == 'all':
+				postings.extend(term_postings)
+			else:
+				postings.append(sorted(set().union(*term_postings)))
+		if author is not None:
+			postings.append(self._authors.get(author, None) or self._authors.get(author.casefold(), ()))
+		if video_id is not None:
+			postings.append(self._videos.get(video_id, ()))
+
+		times = self.times
+		if postings:
+			docs = _intersect(postings)
+			if start is not None or end is not None:
+				docs = [doc for doc in docs if (start is None or times[doc] >= start) and (end is None or times[doc] <= end)]
+		else:
+			docs = self._timeRange(start, end)
+		docs = [doc for doc in docs if doc not in self._deleted] if self._deleted else docs
+
+		if limit is not None:
+			docs = heapq.nlargest(limit, docs, key=times.__getitem__)
+		else:
+			docs = sorted(docs, key=times.__getitem__, reverse=True)
+		return [self.records[doc] for doc in docs]
+
+	def count(self, query=None, author=None, video_id=None, start=None, end=None, match='all'):
+		return len(self.search(query, author, video_id, start, end, match))
+
+	def terms(self, limit=20):
+		"""Most frequent terms as (term, comment count) pairs, including replaced comments until the index is rebuilt"""
+		return heapq.nlargest(limit, ((term, len(docs)) for term, docs in self._postings.items()), key=lambda pair: pair[1])
+
+	def rebuild(self):
+		"""Rebuild the index without the postings of replaced comments"""
+		index = CommentIndex()
+		doc_videos = {}
+		for video_id, docs in self._videos.items():
+			for doc in docs:
+				doc_videos[doc] = video_id
+		for doc, record in enumerate(self.records):
+			if record is not None:
+				index._add(record, doc_videos.get(doc))
+		self.__dict__.update(index.__dict__)
+
+	def save(self, path):
+		with open(path, 'wb') as f:
+			pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@classmethod
+	def load(cls, path):
+		with open(path, 'rb') as f:
+			return pickle.load(f)
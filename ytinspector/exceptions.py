@@ -17,3 +17,9 @@ class SearchResultReturnsNone(YouTubeException):
 class YTAnalyticsException(Exception):
 	"""YTAnalytics Exception Base Class"""
 
+
+class QuotaExceeded(YouTubeException, YTAnalyticsException):
+	"""Raised when a request would exceed the daily quota budget of a QuotaLedger"""
+
+class InvalidQuery(YTAnalyticsException):
+	"""Raised when a YouTube Analytics query uses unknown or incompatible dimensions, metrics, filters or sort fields"""
@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import Counter
+
+from googleapiclient.errors import HttpError
+
+from .cache import cache_key
+from .retry import RetryPolicy, TokenBucket
+
+
+class RequestExecutor:
+	"""
+	Single execution path for every API request made by the clients.
+	:param cache: Optional ResponseCache (MemoryCache, SQLiteCache) consulted before GET requests hit the network.
+		Expired responses carrying an ETag are revalidated with If-None-Match instead of being downloaded again.
+	:param ledger: Optional QuotaLedger charged for every request sent to the API (cache hits are free).
+	:param retry: RetryPolicy applied to transient errors (defaults to RetryPolicy(); RetryPolicy(max_retries=0) disables it).
+	:param rate_limit: Requests per second, or a TokenBucket shared with other executors.
+	"""
+	def __init__(self, cache=None, ledger=None, retry=None, rate_limit=None):
+		self.cache = cache
+		self.ledger = ledger
+		self.retry = retry if retry is not None else RetryPolicy()
+		self.rate_limit = TokenBucket(rate_limit) if isinstance(rate_limit, (int, float)) else rate_limit
+		self._stats = Counter()
+		self._retried_statuses = Counter()
+		self._lock = threading.Lock()
+
+	def _record(self, **counts):
+		with self._lock:
+			self._stats.update(counts)
+
+	def stats(self):
+		"""
+		Request, retry and throttle statistics: requests sent (including retries), retries, requests that
+		still failed after max_retries (gave_up), throttled requests, and seconds spent throttled or backing off.
+		"""
+		with self._lock:
+			stats = {name: self._stats[name] for name in ('requests', 'retries', 'gave_up', 'throttled')}
+			stats['throttle_wait'] = round(self._stats['throttle_wait'], 3)
+			stats['backoff_wait'] = round(self._stats['backoff_wait'], 3)
+			stats['retried_statuses'] = dict(self._retried_statuses)
+			return stats
+
+	def _throttle(self, requests=1):
+		self._record(requests=requests)
+		if self.rate_limit is not None:
+			self._recordWait(self.rate_limit.acquire(requests))
+
+	async def _throttleAsync(self, requests=1):
+		self._record(requests=requests)
+		if self.rate_limit is not None:
+			self._recordWait(await self.rate_limit.acquire_async(requests))
+
+	def _recordWait(self, wait):
+		if wait:
+			self._record(throttled=1, throttle_wait=wait)
+
+	def _retryDelay(self, exception, attempt):
+		"""Backoff before retrying a failed attempt, or None if the exception should be raised"""
+		if not self.retry.is_retryable(exception):
+			return None
+		if attempt >= self.retry.max_retries:
+			self._record(gave_up=1)
+			return None
+		delay = self.retry.delay(attempt, exception)
+		with self._lock:
+			self._stats.update(retries=1, backoff_wait=delay)
+			self._retried_statuses[exception.resp.status if isinstance(exception, HttpError) else type(exception).__name__] += 1
+		return delay
+
+	def _charge(self, request):
+		if self.ledger is not None:
+			self.ledger.charge(request.methodId)
+
+	def _cacheKey(self, request):
+		if self.cache is None or request.method != 'GET':
+			return None
+		return cache_key(request)
+
+	def _prepare(self, request):
+		"""
+		Look the request up in the cache. Returns (key, cached, fresh): a fresh cached response is returned
+		as is; an expired one carrying an ETag is kept while If-None-Match is sent with the request.
+		"""
+		key = self._cacheKey(request)
+		if key is None:
+			return None, None, False
+		entry = self.cache.lookup(key)
+		if entry is None:
+			return key, None, False
+		cached, fresh = entry
+		if fresh:
+			return key, cached, True
+		# YouTube Data API responses carry their ETag in the body
+		etag = cached.get('etag')
+		if not etag:
+			return key, None, False
+		request.headers['If-None-Match'] = etag
+		return key, cached, False
+
+	def _finish(self, request, key, cached, response=None, exception=None):
+		"""Store a network response, or serve the cached body when the server answered 304 Not Modified"""
+		if exception is not None:
+			if cached is not None and isinstance(exception, HttpError) and exception.resp.status == 304:
+				self.cache.revalidate(key, request.methodId, cached)
+				return cached
+			raise exception
+		if key is not None:
+			self.cache.set(key, request.methodId, response)
+		return response
+
+	def _send(self, request, key, cached, http=None):
+		for attempt in range(self.retry.max_retries + 1):
+			self._throttle()
+			self._charge(request)
+			try:
+				response = request.execute(http=http)
+			except Exception as e:
+				delay = self._retryDelay(e, attempt)
+				if delay is None:
+					return self._finish(request, key, cached, exception=e)
+				time.sleep(delay)
+			else:
+				return self._finish(request, key, cached, response)
+
+	def execute(self, request, http=None):
+		"""
+		Execute a googleapiclient HttpRequest.
+		:param http: Transport to execute on instead of the request's own (e.g. a per-thread transport).
+		"""
+		key, cached, fresh = self._prepare(request)
+		if fresh:
+			return cached
+		return self._send(request, key, cached, http)
+
+	async def execute_async(self, request, transport):
+		"""
+		Execute a googleapiclient HttpRequest on an AsyncTransport.
+		"""
+		# asyncio is only imported by the async path (it is already loaded whenever this coroutine runs)
+		import asyncio
+
+		key, cached, fresh = self._prepare(request)
+		if fresh:
+			return cached
+
+		for attempt in range(self.retry.max_retries + 1):
+			await self._throttleAsync()
+			self._charge(request)
+			try:
+				response = await transport.execute(request)
+			except Exception as e:
+				delay = self._retryDelay(e, attempt)
+				if delay is None:
+					return self._finish(request, key, cached, exception=e)
+				await asyncio.sleep(delay)
+			else:
+				return self._finish(request, key, cached, response)
+
+	def execute_batch(self, requests, new_batch, requests_per_batch=50, convert=None):
+		"""
+		Execute several requests, sending the ones not served from the cache as batch HTTP requests.
+		Returns the responses in request order. Sub-requests failing with a transient error are retried in a later batch.
+		:param requests: List of googleapiclient HttpRequest.
+		:param new_batch: Factory of BatchHttpRequest (service.new_batch_http_request).
+		:param requests_per_batch: Number of requests per batch round trip (max 1000).
+		:param convert: Optional function applied to each response as soon as it arrives (after it is cached);
+			its results are returned instead, so raw responses are not all held until the last batch completes.
+		"""
+		convert = convert or (lambda response: response)
+		responses = [None] * len(requests)
+		prepared = [self._prepare(request) for request in requests]
+		pending = []
+		for index, (key, cached, fresh) in enumerate(prepared):
+			if fresh:
+				responses[index] = convert(cached)
+			else:
+				pending.append(index)
+
+		if len(pending) == 1:
+			index = pending[0]
+			responses[index] = convert(self._send(requests[index], *prepared[index][:2]))
+			return responses
+
+		errors = []
+		attempt = 0
+		while pending:
+			retry_indexes = []
+			delays = []
+
+			def callback(request_id, response, exception):
+				index = int(request_id)
+				if exception is not None:
+					delay = self._retryDelay(exception, attempt)
+					if delay is not None:
+						retry_indexes.append(index)
+						delays.append(delay)
+						return
+				key, cached, fresh = prepared[index]
+				try:
+					responses[index] = convert(self._finish(requests[index], key, cached, response, exception))
+				except Exception as e:
+					errors.append(e)
+
+			for batch_start in range(0, len(pending), requests_per_batch):
+				batch_indexes = pending[batch_start: batch_start + requests_per_batch]
+				batch = new_batch(callback=callback)
+				self._throttle(len(batch_indexes))
+				for index in batch_indexes:
+					self._charge(requests[index])
+					batch.add(requests[index], request_id=str(index))
+				try:
+					batch.execute()
+				except Exception as e:
+					# the batch round trip itself failed; none of its sub-requests were answered
+					delay = self._retryDelay(e, attempt)
+					if delay is None:
+						raise
+					retry_indexes.extend(batch_indexes)
+					delays.append(delay)
+				if errors:
+					raise errors[0]
+
+			if retry_indexes:
+				time.sleep(max(delays))
+			pending = sorted(retry_indexes)
+			attempt += 1
+		return responses
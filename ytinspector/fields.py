@@ -0,0 +1,101 @@
+import inspect
+from functools import lru_cache
+
+# fields= value selecting the mask derived from the result type
+AUTO = 'auto'
+
+# page-level fields read by pagination, the empty result checks and ETag revalidation
+PAGE_FIELDS = ('etag', 'nextPageToken', 'pageInfo/totalResults')
+
+
+class _FieldRecorder:
+	"""Stand-in resource that records every key path a converter reads"""
+	def __init__(self):
+		self._children = {}
+
+	def __getitem__(self, key):
+		return self._children.setdefault(key, _FieldRecorder())
+
+	def get(self, key, default=None):
+		return self[key]
+
+	def __format__(self, format_spec):
+		return ''
+
+	def paths(self, prefix=''):
+		for key, child in self._children.items():
+			if child._children:
+				yield from child.paths(prefix + key + '/')
+			else:
+				yield prefix + key
+
+
+@lru_cache(maxsize=None)
+def converter_fields(convert):
+	"""
+	Paths (e.g. snippet/title) of the resource fields a converter such as utility.to_video_comment reads.
+	Found once per converter by running it on a recording stand-in resource.
+	"""
+	recorder = _FieldRecorder()
+	required = [
+		parameter for parameter in inspect.signature(convert).parameters.values()
+		if parameter.default is parameter.empty
+	]
+	convert(recorder, *[None] * (len(required) - 1))
+	return tuple(recorder.paths())
+
+
+def fields_mask(item_paths, page_fields=PAGE_FIELDS):
+	"""
+	Build a partial response fields= mask selecting item_paths under items plus the page-level fields,
+	e.g. 'etag,nextPageToken,pageInfo/totalResults,items(id/videoId,snippet(title,channelId))'.
+	"""
+	tree = {}
+	for path in item_paths:
+		node = tree
+		for key in path.split('/'):
+			node = node.setdefault(key, {})
+
+	def render(node):
+		return ','.join(key + ('({0})'.format(render(child)) if child else '') for key, child in node.items())
+
+	return ','.join(list(page_fields) + ['items({0})'.format(render(tree))])
+
+
+def _topLevelSelections(mask):
+	"""Comma-separated selections at the top level of a fields= mask, e.g. ['etag', 'items(id,snippet/title)']"""
+	selections, depth, start = [], 0, 0
+	for position, character in enumerate(mask):
+		if character == '(':
+			depth += 1
+		elif character == ')':
+			depth -= 1
+		elif character == ',' and depth == 0:
+			selections.append(mask[start:position].strip())
+			start = position + 1
+	selections.append(mask[start:].strip())
+	return selections
+
+
+def with_page_fields(mask, page_fields=PAGE_FIELDS):
+	"""
+	A caller-supplied fields= mask plus the page-level fields it leaves out, so that pagination and the
+	empty result checks keep working, e.g. 'items(snippet/title)' -> 'etag,nextPageToken,pageInfo/totalResults,items(snippet/title)'.
+	"""
+	selections = _topLevelSelections(mask)
+	if '*' in selections:
+		return mask
+	missing = [field for field in page_fields if field not in selections and field.split('/')[0] not in selections]
+	return ','.join(missing + [mask]) if missing else mask
+
+
+def resolve_fields(fields, *item_paths):
+	"""
+	Per-call fields= value: AUTO builds the mask from item_paths (iterables of paths, e.g. converter_fields),
+	None requests the full parts, and any other string is used with the page-level fields it leaves out added.
+	"""
+	if fields is None:
+		return None
+	if fields != AUTO:
+		return with_page_fields(fields)
+	return fields_mask([path for paths in item_paths for path in paths])
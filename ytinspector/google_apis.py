@@ -1,12 +1,26 @@
 import pickle
 import os
 import datetime
+import logging
+import threading
 from collections import namedtuple
-from google_auth_oauthlib.flow import Flow, InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-from google.auth.transport.requests import Request
+from .pagination import iter_items
 
+# google_auth_oauthlib, googleapiclient.discovery and the auth transports are imported where they are used,
+# so importing ytinspector stays cheap until a service is actually built
+
+logger = logging.getLogger(__name__)
+
+# credentials loaded in this process, keyed by token file. Services are not shared: every service gets
+# its own httplib2 transport, which is not thread safe
+_credentials = {}
+_credentials_lock = threading.Lock()
+
+
+def clear_credentials_cache():
+	"""Forget the credentials loaded by create_service in this process, so token files are read again"""
+	with _credentials_lock:
+		_credentials.clear()
 
 def create_service(client_secret_file, api_name, api_version, *scopes, prefix=''):
 	CLIENT_SECRET_FILE = client_secret_file
@@ -19,33 +33,65 @@ def create_service(client_secret_file, api_name, api_version, *scopes, prefix=''
 	token_dir = 'token files'
 	pickle_file = f'token_{API_SERVICE_NAME}_{API_VERSION}{prefix}.pickle'
 
+	# credentials are reused for the life of the process; they refresh themselves
+	token_path = os.path.join(working_dir, token_dir, pickle_file)
+	with _credentials_lock:
+		cred = _credentials.get(token_path)
+
 	### Check if token dir exists first, if not, create the folder
 	if not os.path.exists(os.path.join(working_dir, token_dir)):
 		os.mkdir(os.path.join(working_dir, token_dir))
 
-	if os.path.exists(os.path.join(working_dir, token_dir, pickle_file)):
+	if cred is None and os.path.exists(os.path.join(working_dir, token_dir, pickle_file)):
 		with open(os.path.join(working_dir, token_dir, pickle_file), 'rb') as token:
 			cred = pickle.load(token)
 
 	if not cred or not cred.valid:
 		if cred and cred.expired and cred.refresh_token:
+			from google.auth.transport.requests import Request
 			cred.refresh(Request())
 		else:
+			from google_auth_oauthlib.flow import InstalledAppFlow
 			flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_FILE, SCOPES)
 			cred = flow.run_local_server()
 
 		with open(os.path.join(working_dir, token_dir, pickle_file), 'wb') as token:
 			pickle.dump(cred, token)
 
+	with _credentials_lock:
+		_credentials[token_path] = cred
+
 	try:
-		service = build(API_SERVICE_NAME, API_VERSION, credentials=cred)
-		print(API_SERVICE_NAME, API_VERSION, 'service created successfully')
-		return service
+		from googleapiclient.discovery import build
+
+		# static_discovery builds from the discovery documents shipped with google-api-python-client, offline
+		service = build(API_SERVICE_NAME, API_VERSION, credentials=cred, static_discovery=True)
+		logger.debug('%s %s service created successfully', API_SERVICE_NAME, API_VERSION)
 	except Exception as e:
-		print(e)
-		print(f'Failed to create service instance for {API_SERVICE_NAME}')
+		logger.warning('Failed to create service instance for %s: %s', API_SERVICE_NAME, e)
 		os.remove(os.path.join(working_dir, token_dir, pickle_file))
+		with _credentials_lock:
+			_credentials.pop(token_path, None)
 		return None
+	return service
+
+def service_credentials(service):
+	"""Return the credentials a service instance was built with (None if unauthenticated)"""
+	return getattr(service._http, 'credentials', None)
+
+def build_thread_http(service):
+	"""
+	Create a new authorized http transport sharing the service credentials.
+	httplib2 is not thread safe, so every worker thread executing requests needs its own transport.
+	"""
+	from googleapiclient.http import build_http
+	from google_auth_httplib2 import AuthorizedHttp
+
+	credentials = service_credentials(service)
+	http = build_http()
+	if credentials is not None:
+		http = AuthorizedHttp(credentials, http=http)
+	return http
 
 def convert_to_RFC_datetime(year=1900, month=1, day=1, hour=0, minute=0):
 	dt = datetime.datetime(year, month, day, hour, minute, 0).isoformat() + 'Z'
@@ -143,29 +189,14 @@ class YouTubeHelper:
 
 	def get_comment_threads(service, video_id, sort_by='time', sort_order='asc'):
 		order = ['asc', 'desc'].index(sort_order)
-		comment_threads = []
-		response = service.commentThreads().list(
+		comment_threads = list(iter_items(
+			service.commentThreads().list,
 			part='snippet,replies',
 			videoId=video_id,
 			maxResults=100,
 			order=sort_by,  # time | relevance
 			textFormat='plainText'  # plainText | html
-		).execute()
-		comment_threads = response['items']
-		nextPageToken = response.get('nextPageToken')
-
-		while nextPageToken:
-			response = service.commentThreads().list(
-				part='snippet,replies',
-				videoId=video_id,
-				maxResults=100,
-				order=sort_by,  # time | relevance
-				textFormat='plainText',  # plainText | html
-				pageToken=nextPageToken
-			).execute()
-
-			comment_threads.extend(response['items'])
-			nextPageToken = response.get('nextPageToken')
+		))
 
 		if sort_by == 'time':
 			comment_threads = sorted(comment_threads, key=lambda x: x['snippet']['topLevelComment']['snippet']['publishedAt'], reverse=order)
@@ -0,0 +1,60 @@
+def iter_pages(list_method, item_limit=None, execute=None, **params):
+	"""
+	Lazily walk a paginated list endpoint, yielding each raw response page as it arrives.
+	:param list_method: Bound list method of a service resource (e.g. service.search().list).
+	:param item_limit: Stop requesting further pages once this many items have been received.
+		The page that crosses the limit is still yielded in full.
+	:param execute: Optional callable that executes a request and returns the response.
+		Defaults to request.execute().
+	:param params: Parameters passed to the list method on every page.
+	"""
+	item_count = 0
+	page_token = params.pop('pageToken', None)
+
+	while True:
+		request = list_method(pageToken=page_token, **params)
+		response = execute(request) if execute else request.execute()
+		yield response
+
+		item_count += len(response.get('items', []))
+		page_token = response.get('nextPageToken')
+		if not page_token:
+			break
+		if item_limit is not None and item_count >= item_limit:
+			break
+
+def iter_items(list_method, item_limit=None, execute=None, **params):
+	"""
+	Lazily walk a paginated list endpoint, yielding every item of every page.
+	Takes the same arguments as iter_pages.
+	"""
+	for response in iter_pages(list_method, item_limit=item_limit, execute=execute, **params):
+		for item in response.get('items', []):
+			yield item
+
+async def aiter_pages(list_method, execute, item_limit=None, **params):
+	"""
+	Async counterpart of iter_pages.
+	:param execute: Coroutine function that executes a request and returns the response.
+	"""
+	item_count = 0
+	page_token = params.pop('pageToken', None)
+
+	while True:
+		response = await execute(list_method(pageToken=page_token, **params))
+		yield response
+
+		item_count += len(response.get('items', []))
+		page_token = response.get('nextPageToken')
+		if not page_token:
+			break
+		if item_limit is not None and item_count >= item_limit:
+			break
+
+async def aiter_items(list_method, execute, item_limit=None, **params):
+	"""
+	Async counterpart of iter_items.
+	"""
+	async for response in aiter_pages(list_method, execute, item_limit=item_limit, **params):
+		for item in response.get('items', []):
+			yield item
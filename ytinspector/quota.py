@@ -0,0 +1,238 @@
+import datetime
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from .exceptions import QuotaExceeded
+
+try:
+	from zoneinfo import ZoneInfo
+	QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:
+	# daily quota resets at midnight Pacific Time
+	QUOTA_TIMEZONE = datetime.timezone(datetime.timedelta(hours=-8))
+
+# Quota units per call, keyed by API method id
+# https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+	'youtube.search.list': 100,
+	'youtube.videos.list': 1,
+	'youtube.channels.list': 1,
+	'youtube.playlistItems.list': 1,
+	'youtube.playlists.list': 1,
+	'youtube.commentThreads.list': 1,
+	'youtube.comments.list': 1,
+	'youtube.videoCategories.list': 1,
+	'youtube.i18nRegions.list': 1,
+	'youtube.i18nLanguages.list': 1,
+	'youtube.subscriptions.list': 1,
+	'youtube.activities.list': 1,
+	'youtube.captions.list': 50,
+	'youtube.videos.insert': 1600,
+	'youtube.videos.update': 50,
+	'youtube.videos.rate': 50,
+	'youtube.videos.delete': 50,
+	'youtube.commentThreads.insert': 50,
+	'youtube.comments.insert': 50,
+	'youtube.comments.update': 50,
+	'youtube.comments.delete': 50,
+	'youtube.comments.setModerationStatus': 50,
+	'youtube.playlists.insert': 50,
+	'youtube.playlistItems.insert': 50,
+	'youtubeAnalytics.reports.query': 1,
+}
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+JobProjection = namedtuple('JobProjection', ['name', 'priority', 'estimated_cost', 'projected_spent', 'projected_remaining', 'runnable'])
+
+
+def quota_day(now=None):
+	"""Quota day (date in Pacific Time) a timestamp falls in"""
+	return datetime.datetime.fromtimestamp(time.time() if now is None else now, QUOTA_TIMEZONE).date()
+
+def quota_day_elapsed(now=None):
+	"""Fraction (0..1) of the current quota day that has elapsed"""
+	now_local = datetime.datetime.fromtimestamp(time.time() if now is None else now, QUOTA_TIMEZONE)
+	midnight = now_local.replace(hour=0, minute=0, second=0, microsecond=0)
+	return (now_local - midnight).total_seconds() / 86400
+
+
+class QuotaLedger:
+	"""
+	Tracks quota units spent per endpoint during the current quota day.
+	:param daily_limit: Daily quota budget in units (the default YouTube Data API allocation is 10,000).
+	:param costs: Per-endpoint cost overrides keyed by API method id, merged over QUOTA_COSTS.
+	:param default_cost: Cost of endpoints missing from the cost table.
+	:param enforce: Raise QuotaExceeded instead of sending a request the remaining budget cannot cover.
+	:param path: Optional JSON file the ledger is persisted to, so consecutive runs share one daily budget.
+	"""
+	def __init__(self, daily_limit=10000, costs=None, default_cost=1, enforce=True, path=None):
+		self.daily_limit = daily_limit
+		self.costs = dict(QUOTA_COSTS)
+		if costs:
+			self.costs.update(costs)
+		self.default_cost = default_cost
+		self.enforce = enforce
+		self.path = path
+		self.day = quota_day()
+		self.by_endpoint = {}
+		self._lock = threading.Lock()
+		if path and os.path.exists(path):
+			self._load()
+
+	def cost(self, method_id, calls=1):
+		return self.costs.get(method_id, self.default_cost) * calls
+
+	def estimate(self, calls):
+		"""Units needed for a dict of {method_id: number of calls}"""
+		return sum(self.cost(method_id, count) for method_id, count in calls.items())
+
+	def _rollover(self):
+		today = quota_day()
+		if today != self.day:
+			self.day = today
+			self.by_endpoint = {}
+
+	@property
+	def spent(self):
+		with self._lock:
+			self._rollover()
+			return sum(entry['units'] for entry in self.by_endpoint.values())
+
+	@property
+	def remaining(self):
+		return self.daily_limit - self.spent
+
+	def charge(self, method_id, calls=1):
+		"""
+		Record calls to an endpoint. With enforce, raises QuotaExceeded (before anything is recorded)
+		if the remaining budget cannot cover them.
+		"""
+		units = self.cost(method_id, calls)
+		with self._lock:
+			self._rollover()
+			spent = sum(entry['units'] for entry in self.by_endpoint.values())
+			if self.enforce and spent + units > self.daily_limit:
+				raise QuotaExceeded('{0} needs {1} units but only {2} of {3} remain today'.format(
+					method_id, units, self.daily_limit - spent, self.daily_limit))
+			entry = self.by_endpoint.setdefault(method_id, {'calls': 0, 'units': 0})
+			entry['calls'] += calls
+			entry['units'] += units
+			if self.path:
+				self._save()
+		return units
+
+	def report(self):
+		with self._lock:
+			self._rollover()
+			spent = sum(entry['units'] for entry in self.by_endpoint.values())
+			return {
+				'day': self.day.isoformat(),
+				'daily_limit': self.daily_limit,
+				'spent': spent,
+				'remaining': self.daily_limit - spent,
+				'by_endpoint': {method_id: dict(entry) for method_id, entry in self.by_endpoint.items()}
+			}
+
+	def _save(self):
+		tmp_path = self.path + '.tmp'
+		with open(tmp_path, 'w') as f:
+			json.dump({'day': self.day.isoformat(), 'by_endpoint': self.by_endpoint}, f)
+		os.replace(tmp_path, self.path)
+
+	def _load(self):
+		with open(self.path) as f:
+			data = json.load(f)
+		if data.get('day') == self.day.isoformat():
+			self.by_endpoint = data['by_endpoint']
+
+
+class QuotaScheduler:
+	"""
+	Runs quota-consuming jobs against a QuotaLedger budget.
+	Jobs run highest priority first. Normal and low priority jobs are paced so that spend follows the
+	elapsed fraction of the quota day, and low priority jobs only run while more than low_priority_reserve
+	of the budget is left; jobs that do not fit are deferred (or waited for, with run(wait=True)).
+	:param ledger: QuotaLedger shared with the YouTube / YTAnalytics clients running the jobs.
+	:param low_priority_reserve: Fraction of the daily budget kept for high and normal priority jobs.
+	:param burst: Fraction of the daily budget that may be spent ahead of the pacing schedule.
+	"""
+	def __init__(self, ledger, low_priority_reserve=0.3, burst=0.1):
+		self.ledger = ledger
+		self.low_priority_reserve = low_priority_reserve
+		self.burst = burst
+		self._jobs = []
+		self._counter = itertools.count()
+
+	def submit(self, name, func, estimated_cost, priority=PRIORITY_NORMAL):
+		"""
+		Queue a job.
+		:param func: Callable run without arguments; its return value is collected by run().
+		:param estimated_cost: Estimated quota units (see QuotaLedger.estimate).
+		:param priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW.
+		"""
+		heapq.heappush(self._jobs, (priority, next(self._counter), name, func, estimated_cost))
+
+	def _allowance(self, priority, spent, paced=True):
+		"""Units a job of the given priority may still spend (right now, or later today if not paced)"""
+		limit = self.ledger.daily_limit
+		if priority == PRIORITY_HIGH:
+			return limit - spent
+		allowance = limit
+		if paced:
+			allowance = limit * min(1.0, quota_day_elapsed() + self.burst)
+		if priority >= PRIORITY_LOW:
+			allowance = min(allowance, limit * (1 - self.low_priority_reserve))
+		return allowance - spent
+
+	def project(self):
+		"""Projected spend of the queued jobs, in the order they would run, before running anything"""
+		projections = []
+		spent = self.ledger.spent
+		for priority, _, name, func, estimated_cost in sorted(self._jobs):
+			runnable = estimated_cost <= self._allowance(priority, spent)
+			if runnable:
+				spent += estimated_cost
+			projections.append(JobProjection(name, priority, estimated_cost, spent, self.ledger.daily_limit - spent, runnable))
+		return projections
+
+	def run(self, wait=False, poll_interval=60):
+		"""
+		Run queued jobs that fit the budget. A job that raises does not stop the run; its exception is collected.
+		:param wait: Sleep until the pacing schedule allows deferred normal/low priority jobs instead of deferring them.
+		:return: Tuple(results, deferred, failed) -- dict of job name -> result, the names of jobs left queued,
+			and dict of job name -> exception of the jobs that failed (they are not requeued).
+		"""
+		results = {}
+		deferred = []
+		failed = {}
+		try:
+			while self._jobs:
+				priority, order, name, func, estimated_cost = heapq.heappop(self._jobs)
+				spent = self.ledger.spent
+				if estimated_cost > self._allowance(priority, spent):
+					# only pacing can be waited out; the reserve and the daily limit cannot
+					if wait and estimated_cost <= self._allowance(priority, spent, paced=False):
+						heapq.heappush(self._jobs, (priority, order, name, func, estimated_cost))
+						time.sleep(poll_interval)
+						continue
+					deferred.append((priority, order, name, func, estimated_cost))
+					continue
+				try:
+					results[name] = func()
+				except QuotaExceeded:
+					deferred.append((priority, order, name, func, estimated_cost))
+				except Exception as e:
+					failed[name] = e
+		finally:
+			# requeued even if the run is interrupted (e.g. KeyboardInterrupt while waiting)
+			for job in deferred:
+				heapq.heappush(self._jobs, job)
+		return results, [job[2] for job in sorted(deferred)], failed
@@ -0,0 +1,166 @@
+import datetime
+import sys
+
+from .utility import convert_duration
+
+
+def to_epoch(timestamp):
+	"""RFC 3339 timestamp (e.g. 2022-01-01T00:00:00Z) as integer seconds since the Unix epoch; None passes through"""
+	if timestamp is None:
+		return None
+	dt = datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+	if dt.tzinfo is None:
+		dt = dt.replace(tzinfo=datetime.timezone.utc)
+	return int(dt.timestamp())
+
+def _intern(value):
+	return sys.intern(value) if value is not None else None
+
+def _toInt(value):
+	return int(value) if value is not None else None
+
+
+class CompactRecord:
+	"""
+	Base of the compact result records. Fields are __slots__ (no per-instance __dict__) and are positional in
+	the same order as the namedtuple each record replaces, so records unpack, index, compare and hash the same way.
+	"""
+	__slots__ = ()
+
+	def __init__(self, *values):
+		if len(values) != len(self.__slots__):
+			raise TypeError('{0} takes {1} fields ({2} given)'.format(type(self).__name__, len(self.__slots__), len(values)))
+		for name, value in zip(self.__slots__, values):
+			setattr(self, name, value)
+
+	@property
+	def _fields(self):
+		return self.__slots__
+
+	def __iter__(self):
+		return (getattr(self, name) for name in self.__slots__)
+
+	def __len__(self):
+		return len(self.__slots__)
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return tuple(self)[index]
+		return getattr(self, self.__slots__[index])
+
+	def __eq__(self, other):
+		if type(other) is not type(self):
+			return NotImplemented
+		return tuple(self) == tuple(other)
+
+	def __hash__(self):
+		return hash(tuple(self))
+
+	def __repr__(self):
+		return '{0}({1})'.format(type(self).__name__, ', '.join('{0}={1!r}'.format(name, getattr(self, name)) for name in self.__slots__))
+
+	def __getstate__(self):
+		return tuple(self)
+
+	def __setstate__(self, state):
+		for name, value in zip(self.__slots__, state):
+			setattr(self, name, value)
+
+	def _asdict(self):
+		return dict(zip(self.__slots__, self))
+
+
+class CompactVideoReply(CompactRecord):
+	__slots__ = ('comment_reply_id', 'comment_thread_id', 'reply_text', 'reply_commenter_name', 'reply_commenter_channel',
+				 'like_count', 'published_timestamp', 'updated_timestamp')
+
+
+class CompactVideoComment(CompactRecord):
+	__slots__ = ('video_id', 'comment_thread_id', 'comment_text', 'commenter_name', 'commenter_channel', 'like_count',
+				 'published_timestamp', 'updated_timestamp', 'reply_count', 'replies')
+
+
+class CompactChannelRelatedComment(CompactRecord):
+	__slots__ = ('channel_id', 'video_id', 'comment_thread_id', 'comment_text', 'commenter_name', 'commenter_channel',
+				 'like_count', 'published_timestamp', 'updated_timestamp', 'reply_count', 'replies')
+
+
+class CompactVideo(CompactRecord):
+	__slots__ = ('video_id', 'video_title', 'channel_id', 'channel_title', 'description', 'published_at', 'category_id',
+				 'duration', 'view_count', 'like_count', 'comment_count')
+
+
+def compact_video_reply(video_reply):
+	"""Convert a utility.VideoReply to CompactVideoReply"""
+	return CompactVideoReply(
+		video_reply.comment_reply_id,
+		_intern(video_reply.comment_thread_id),
+		video_reply.reply_text,
+		_intern(video_reply.reply_commenter_name),
+		_intern(video_reply.reply_commenter_channel),
+		video_reply.like_count,
+		to_epoch(video_reply.published_timestamp),
+		to_epoch(video_reply.updated_timestamp)
+	)
+
+def _compactReplies(replies):
+	# a tuple, unlike a list, is not over-allocated
+	return tuple(compact_video_reply(video_reply) for video_reply in replies) if replies else ()
+
+def to_compact_video_comment(comment_threads_item, replies=None):
+	"""
+	Convert a commentThreads resource to CompactVideoComment. Reads the same fields as utility.to_video_comment;
+	channel ids, author names and author URLs are interned and timestamps are epoch seconds.
+	"""
+	top_level_comment = comment_threads_item['snippet']['topLevelComment']
+	return CompactVideoComment(
+		_intern(comment_threads_item['snippet']['videoId']),
+		top_level_comment['id'],
+		top_level_comment['snippet']['textDisplay'],
+		_intern(top_level_comment['snippet']['authorDisplayName']),
+		_intern(top_level_comment['snippet']['authorChannelUrl']),
+		top_level_comment['snippet']['likeCount'],
+		to_epoch(top_level_comment['snippet']['publishedAt']),
+		to_epoch(top_level_comment['snippet']['updatedAt']),
+		comment_threads_item['snippet']['totalReplyCount'],
+		_compactReplies(replies)
+	)
+
+def to_compact_channel_related_comment(comment_threads_item, replies=None):
+	"""Convert a commentThreads resource to CompactChannelRelatedComment, see to_compact_video_comment"""
+	top_level_comment = comment_threads_item['snippet']['topLevelComment']
+	return CompactChannelRelatedComment(
+		_intern(comment_threads_item['snippet']['channelId']),
+		_intern(comment_threads_item['snippet']['videoId']),
+		top_level_comment['id'],
+		top_level_comment['snippet']['textDisplay'],
+		_intern(top_level_comment['snippet']['authorDisplayName']),
+		_intern(top_level_comment['snippet']['authorChannelUrl']),
+		top_level_comment['snippet']['likeCount'],
+		to_epoch(top_level_comment['snippet']['publishedAt']),
+		to_epoch(top_level_comment['snippet']['updatedAt']),
+		comment_threads_item['snippet']['totalReplyCount'],
+		_compactReplies(replies)
+	)
+
+def to_compact_video(videos_item):
+	"""
+	Convert a videos resource (snippet,contentDetails,statistics) to CompactVideo: duration in seconds,
+	counts as ints (None when hidden) and publish time in epoch seconds.
+	"""
+	snippet = videos_item['snippet']
+	statistics = videos_item.get('statistics', {})
+	duration = videos_item.get('contentDetails', {}).get('duration')
+	return CompactVideo(
+		videos_item['id'],
+		snippet['title'],
+		_intern(snippet['channelId']),
+		_intern(snippet['channelTitle']),
+		snippet.get('description'),
+		to_epoch(snippet['publishedAt']),
+		_intern(snippet.get('categoryId')),
+		convert_duration(duration) if duration is not None else None,
+		_toInt(statistics.get('viewCount')),
+		_toInt(statistics.get('likeCount')),
+		_toInt(statistics.get('commentCount'))
+	)
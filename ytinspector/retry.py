@@ -0,0 +1,95 @@
+import json
+import random
+import socket
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# 403 reasons caused by short-term rate limits rather than permissions or the daily quota
+RETRYABLE_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'backendError')
+
+
+def error_reasons(http_error):
+	"""Reason codes (e.g. quotaExceeded, rateLimitExceeded) listed in an HttpError response body"""
+	try:
+		data = json.loads(http_error.content.decode('utf-8'))
+		return [error.get('reason') for error in data['error'].get('errors', [])]
+	except (ValueError, KeyError, TypeError, AttributeError):
+		return []
+
+
+class RetryPolicy:
+	"""
+	Retry transient errors with exponential backoff and full jitter.
+	:param max_retries: Retries per request after the first attempt (0 disables retrying).
+	:param base_delay: Backoff of the first retry in seconds; doubles with every further retry.
+	:param max_delay: Upper bound of a single backoff in seconds.
+	:param statuses: HTTP statuses retried.
+	:param reasons: Error reasons retried on 403 responses.
+	"""
+	def __init__(self, max_retries=5, base_delay=1.0, max_delay=64.0, statuses=RETRYABLE_STATUSES, reasons=RETRYABLE_REASONS):
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.statuses = statuses
+		self.reasons = reasons
+
+	def is_retryable(self, exception):
+		if isinstance(exception, HttpError):
+			if exception.resp.status in self.statuses:
+				return True
+			return exception.resp.status == 403 and any(reason in self.reasons for reason in error_reasons(exception))
+		# httplib2 is imported here since it is only needed once a request has failed
+		import httplib2
+		return isinstance(exception, (ConnectionError, TimeoutError, socket.timeout, httplib2.HttpLib2Error))
+
+	def delay(self, attempt, exception=None):
+		"""Seconds to wait before retry number attempt (0-based), honouring Retry-After when the server sends one"""
+		delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+		if isinstance(exception, HttpError):
+			try:
+				delay = max(delay, float(exception.resp.get('retry-after', 0)))
+			except (TypeError, ValueError):
+				pass
+		return delay
+
+
+class TokenBucket:
+	"""
+	Token-bucket rate limiter shared by every thread (and coroutine) sending requests.
+	:param rate: Tokens (requests) added per second.
+	:param capacity: Bucket size, i.e. the largest burst sent without waiting. Defaults to rate.
+	"""
+	def __init__(self, rate, capacity=None):
+		self.rate = float(rate)
+		self.capacity = float(capacity if capacity is not None else max(rate, 1))
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _reserve(self, tokens):
+		"""Take tokens, going into debt if needed, and return the seconds to wait until the debt is repaid"""
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+			self._tokens -= tokens
+			return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+	def acquire(self, tokens=1):
+		"""Block until tokens are available. Returns the seconds waited."""
+		wait = self._reserve(tokens)
+		if wait:
+			time.sleep(wait)
+		return wait
+
+	async def acquire_async(self, tokens=1):
+		import asyncio
+
+		wait = self._reserve(tokens)
+		if wait:
+			await asyncio.sleep(wait)
+		return wait
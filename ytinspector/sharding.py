@@ -0,0 +1,56 @@
+import datetime
+from itertools import chain, zip_longest
+
+# search().list stops paginating after about 500 results per query
+SEARCH_RESULT_CAP = 500
+
+
+def parse_rfc_datetime(value):
+	"""Parse an RFC 3339 timestamp (e.g. 2022-01-01T00:00:00Z) or pass a datetime through, as naive UTC"""
+	if isinstance(value, datetime.datetime):
+		dt = value
+	else:
+		dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+	if dt.tzinfo is not None:
+		dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+	return dt
+
+def format_rfc_datetime(dt):
+	return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def split_window(window):
+	"""Split a (published_after, published_before) window in half, newest half first"""
+	after, before = window
+	middle = after + (before - after) / 2
+	middle = middle.replace(microsecond=0)
+	return (middle, before), (after, middle)
+
+def window_params(window):
+	return {'publishedAfter': format_rfc_datetime(window[0]), 'publishedBefore': format_rfc_datetime(window[1])}
+
+def merge_shards(shards, order_by):
+	"""
+	Merge the results of time window shards (an iterable of result lists, newest window first) into one
+	de-duplicated stream.
+	order_by=date streams shard by shard since the windows do not overlap; title sorts all results;
+	other orders (relevance, rating, viewCount, videoCount) cannot be recomputed locally, so the per-shard
+	rankings returned by the API are interleaved rank by rank.
+	"""
+	seen = set()
+
+	def unique(results):
+		for result in results:
+			# the first field of every search result record is its resource id
+			if result[0] not in seen:
+				seen.add(result[0])
+				yield result
+
+	if order_by == 'date':
+		for results in shards:
+			yield from unique(sorted(results, key=lambda result: result.published_at, reverse=True))
+	elif order_by == 'title':
+		# the second field of every search result record is its title
+		yield from unique(sorted(chain.from_iterable(shards), key=lambda result: result[1].casefold()))
+	else:
+		interleaved = chain.from_iterable(zip_longest(*list(shards)))
+		yield from unique(result for result in interleaved if result is not None)
@@ -0,0 +1,341 @@
+import csv
+import json
+import os
+import sqlite3
+
+from .columnar import _import
+
+SINK_MODES = ('append', 'overwrite', 'upsert')
+
+
+def _plain(value):
+	if hasattr(value, '_asdict'):
+		return {name: _plain(field) for name, field in value._asdict().items()}
+	if isinstance(value, (list, tuple)):
+		return [_plain(item) for item in value]
+	return value
+
+def to_row(record):
+	"""
+	Plain dict of a result record: namedtuples and ytinspector.records compact records by field name
+	(nested replies included), raw API resources as they are.
+	"""
+	if isinstance(record, dict):
+		return record
+	if hasattr(record, '_asdict'):
+		return _plain(record)
+	raise TypeError('Cannot write {0} to a sink'.format(type(record).__name__))
+
+def flatten_row(row):
+	"""Row with nested values (dicts, lists) encoded as JSON strings, for tabular sinks"""
+	return {name: json.dumps(value) if isinstance(value, (dict, list)) else value for name, value in row.items()}
+
+
+class Sink:
+	"""
+	Destination of a stream of result records, written in batches of batch_size so memory stays bounded.
+	Pass a sink to YouTube.searchVideos, retrieveChannelVideos or retrieveVideoComments (sink=...) to stream
+	results straight to disk. Sinks can be reused across calls and must be closed when done (or used in a with block).
+	:param batch_size: Number of records buffered before they are written.
+	:param mode: {append; overwrite; upsert} upsert replaces existing rows that have the same key.
+	:param key: Field identifying a row (e.g. video_id, comment_thread_id, or id for raw resources); required for upsert.
+	"""
+	def __init__(self, batch_size=1000, mode='append', key=None):
+		if mode not in SINK_MODES:
+			raise ValueError('mode must be one of {0}'.format(', '.join(SINK_MODES)))
+		if mode == 'upsert' and key is None:
+			raise ValueError('upsert requires a key')
+		self.batch_size = batch_size
+		self.mode = mode
+		self.key = key
+		self.count = 0
+		self._buffer = []
+
+	def __repr__(self):
+		return '{0}(mode={1!r}, key={2!r}, count={3})'.format(type(self).__name__, self.mode, self.key, self.count)
+
+	def write(self, record):
+		self._buffer.append(to_row(record))
+		if len(self._buffer) >= self.batch_size:
+			self.flush()
+
+	def write_all(self, records):
+		"""Write an iterable of records, flushing at the end. Returns the number of records written."""
+		count = self.count
+		for record in records:
+			self.write(record)
+		self.flush()
+		return self.count - count
+
+	def flush(self):
+		if self._buffer:
+			rows, self._buffer = self._buffer, []
+			self._writeRows(rows)
+			self.count += len(rows)
+
+	def close(self):
+		self.flush()
+		self._close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def _writeRows(self, rows):
+		raise NotImplementedError
+
+	def _close(self):
+		pass
+
+
+class _FileSink(Sink):
+	"""
+	Sink writing one file. Upserts (and appends to formats that cannot be appended to) write the new rows to
+	a temporary file; on close the existing rows whose key was not rewritten are streamed into a new file
+	followed by the last version of every new row, which then replaces the original.
+	"""
+	APPENDABLE = True
+
+	def __init__(self, path, batch_size=1000, mode='append', key=None):
+		super().__init__(batch_size, mode, key)
+		self.path = path
+		exists = os.path.exists(path)
+		self._merge = mode == 'upsert' or (mode == 'append' and exists and not self.APPENDABLE)
+		self._target = path + '.tmp' if self._merge or mode == 'overwrite' else path
+		# key -> position of its last written row, so that only the last version of a row is kept
+		self._keys = {}
+		self._handle = self._open(self._target, append=mode == 'append' and not self._merge and exists)
+
+	def _writeRows(self, rows):
+		if self.mode == 'upsert':
+			for position, row in enumerate(rows, self.count):
+				self._keys[str(row[self.key])] = position
+		self._write(self._handle, rows)
+
+	def _close(self):
+		self._closeHandle(self._handle)
+		if self._merge:
+			self._mergeInto(self.path)
+		elif self._target != self.path and os.path.exists(self._target):
+			os.replace(self._target, self.path)
+
+	def _mergeInto(self, path):
+		merged_path = path + '.merge'
+		handle = self._open(merged_path, append=False)
+		if os.path.exists(path):
+			for rows in self._readBatches(path):
+				if self.mode == 'upsert':
+					rows = [row for row in rows if str(row[self.key]) not in self._keys]
+				self._write(handle, rows)
+		position = 0
+		for rows in self._readBatches(self._target):
+			if self.mode == 'upsert':
+				kept = [row for offset, row in enumerate(rows, position) if self._keys[str(row[self.key])] == offset]
+				position += len(rows)
+				rows = kept
+			self._write(handle, rows)
+		self._closeHandle(handle)
+		os.replace(merged_path, path)
+		if os.path.exists(self._target):
+			os.remove(self._target)
+
+	def _open(self, path, append):
+		raise NotImplementedError
+
+	def _write(self, handle, rows):
+		raise NotImplementedError
+
+	def _closeHandle(self, handle):
+		handle.close()
+
+	def _readBatches(self, path):
+		raise NotImplementedError
+
+
+class JSONLSink(_FileSink):
+	"""
+	Write records as JSON lines, nested replies and resource parts included.
+	:param path: .jsonl file.
+	"""
+	def _open(self, path, append):
+		return open(path, 'a' if append else 'w', encoding='utf-8')
+
+	def _write(self, handle, rows):
+		handle.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+	def _readBatches(self, path):
+		with open(path, encoding='utf-8') as f:
+			rows = []
+			for line in f:
+				rows.append(json.loads(line))
+				if len(rows) >= self.batch_size:
+					yield rows
+					rows = []
+			if rows:
+				yield rows
+
+
+class _CSVHandle:
+	def __init__(self, f, fieldnames=None):
+		self.file = f
+		self.fieldnames = fieldnames
+		self.writer = None
+
+
+class CSVSink(_FileSink):
+	"""
+	Write records as CSV rows; nested values (replies, resource parts) are encoded as JSON strings.
+	The columns are those of the first record written, or the header of the file appended to.
+	:param path: .csv file.
+	"""
+	def _open(self, path, append):
+		fieldnames = None
+		if append:
+			with open(path, newline='', encoding='utf-8') as f:
+				fieldnames = next(csv.reader(f), None)
+		return _CSVHandle(open(path, 'a' if append else 'w', newline='', encoding='utf-8'), fieldnames)
+
+	def _write(self, handle, rows):
+		if not rows:
+			return
+		if handle.writer is None:
+			write_header = handle.fieldnames is None
+			handle.fieldnames = handle.fieldnames or list(rows[0])
+			handle.writer = csv.DictWriter(handle.file, handle.fieldnames, extrasaction='ignore')
+			if write_header:
+				handle.writer.writeheader()
+		handle.writer.writerows(flatten_row(row) for row in rows)
+
+	def _closeHandle(self, handle):
+		handle.file.close()
+
+	def _readBatches(self, path):
+		with open(path, newline='', encoding='utf-8') as f:
+			rows = []
+			for row in csv.DictReader(f):
+				rows.append(row)
+				if len(rows) >= self.batch_size:
+					yield rows
+					rows = []
+			if rows:
+				yield rows
+
+
+class _ParquetHandle:
+	def __init__(self, path, schema=None):
+		self.path = path
+		self.schema = schema
+		self.writer = None
+		# string columns; other values written to them (e.g. in a column empty throughout the first batch) are converted
+		self.text_columns = None
+
+
+class ParquetSink(_FileSink):
+	"""
+	Write records to a Parquet file, one row group per batch (pip install ytinspector[arrow]).
+	Nested values are encoded as JSON strings. The schema is inferred from the first batch; columns that are
+	empty throughout it are stored as strings. Parquet files cannot be appended to, so append rewrites the file on close.
+	:param path: .parquet file.
+	"""
+	APPENDABLE = False
+
+	def __init__(self, path, batch_size=10000, mode='append', key=None):
+		self._pa = _import('pyarrow', 'arrow')
+		self._pq = _import('pyarrow.parquet', 'arrow').parquet
+		super().__init__(path, batch_size, mode, key)
+
+	def _open(self, path, append):
+		return _ParquetHandle(path, self._pq.read_schema(self.path) if self._merge and os.path.exists(self.path) else None)
+
+	def _write(self, handle, rows):
+		if not rows:
+			return
+		rows = [flatten_row(row) for row in rows]
+		if handle.schema is None:
+			schema = self._pa.Table.from_pylist(rows).schema
+			handle.schema = self._pa.schema([
+				field.with_type(self._pa.string()) if self._pa.types.is_null(field.type) else field for field in schema
+			])
+		if handle.text_columns is None:
+			handle.text_columns = [field.name for field in handle.schema if self._pa.types.is_string(field.type)]
+		for name in handle.text_columns:
+			for row in rows:
+				value = row.get(name)
+				if value is not None and not isinstance(value, str):
+					row[name] = str(value)
+		table = self._pa.Table.from_pylist(rows, schema=handle.schema)
+		if handle.writer is None:
+			handle.writer = self._pq.ParquetWriter(handle.path, handle.schema)
+		handle.writer.write_table(table)
+
+	def _closeHandle(self, handle):
+		if handle.writer is not None:
+			handle.writer.close()
+
+	def _readBatches(self, path):
+		if not os.path.exists(path):
+			return
+		for batch in self._pq.ParquetFile(path).iter_batches(batch_size=self.batch_size):
+			yield batch.to_pylist()
+
+
+def _quote(name):
+	return '"{0}"'.format(name.replace('"', '""'))
+
+
+class SQLiteSink(Sink):
+	"""
+	Write records to a SQLite table, one transaction per batch. Nested values are encoded as JSON strings.
+	The table is created from the first batch and gains a column whenever a record brings a new field.
+	Upserts replace the rows whose key already exists (a unique index is created on the key column).
+	:param path: SQLite database file.
+	:param table: Table name.
+	"""
+	def __init__(self, path, table, batch_size=1000, mode='append', key=None):
+		super().__init__(batch_size, mode, key)
+		self.path = path
+		self.table = table
+		self._columns = None
+		self._indexed = False
+		self._conn = sqlite3.connect(path)
+		if mode == 'overwrite':
+			self._conn.execute('DROP TABLE IF EXISTS {0}'.format(_quote(table)))
+			self._conn.commit()
+
+	def _ensureColumns(self, rows):
+		if self._columns is None:
+			self._columns = [info[1] for info in self._conn.execute('PRAGMA table_info({0})'.format(_quote(self.table)))]
+		new_columns = []
+		for row in rows:
+			new_columns.extend(name for name in row if name not in self._columns and name not in new_columns)
+		if new_columns:
+			if not self._columns:
+				self._conn.execute('CREATE TABLE {0} ({1})'.format(_quote(self.table), ', '.join(map(_quote, new_columns))))
+			else:
+				for name in new_columns:
+					self._conn.execute('ALTER TABLE {0} ADD COLUMN {1}'.format(_quote(self.table), _quote(name)))
+			self._columns.extend(new_columns)
+		# also when upserting into an existing table, e.g. one written in append mode, which has no key index yet
+		if self.mode == 'upsert' and not self._indexed:
+			try:
+				self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS {0} ON {1} ({2})'.format(
+					_quote('{0}_{1}_key'.format(self.table, self.key)), _quote(self.table), _quote(self.key)
+				))
+			except sqlite3.IntegrityError:
+				raise ValueError('Cannot upsert into {0}: it already holds rows with the same {1}'.format(self.table, self.key))
+			self._indexed = True
+
+	def _writeRows(self, rows):
+		rows = [flatten_row(row) for row in rows]
+		self._ensureColumns(rows)
+		sql = '{0} INTO {1} ({2}) VALUES ({3})'.format(
+			'INSERT OR REPLACE' if self.mode == 'upsert' else 'INSERT',
+			_quote(self.table), ', '.join(map(_quote, self._columns)), ', '.join('?' * len(self._columns))
+		)
+		with self._conn:
+			self._conn.executemany(sql, [[row.get(name) for name in self._columns] for row in rows])
+
+	def _close(self):
+		self._conn.close()
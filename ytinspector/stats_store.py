@@ -0,0 +1,291 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+from .columnar import _import
+
+# statistics tracked, as named in videos resources and as the columns of the change log
+STATS_METRICS = ('viewCount', 'likeCount', 'commentCount')
+# CompactVideo field of each metric
+COMPACT_FIELDS = {'viewCount': 'view_count', 'likeCount': 'like_count', 'commentCount': 'comment_count'}
+# stored value of a hidden statistic (e.g. likeCount of a video with likes hidden)
+HIDDEN = -1
+
+DAY = 24 * 60 * 60
+
+
+def to_timestamp(value):
+	"""Epoch seconds of a datetime (naive datetimes are UTC), or an int passed through; None is now"""
+	if value is None:
+		return int(time.time())
+	if isinstance(value, datetime.datetime):
+		if value.tzinfo is None:
+			value = value.replace(tzinfo=datetime.timezone.utc)
+		return int(value.timestamp())
+	return int(value)
+
+def video_statistics(video):
+	"""(video_id, [viewCount, likeCount, commentCount]) of a raw videos resource or a records.CompactVideo"""
+	if isinstance(video, dict):
+		statistics = video.get('statistics', {})
+		values = [statistics.get(metric) for metric in STATS_METRICS]
+		return video['id'], [int(value) if value is not None else HIDDEN for value in values]
+	values = [getattr(video, COMPACT_FIELDS[metric]) for metric in STATS_METRICS]
+	return video.video_id, [value if value is not None else HIDDEN for value in values]
+
+
+class StatsStore:
+	"""
+	Local time series of video statistics (views, likes, comments), one directory per channel.
+	Every append records a snapshot time, but only the videos whose statistics changed since their previous
+	snapshot are written, as deltas, to an append-only columnar log (time, video, one column per metric) that
+	queries read through a memory map. Values are rebuilt per video with a cumulative sum of its deltas.
+	Requires numpy (pip install ytinspector[numpy]).
+	:param path: Root directory of the store.
+	"""
+	LOG_FILE = 'changes.bin'
+	SNAPSHOTS_FILE = 'snapshots.bin'
+	VIDEOS_FILE = 'videos.json'
+
+	def __init__(self, path='ytinspector_stats'):
+		self.np = _import('numpy', 'numpy')
+		self.path = path
+		self.dtype = self.np.dtype([('time', '<i8'), ('video', '<i4')] + [(metric, '<i8') for metric in STATS_METRICS])
+		self._lock = threading.RLock()
+		# channel id -> (video ids, video id -> index, latest values array)
+		self._channels = {}
+		os.makedirs(path, exist_ok=True)
+
+	def __repr__(self):
+		return 'StatsStore(path={0!r})'.format(self.path)
+
+	def channels(self):
+		return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+	def _file(self, channel_id, name):
+		return os.path.join(self.path, channel_id, name)
+
+	def _read(self, channel_id, name, dtype):
+		"""Memory map of an append-only file; a record cut short by an interrupted write is ignored"""
+		path = self._file(channel_id, name)
+		count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+		if count == 0:
+			return self.np.zeros(0, dtype=dtype)
+		return self.np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+	def _log(self, channel_id):
+		return self._read(channel_id, self.LOG_FILE, self.dtype)
+
+	def snapshots(self, channel_id):
+		"""Epoch seconds of every snapshot appended for the channel"""
+		return self.np.array(self._read(channel_id, self.SNAPSHOTS_FILE, self.np.dtype('<i8')))
+
+	def _channel(self, channel_id):
+		"""Video ids, their indexes and their latest values, loaded once per channel"""
+		if channel_id not in self._channels:
+			path = self._file(channel_id, self.VIDEOS_FILE)
+			video_ids = []
+			if os.path.exists(path):
+				with open(path) as f:
+					video_ids = json.load(f)
+			latest = self.np.zeros((len(video_ids), len(STATS_METRICS)), dtype='<i8')
+			log = self._log(channel_id)
+			for column, metric in enumerate(STATS_METRICS):
+				self.np.add.at(latest[:, column], log['video'], log[metric])
+			self._channels[channel_id] = (video_ids, {video_id: index for index, video_id in enumerate(video_ids)}, latest)
+		return self._channels[channel_id]
+
+	def append(self, channel_id, videos, timestamp=None):
+		"""
+		Record a snapshot of a channel's video statistics.
+		:param videos: Raw videos resources (with the statistics part) or records.CompactVideo records,
+			e.g. the result of YouTube.retrieveChannelVideos.
+		:param timestamp: Snapshot time (datetime or epoch seconds), defaults to now. Snapshots must be appended in time order.
+		:return: Number of videos whose statistics changed.
+		"""
+		np = self.np
+		timestamp = to_timestamp(timestamp)
+		with self._lock:
+			snapshots = self._read(channel_id, self.SNAPSHOTS_FILE, np.dtype('<i8'))
+			if len(snapshots) and timestamp < snapshots[-1]:
+				raise ValueError('Snapshot at {0} is older than the last snapshot ({1})'.format(timestamp, int(snapshots[-1])))
+			video_ids, indexes, latest = self._channel(channel_id)
+
+			new_video_ids = []
+			# video index -> values; a video listed twice keeps its last values
+			rows = {}
+			for video in videos:
+				video_id, values = video_statistics(video)
+				if video_id not in indexes:
+					indexes[video_id] = len(video_ids) + len(new_video_ids)
+					new_video_ids.append(video_id)
+				rows[indexes[video_id]] = values
+			os.makedirs(os.path.join(self.path, channel_id), exist_ok=True)
+			first_new_index = len(video_ids)
+			if new_video_ids:
+				video_ids.extend(new_video_ids)
+				latest = np.vstack([latest, np.zeros((len(new_video_ids), len(STATS_METRICS)), dtype='<i8')])
+				self._writeJSON(self._file(channel_id, self.VIDEOS_FILE), video_ids)
+
+			changes = np.zeros(0, dtype=self.dtype)
+			if rows:
+				rows = np.array([[index] + values for index, values in rows.items()], dtype='<i8')
+				deltas = rows[:, 1:] - latest[rows[:, 0]]
+				# the first snapshot of a video is always written, even with all statistics at 0
+				changed = deltas.any(axis=1) | (rows[:, 0] >= first_new_index)
+				changes = np.zeros(int(changed.sum()), dtype=self.dtype)
+				changes['time'] = timestamp
+				changes['video'] = rows[changed, 0]
+				for column, metric in enumerate(STATS_METRICS):
+					changes[metric] = deltas[changed, column]
+				latest[rows[:, 0]] = rows[:, 1:]
+			self._channels[channel_id] = (video_ids, indexes, latest)
+
+			with open(self._file(channel_id, self.LOG_FILE), 'ab') as f:
+				f.write(changes.tobytes())
+			with open(self._file(channel_id, self.SNAPSHOTS_FILE), 'ab') as f:
+				f.write(np.array([timestamp], dtype='<i8').tobytes())
+			return len(changes)
+
+	@staticmethod
+	def _writeJSON(path, data):
+		tmp_path = path + '.tmp'
+		with open(tmp_path, 'w') as f:
+			json.dump(data, f)
+		os.replace(tmp_path, path)
+
+	def _values(self, log, metrics):
+		"""
+		Change log rows ordered by (video, time) with the absolute value of every metric.
+		:return: Tuple(videos, times, {metric: values}).
+		"""
+		np = self.np
+		order = np.argsort(log['video'], kind='stable')
+		videos = np.asarray(log['video'])[order]
+		times = np.asarray(log['time'])[order]
+		if not len(videos):
+			return videos, times, {metric: np.zeros(0, dtype='<i8') for metric in metrics}
+		# first row of every video
+		starts = np.flatnonzero(np.r_[True, videos[1:] != videos[:-1]])
+		lengths = np.diff(np.r_[starts, len(videos)])
+		values = {}
+		for metric in metrics:
+			total = np.cumsum(np.asarray(log[metric])[order])
+			# running sum restarted at every video
+			values[metric] = total - np.repeat(np.r_[0, total[starts[1:] - 1]], lengths)
+		return videos, times, values
+
+	def _lastBefore(self, videos, times, timestamp):
+		"""Mask of the last row of every video at or before timestamp (rows ordered by video, time)"""
+		np = self.np
+		before = times <= timestamp
+		next_before = np.r_[before[1:], False] & np.r_[videos[1:] == videos[:-1], False]
+		return before & ~next_before
+
+	def _videoIndexes(self, channel_id, video_ids):
+		all_video_ids, indexes, latest = self._channel(channel_id)
+		return [indexes[video_id] for video_id in video_ids if video_id in indexes]
+
+	def series(self, channel_id, metric='viewCount', start=None, end=None, video_ids=None):
+		"""
+		Time series of a metric per video between start and end (datetimes or epoch seconds; defaults to all time).
+		Every series starts with the value in effect at start, then lists each change; values hold between changes.
+		Hidden statistics read -1.
+		:return: Dict of video id -> Tuple(times, values), epoch seconds and values as int64 NumPy arrays.
+		"""
+		np = self.np
+		with self._lock:
+			all_video_ids = self._channel(channel_id)[0]
+			log = self._log(channel_id)
+			if video_ids is not None:
+				log = log[np.isin(log['video'], self._videoIndexes(channel_id, video_ids))]
+		start = to_timestamp(start) if start is not None else np.iinfo('<i8').min
+		end = to_timestamp(end)
+		videos, times, values = self._values(log, [metric])
+		values = values[metric]
+
+		at_start = self._lastBefore(videos, times, start)
+		selected = at_start | ((times > start) & (times <= end))
+		videos, times, values = videos[selected], np.where(at_start[selected], start, times[selected]), values[selected]
+		if not len(videos):
+			return {}
+		starts = np.flatnonzero(np.r_[True, videos[1:] != videos[:-1]])
+		return {
+			all_video_ids[videos[first]]: (video_times, video_values)
+			for first, video_times, video_values in zip(starts, np.split(times, starts[1:]), np.split(values, starts[1:]))
+		}
+
+	def values_at(self, channel_id, timestamp=None, metrics=STATS_METRICS):
+		"""
+		Statistics of every video as of timestamp (datetime or epoch seconds, defaults to now).
+		:return: Dict of video id -> {metric: value}.
+		"""
+		with self._lock:
+			all_video_ids = self._channel(channel_id)[0]
+			log = self._log(channel_id)
+		videos, times, values = self._values(log, metrics)
+		last = self._lastBefore(videos, times, to_timestamp(timestamp))
+		columns = {metric: values[metric][last].tolist() for metric in metrics}
+		return {
+			all_video_ids[video]: {metric: columns[metric][row] for metric in metrics}
+			for row, video in enumerate(videos[last].tolist())
+		}
+
+	def change(self, channel_id, metric='viewCount', start=None, end=None):
+		"""
+		Growth of a metric per video between start and end, e.g. views gained over the last 30 days:
+		store.change(channel_id, 'viewCount', start=datetime.datetime.utcnow() - datetime.timedelta(days=30)).
+		Videos first seen after start count from 0; hidden values are skipped.
+		:return: Dict of video id -> change.
+		"""
+		before = self.values_at(channel_id, start if start is not None else 0, [metric])
+		after = self.values_at(channel_id, end, [metric])
+		changes = {}
+		for video_id, values in after.items():
+			value = values[metric]
+			previous = before[video_id][metric] if video_id in before else 0
+			if value != HIDDEN and previous != HIDDEN:
+				changes[video_id] = value - previous
+		return changes
+
+	def compact(self, channel_id, older_than=7 * DAY, resolution=DAY):
+		"""
+		Downsample history: changes and snapshots older than older_than seconds are reduced to the last one per
+		video per resolution seconds (e.g. hourly snapshots to daily), then the log is rewritten.
+		:return: Tuple(rows before, rows after).
+		"""
+		np = self.np
+		with self._lock:
+			log = np.array(self._log(channel_id))
+			if not len(log):
+				return 0, 0
+			cutoff = int(time.time()) - older_than
+			videos, times, values = self._values(log, STATS_METRICS)
+
+			# keep recent rows, and the last old row of every (video, bucket)
+			buckets = np.where(times < cutoff, times // resolution, -1 - np.arange(len(times)))
+			keep = np.r_[(videos[1:] != videos[:-1]) | (buckets[1:] != buckets[:-1]), True]
+			videos, times = videos[keep], times[keep]
+			first = np.r_[True, videos[1:] != videos[:-1]]
+			compacted = np.zeros(len(videos), dtype=self.dtype)
+			compacted['time'] = times
+			compacted['video'] = videos
+			for metric in STATS_METRICS:
+				kept_values = values[metric][keep]
+				compacted[metric] = np.where(first, kept_values, kept_values - np.r_[0, kept_values[:-1]])
+			changed = first | np.any([compacted[metric] != 0 for metric in STATS_METRICS], axis=0)
+			compacted = compacted[changed]
+			compacted = compacted[np.argsort(compacted['time'], kind='stable')]
+
+			snapshots = self.snapshots(channel_id)
+			snapshot_buckets = np.where(snapshots < cutoff, snapshots // resolution, -1 - np.arange(len(snapshots)))
+			snapshots = snapshots[np.r_[snapshot_buckets[1:] != snapshot_buckets[:-1], True]] if len(snapshots) else snapshots
+
+			for name, data in ((self.LOG_FILE, compacted), (self.SNAPSHOTS_FILE, snapshots)):
+				tmp_path = self._file(channel_id, name) + '.tmp'
+				with open(tmp_path, 'wb') as f:
+					f.write(data.tobytes())
+				os.replace(tmp_path, self._file(channel_id, name))
+			return len(log), len(compacted)
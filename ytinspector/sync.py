@@ -0,0 +1,164 @@
+import json
+
+
+class _SyncState:
+	def to_dict(self):
+		raise NotImplementedError
+
+	@classmethod
+	def from_dict(cls, data):
+		return cls(**data)
+
+	def save(self, path):
+		with open(path, 'w') as f:
+			json.dump(self.to_dict(), f)
+
+	@classmethod
+	def load(cls, path):
+		with open(path) as f:
+			return cls.from_dict(json.load(f))
+
+
+class ChannelSyncState(_SyncState):
+	"""
+	Watermark of the uploads already seen for a channel, used by YouTube.syncChannelVideos.
+	The state is plain data and round-trips through to_dict/from_dict (or save/load as JSON).
+	"""
+	# number of most recent upload ids remembered to recognise known items
+	RECENT_IDS = 50
+
+	def __init__(self, channel_id, playlist_id=None, newest_video_id=None, newest_published_at=None, recent_video_ids=None):
+		self.channel_id = channel_id
+		self.playlist_id = playlist_id
+		self.newest_video_id = newest_video_id
+		self.newest_published_at = newest_published_at
+		self.recent_video_ids = list(recent_video_ids or [])
+		self._recent = set(self.recent_video_ids)
+
+	def __repr__(self):
+		return 'ChannelSyncState(channel_id={0!r}, newest_video_id={1!r}, newest_published_at={2!r})'.format(
+			self.channel_id, self.newest_video_id, self.newest_published_at)
+
+	def is_known(self, playlist_item):
+		"""True if an uploads playlistItems resource (part contentDetails) was already synced"""
+		if playlist_item['contentDetails']['videoId'] in self._recent:
+			return True
+		published_at = playlist_item['contentDetails'].get('videoPublishedAt')
+		# RFC 3339 timestamps returned by the API compare chronologically as strings
+		return self.newest_published_at is not None and published_at is not None and published_at < self.newest_published_at
+
+	def advance(self, playlist_items, playlist_id=None):
+		"""Return a new state that also covers playlist_items (newest first)"""
+		state = ChannelSyncState(
+			self.channel_id, playlist_id or self.playlist_id, self.newest_video_id, self.newest_published_at,
+			[item['contentDetails']['videoId'] for item in playlist_items] + self.recent_video_ids
+		)
+		state.recent_video_ids = state.recent_video_ids[:self.RECENT_IDS]
+		state._recent = set(state.recent_video_ids)
+
+		for item in playlist_items:
+			published_at = item['contentDetails'].get('videoPublishedAt')
+			if published_at is not None and (state.newest_published_at is None or published_at > state.newest_published_at):
+				state.newest_video_id = item['contentDetails']['videoId']
+				state.newest_published_at = published_at
+		return state
+
+	def to_dict(self):
+		return {
+			'channel_id': self.channel_id,
+			'playlist_id': self.playlist_id,
+			'newest_video_id': self.newest_video_id,
+			'newest_published_at': self.newest_published_at,
+			'recent_video_ids': self.recent_video_ids
+		}
+
+
+class CommentSyncState(_SyncState):
+	"""
+	High-water mark of the comment threads already seen for a video or channel, used by
+	YouTube.syncVideoComments and YouTube.syncChannelRelatedComments.
+	Recently seen threads are remembered with their updatedAt so that edits can be detected.
+	"""
+	# number of most recent comment threads remembered with their updatedAt
+	RECENT_COMMENTS = 500
+
+	NEW = 'new'
+	EDITED = 'edited'
+	KNOWN = 'known'
+
+	def __init__(self, target_id, newest_published_at=None, newest_updated_at=None, recent_comments=None):
+		"""
+		:param target_id: Video id or channel id the comments belong to.
+		:param newest_published_at: Threads published after this RFC 3339 timestamp are new.
+		:param newest_updated_at: Older threads updated after this RFC 3339 timestamp are reported as edited.
+		:param recent_comments: Dict of comment thread id -> updatedAt (None if unknown) already synced.
+		"""
+		self.target_id = target_id
+		self.newest_published_at = newest_published_at
+		self.newest_updated_at = newest_updated_at
+		self.recent_comments = dict(recent_comments or {})
+
+	def __repr__(self):
+		return 'CommentSyncState(target_id={0!r}, newest_published_at={1!r}, newest_updated_at={2!r})'.format(
+			self.target_id, self.newest_published_at, self.newest_updated_at)
+
+	@property
+	def initial(self):
+		"""True if nothing has been synced yet"""
+		return self.newest_published_at is None and not self.recent_comments
+
+	@classmethod
+	def since(cls, target_id, published_at=None, comment_id=None):
+		"""
+		State that syncs comments published after a timestamp and/or newer than a given comment thread.
+		"""
+		return cls(target_id, published_at, published_at, {comment_id: None} if comment_id else None)
+
+	def classify(self, comment_threads_item):
+		"""Return NEW, EDITED or KNOWN for a commentThreads resource. Threads must be classified newest first."""
+		comment_thread_id = comment_threads_item['snippet']['topLevelComment']['id']
+		snippet = comment_threads_item['snippet']['topLevelComment']['snippet']
+
+		if comment_thread_id in self.recent_comments:
+			if self.newest_published_at is None:
+				# a state made with since(comment_id=...) only knows that thread: the threads listed after it
+				# (published earlier) are known too, so its publishedAt becomes the watermark
+				self.newest_published_at = snippet['publishedAt']
+			updated_at = self.recent_comments[comment_thread_id]
+			if updated_at is not None and snippet['updatedAt'] > updated_at:
+				return self.EDITED
+			return self.KNOWN
+
+		if self.newest_published_at is None or snippet['publishedAt'] > self.newest_published_at:
+			return self.NEW
+		if self.newest_updated_at is not None and snippet['updatedAt'] > self.newest_updated_at:
+			return self.EDITED
+		return self.KNOWN
+
+	def advance(self, comment_threads_items):
+		"""Return a new state that also covers comment_threads_items (the threads scanned by a sync)"""
+		recent_comments = {}
+		newest_published_at = self.newest_published_at
+		newest_updated_at = self.newest_updated_at
+		for item in comment_threads_items:
+			snippet = item['snippet']['topLevelComment']['snippet']
+			if len(recent_comments) < self.RECENT_COMMENTS:
+				recent_comments[item['snippet']['topLevelComment']['id']] = snippet['updatedAt']
+			if newest_published_at is None or snippet['publishedAt'] > newest_published_at:
+				newest_published_at = snippet['publishedAt']
+			if newest_updated_at is None or snippet['updatedAt'] > newest_updated_at:
+				newest_updated_at = snippet['updatedAt']
+
+		for comment_thread_id, updated_at in self.recent_comments.items():
+			if len(recent_comments) >= self.RECENT_COMMENTS:
+				break
+			recent_comments.setdefault(comment_thread_id, updated_at)
+		return CommentSyncState(self.target_id, newest_published_at, newest_updated_at, recent_comments)
+
+	def to_dict(self):
+		return {
+			'target_id': self.target_id,
+			'newest_published_at': self.newest_published_at,
+			'newest_updated_at': self.newest_updated_at,
+			'recent_comments': self.recent_comments
+		}
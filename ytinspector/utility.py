@@ -1,14 +1,17 @@
+import logging
 import re
-import requests
 from collections import namedtuple
+from functools import lru_cache
 
-ChannelRelatedComment = namedtuple('VideoComment', 
+logger = logging.getLogger(__name__)
+
+ChannelRelatedComment = namedtuple('ChannelRelatedComment', 
 	['channel_id', 'video_id', 'comment_thread_id', 'comment_text', 'commenter_name', 'commenter_channel', 'like_count', 'published_timestamp', 'updated_timestamp', 'reply_count', 'replies'])
 
 VideoComment = namedtuple('VideoComment', 
 	['video_id', 'comment_thread_id', 'comment_text', 'commenter_name', 'commenter_channel', 'like_count', 'published_timestamp', 'updated_timestamp', 'reply_count', 'replies'])
     
-VideoReply = namedtuple('VideoCommentReply', 
+VideoReply = namedtuple('VideoReply', 
 	['comment_reply_id', 'comment_thread_id', 'reply_text', 'reply_commenter_name','reply_commenter_channel', 'like_count', 'published_timestamp', 'updated_timestamp' ])
 
 SearchResultsVideo = namedtuple('SearchResultsVideo',
@@ -24,21 +27,120 @@ SearchResultsPlaylist = namedtuple('SearchResultsPlaylist',
 )
 
 
+def to_video_comment(comment_threads_item, replies=None):
+	"""Convert a commentThreads resource to VideoComment"""
+	top_level_comment = comment_threads_item['snippet']['topLevelComment']
+	return VideoComment(
+		comment_threads_item['snippet']['videoId'],
+		top_level_comment['id'],
+		top_level_comment['snippet']['textDisplay'],
+		top_level_comment['snippet']['authorDisplayName'],
+		top_level_comment['snippet']['authorChannelUrl'],
+		top_level_comment['snippet']['likeCount'],
+		top_level_comment['snippet']['publishedAt'],
+		top_level_comment['snippet']['updatedAt'],
+		comment_threads_item['snippet']['totalReplyCount'],
+		replies if replies is not None else []
+	)
+
+def to_channel_related_comment(comment_threads_item, replies=None):
+	"""Convert a commentThreads resource to ChannelRelatedComment"""
+	top_level_comment = comment_threads_item['snippet']['topLevelComment']
+	return ChannelRelatedComment(
+		comment_threads_item['snippet']['channelId'],
+		comment_threads_item['snippet']['videoId'],
+		top_level_comment['id'],
+		top_level_comment['snippet']['textDisplay'],
+		top_level_comment['snippet']['authorDisplayName'],
+		top_level_comment['snippet']['authorChannelUrl'],
+		top_level_comment['snippet']['likeCount'],
+		top_level_comment['snippet']['publishedAt'],
+		top_level_comment['snippet']['updatedAt'],
+		comment_threads_item['snippet']['totalReplyCount'],
+		replies if replies is not None else []
+	)
+
+def to_video_reply(comment_replies_item, comment_thread_id):
+	"""Convert a comments resource to VideoReply"""
+	return VideoReply(
+		comment_replies_item['id'],
+		comment_thread_id,
+		comment_replies_item['snippet']['textDisplay'],
+		comment_replies_item['snippet']['authorDisplayName'],
+		comment_replies_item['snippet']['authorChannelUrl'],
+		comment_replies_item['snippet']['likeCount'],
+		comment_replies_item['snippet']['publishedAt'],
+		comment_replies_item['snippet']['updatedAt']
+	)
+
+def to_search_results_video(videos_item, region_code):
+	"""Convert a search resource (type=video) to SearchResultsVideo"""
+	return SearchResultsVideo(
+		videos_item['id']['videoId'],
+		videos_item['snippet']['title'],
+		videos_item['snippet']['channelId'],
+		videos_item['snippet']['channelTitle'],
+		videos_item['snippet']['description'],
+		videos_item['snippet']['publishedAt'],
+		region_code,
+		videos_item['snippet']['thumbnails']['default']['url'],
+		'https://www.youtube.com/watch?v={0}'.format(videos_item['id']['videoId'])
+	)
+
+def to_search_results_channel(channel_item, region_code):
+	"""Convert a search resource (type=channel) to SearchResultsChannel"""
+	return SearchResultsChannel(
+		channel_item['snippet']['channelId'],
+		channel_item['snippet']['channelTitle'],
+		channel_item['snippet']['description'],
+		channel_item['snippet']['publishedAt'],
+		region_code,
+		channel_item['snippet']['thumbnails']['default']['url'],
+		'https://www.youtube.com/channel/{0}'.format(channel_item['snippet']['channelId'])
+	)
+
+def to_search_results_playlist(playlist_item, region_code):
+	"""Convert a search resource (type=playlist) to SearchResultsPlaylist"""
+	return SearchResultsPlaylist(
+		playlist_item['id']['playlistId'],
+		playlist_item['snippet']['title'],
+		playlist_item['snippet']['channelId'],
+		playlist_item['snippet']['channelTitle'],
+		playlist_item['snippet']['description'],
+		playlist_item['snippet']['publishedAt'],
+		region_code,
+		playlist_item['snippet']['thumbnails']['default']['url'],
+		'https://www.youtube.com/playlist?list={0}'.format(playlist_item['id']['playlistId'])
+	)
+
+
+# ISO 8601 durations as returned in contentDetails.duration, e.g. PT1H2M3S, P1DT2H, P0D (live streams)
+DURATION_PATTERN = re.compile(r'P(?:(\d+)W)?(?:(\d+)D)?(?:T(?=\d)(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)(?:\.\d*)?S)?)?')
+
+# seconds per week, day, hour, minute and second, in the order of the DURATION_PATTERN groups
+DURATION_UNITS = (7 * 24 * 60 * 60, 24 * 60 * 60, 60 * 60, 60, 1)
+
+
+@lru_cache(maxsize=65536)
 def convert_duration(duration):
 	"""
-	Convert duration string to seconds
+	Convert an ISO 8601 duration string (weeks, days, hours, minutes, seconds) to whole seconds.
+	Returns 0 for an empty or unparseable duration. Results are cached, catalogues repeat the same durations.
 	"""
-	try:
-		h = int(re.search('\d+H', duration)[0][:-1]) * 60**2  if re.search('\d+H', duration) else 0
-		m = int(re.search('\d+M', duration)[0][:-1]) * 60  if re.search('\d+M', duration) else 0
-		s = int(re.search('\d+S', duration)[0][:-1])  if re.search('\d+S', duration) else 0
-		return h + m + s
-	except Exception as e:
-		print(e)
+	match = DURATION_PATTERN.fullmatch(duration) if isinstance(duration, str) else None
+	if match is None or duration == 'P':
+		logger.warning('Cannot parse duration %r', duration)
 		return 0
+	seconds = 0
+	for value, unit in zip(match.groups(), DURATION_UNITS):
+		if value:
+			seconds += int(value) * unit
+	return seconds
 
 def locate_channel_id(video_id):
     """returns channel url and channel id"""
+    import requests
+
     response = requests.get('https://www.youtube.com/watch?v={0}'.format(video_id))
     results = re.search(r'channel\/(UC.{22})', response.text, re.MULTILINE)
     if results:
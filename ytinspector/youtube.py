@@ -1,7 +1,20 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import takewhile
+
 from .exceptions import YouTubeException, NoVideosReturned, NoCommentsReturned, SearchResultReturnsNone
-from .google_apis import create_service, convert_to_RFC_datetime
-from ytinspector.utility import (ChannelRelatedComment, VideoComment, VideoReply, SearchResultsChannel, SearchResultsVideo, SearchResultsPlaylist)
+from .google_apis import create_service, convert_to_RFC_datetime, build_thread_http
+from .executor import RequestExecutor
+from .checkpoint import as_checkpoint, checkpoint_key
+from .fields import AUTO, converter_fields, fields_mask, resolve_fields
+from .sharding import SEARCH_RESULT_CAP, parse_rfc_datetime, split_window, window_params, merge_shards
+from .pagination import iter_pages, iter_items
+from .sync import ChannelSyncState, CommentSyncState
 from ytinspector.utility import (convert_duration)
+from ytinspector.utility import (to_video_comment, to_channel_related_comment, to_video_reply, 
+								 to_search_results_video, to_search_results_channel, to_search_results_playlist)
+from .records import to_compact_video_comment, to_compact_channel_related_comment, to_compact_video
 
 class YouTube:
 	SCOPES = ['https://www.googleapis.com/auth/youtube', 
@@ -9,10 +22,23 @@ class YouTube:
 			  'https://www.googleapis.com/auth/youtubepartner']
 	API_NAME = 'youtube'
 	API_VERSION = 'v3'
+	# uploads playlist fields read by the channel video crawls and ChannelSyncState
+	UPLOADS_FIELDS = fields_mask(['contentDetails/videoId', 'contentDetails/videoPublishedAt'])
 
-	def __init__(self, client_secret_file):
+	def __init__(self, client_secret_file, max_workers=8, cache=None, ledger=None, retry=None, rate_limit=None):
+		"""
+		:param client_secret_file: OAuth client secret file.
+		:param max_workers: Number of worker threads used for concurrent requests (e.g. comment replies).
+		:param cache: Optional response cache (ytinspector.cache.MemoryCache or SQLiteCache).
+		:param ledger: Optional ytinspector.quota.QuotaLedger charged for every API call.
+		:param retry: Optional ytinspector.retry.RetryPolicy for transient errors (5 retries with exponential backoff by default).
+		:param rate_limit: Optional requests per second cap, or a ytinspector.retry.TokenBucket shared between clients.
+		"""
 		self.client_secret_file = client_secret_file
+		self.max_workers = max_workers
 		self.service = None
+		self.executor = RequestExecutor(cache=cache, ledger=ledger, retry=retry, rate_limit=rate_limit)
+		self._local = threading.local()
 	   
 	def initService(self, prefix:str=None):
 		try:
@@ -20,280 +46,398 @@ class YouTube:
 		except Exception as e:
 			raise YouTubeException(e)
 
-	def retrieveChannelVideos(self, channel_id, id_type='by id'):
+	def _iterPages(self, list_method, empty_error=None, item_limit=None, checkpoint=None, resume=False, **params):
+		"""
+		Walk a paginated endpoint lazily. Raises empty_error if the first page reports no results.
+		With a checkpoint, progress is saved to disk as pages arrive; with resume, the items saved by an
+		interrupted crawl are yielded first (as one page) and pagination continues from the saved page token.
+		"""
+		checkpoint = as_checkpoint(checkpoint)
+		if checkpoint is not None:
+			page_token, items = checkpoint.start(checkpoint_key(list_method, params), resume)
+			if page_token:
+				yield {'items': items}
+				params['pageToken'] = page_token
+				empty_error = None
+				if item_limit is not None:
+					item_limit -= len(items)
+					if item_limit <= 0:
+						checkpoint.complete()
+						return
+
+		for page_number, response in enumerate(iter_pages(list_method, item_limit=item_limit, execute=self._execute, **params)):
+			if page_number == 0 and empty_error is not None and response['pageInfo']['totalResults'] == 0:
+				raise empty_error
+			if checkpoint is not None:
+				checkpoint.update(response)
+			yield response
+
+		if checkpoint is not None:
+			checkpoint.complete()
+
+	def _iterResults(self, pages, convert, *args):
+		"""Convert every item of every page with convert(item, *args)."""
+		for response in pages:
+			for item in response['items']:
+				yield convert(item, *args)
+
+	def _collect(self, results, sink=None):
+		"""List of the results, or with a sink, the number of results streamed to it"""
+		if sink is not None:
+			return sink.write_all(results)
+		return list(results)
+
+	def _execute(self, request, http=None):
+		return self.executor.execute(request, http=http)
+
+	def _executeInThread(self, request):
+		"""Execute a request on a transport owned by the calling thread."""
+		http = getattr(self._local, 'http', None)
+		if http is None:
+			http = self._local.http = build_thread_http(self.service)
+		return self._execute(request, http=http)
+
+	def _retrieveCommentReplies(self, comment_threads_item, output_type='plainText', execute=None):
+		comment_replies = self._completeReplies(comment_threads_item)
+		if comment_replies is not None:
+			return comment_replies
+
+		comment_thread_id = comment_threads_item['snippet']['topLevelComment']['id']
+		return [
+			to_video_reply(comment_replies_item, comment_thread_id)
+			for comment_replies_item in iter_items(
+				self.service.comments().list,
+				execute=execute or self._execute,
+				part='snippet',
+				parentId=comment_thread_id,
+				maxResults=100,
+				textFormat=output_type,
+				fields=fields_mask(converter_fields(to_video_reply))
+			)
+		]
+
+	@staticmethod
+	def _completeReplies(comment_threads_item):
+		"""
+		Replies of a comment thread that are already known without calling comments().list, otherwise None.
+		"""
+		if comment_threads_item['snippet']['totalReplyCount'] == 0:
+			return []
+
+		# commentThreads responses requested with part=replies embed up to 5 replies per thread
+		comment_thread_id = comment_threads_item['snippet']['topLevelComment']['id']
+		embedded_replies = comment_threads_item.get('replies', {}).get('comments', [])
+		if comment_threads_item['snippet']['totalReplyCount'] <= len(embedded_replies):
+			return [to_video_reply(comment_replies_item, comment_thread_id) for comment_replies_item in embedded_replies]
+		return None
+
+	@staticmethod
+	def _commentThreadsPart(include_replies, reply_strategy):
+		if reply_strategy not in ('inline', 'fetch'):
+			raise YouTubeException('reply_strategy must be inline or fetch')
+		if include_replies and reply_strategy == 'inline':
+			return 'snippet,replies'
+		return 'snippet'
+
+	@staticmethod
+	def _commentThreadsFields(fields, convert, include_replies, reply_strategy):
+		"""fields= mask of a commentThreads call: the fields read by convert, plus the embedded replies when inline"""
+		item_paths = [converter_fields(convert)]
+		if include_replies and reply_strategy == 'inline':
+			item_paths.append(['replies/comments/' + path for path in converter_fields(to_video_reply)])
+		return resolve_fields(fields, *item_paths)
+
+	def _iterComments(self, pages, convert, output_type='plainText', include_replies=False):
+		"""
+		Convert comment thread pages to comment records. With include_replies, replies embedded in the
+		thread are used when complete; the others are fetched concurrently on a bounded thread pool.
+		Output order is preserved.
+		"""
+		if not include_replies:
+			yield from self._iterResults(pages, convert)
+			return
+
+		def fetchReplies(comment_threads_item):
+			return self._retrieveCommentReplies(comment_threads_item, output_type, execute=self._executeInThread)
+
+		with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+			for response_commentThreads in pages:
+				comment_threads_items = response_commentThreads['items']
+				replies = executor.map(fetchReplies, comment_threads_items)
+				for comment_threads_item, comment_replies in zip(comment_threads_items, replies):
+					yield convert(comment_threads_item, comment_replies)
+
+	def _channelsRequest(self, channel_id, id_type='by id'):
 		if id_type == 'by id':
-			response = self.service.channels().list(part='contentDetails,brandingSettings', id=channel_id).execute()
+			return self.service.channels().list(part='contentDetails,brandingSettings', id=channel_id)
 		elif id_type == 'by username':
-			response = self.service.channels().list(part='contentDetails,brandingSettings', forUsername=channel_id).execute()
-		
+			return self.service.channels().list(part='contentDetails,brandingSettings', forUsername=channel_id)
+		raise YouTubeException('id_type must be by id or by username')
+
+	@staticmethod
+	def _uploadsPlaylistId(response):
 		if response['pageInfo']['totalResults'] == 0:
 			raise NoVideosReturned('No video returned. Perhaps channel id is incorrect?')
+		return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+	@staticmethod
+	def _classifyCommentThreads(state, comment_threads_items, new_items, edited_items):
+		"""Sort a page of comment threads into new_items / edited_items, returning how many were already synced"""
+		known_count = 0
+		for comment_threads_item in comment_threads_items:
+			status = state.classify(comment_threads_item)
+			if status == state.NEW:
+				new_items.append(comment_threads_item)
+			else:
+				known_count += 1
+				if status == state.EDITED:
+					edited_items.append(comment_threads_item)
+		return known_count
+
+	def _syncComments(self, state, convert, output_type, include_replies, edit_lookback, item_limit, **params):
+		new_items, edited_items, scanned_items = [], [], []
+		known_count = 0
+		pages = self._iterPages(self.service.commentThreads().list, item_limit=item_limit, order='time', maxResults=100, textFormat=output_type, **params)
+		for response in pages:
+			scanned_items.extend(response['items'])
+			known_count += self._classifyCommentThreads(state, response['items'], new_items, edited_items)
+			if known_count > edit_lookback:
+				break
+
+		comments = self._collect(self._iterComments([{'items': new_items + edited_items}], convert, output_type, include_replies))
+		return comments[:len(new_items)], comments[len(new_items):], state.advance(scanned_items)
+
+	def _iterUploadVideoIds(self, channel_id, id_type='by id', checkpoint=None, resume=False):
+		playlist_id = self._uploadsPlaylistId(self._execute(self._channelsRequest(channel_id, id_type)))
+		pages = self._iterPages(
+			self.service.playlistItems().list, checkpoint=checkpoint, resume=resume,
+			part='contentDetails', playlistId=playlist_id, maxResults=50, fields=self.UPLOADS_FIELDS
+		)
+		for response in pages:
+			for v in response['items']:
+				yield v['contentDetails']['videoId']
+
+	def hydrateVideos(self, video_ids, part='snippet,contentDetails,statistics', requests_per_batch=50, compact=False):
+		"""
+		Retrieve video resources for a list of video ids, preserving the input order.
+		Ids are looked up 50 per videos().list call, and the calls are grouped into batch HTTP requests
+		so that up to requests_per_batch lookups share one round trip.
+		:param video_ids: Iterable of video ids.
+		:param part: Video resource parts to retrieve.
+		:param requests_per_batch: Number of videos().list calls per batch request (max 1000).
+		:param compact: Return ytinspector.records.CompactVideo records instead of the raw video resources.
+		"""
+		video_ids = list(video_ids)
+		# maxium 50 videos per request
+		requests = [
+			self.service.videos().list(id=','.join(video_ids[i: i + 50]), part=part, maxResults=50)
+			for i in range(0, len(video_ids), 50)
+		]
+		try:
+			pages = self.executor.execute_batch(
+				requests, self.service.new_batch_http_request, requests_per_batch, lambda response: self._videosPage(response, compact)
+			)
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
+		return [video for page in pages for video in page]
+
+	@staticmethod
+	def _videosPage(response, compact):
+		"""Videos of a videos().list response; compact pages are converted as each response arrives, so the raw page can be freed"""
+		return list(map(to_compact_video, response['items'])) if compact else response['items']
+
+	def iterChannelVideos(self, channel_id, id_type='by id', hydrate_chunk_size=500, checkpoint=None, resume=False, compact=False):
+		"""
+		Generator version of retrieveChannelVideos.
+		:param channel_id
+		:param id_type: {by id; by username}
+		:param hydrate_chunk_size: Number of uploads collected before their details are fetched in one batch.
+		:param checkpoint: See retrieveChannelVideos.
+		:param resume: See retrieveChannelVideos.
+		:param compact: See retrieveChannelVideos.
+		"""
+		try:
+			video_ids = []
+			for video_id in self._iterUploadVideoIds(channel_id, id_type, checkpoint, resume):
+				video_ids.append(video_id)
+				if len(video_ids) >= hydrate_chunk_size:
+					yield from self.hydrateVideos(video_ids, compact=compact)
+					video_ids = []
+			yield from self.hydrateVideos(video_ids, compact=compact)
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
+
+	def retrieveChannelVideos(self, channel_id, id_type='by id', checkpoint=None, resume=False, compact=False, sink=None):
+		"""
+		Retrieve all uploaded videos of a channel.
+		:param channel_id
+		:param id_type: {by id; by username}
+		:param checkpoint: Optional file path (or ytinspector.checkpoint.Checkpoint) the uploads playlist crawl is
+			saved to every 10 pages.
+		:param resume: Continue an interrupted crawl from its checkpoint instead of starting from page 1.
+		:param compact: Return ytinspector.records.CompactVideo records (ints and epoch seconds, interned channel
+			fields) instead of the raw video resources, converting each page of resources as it arrives.
+		:param sink: Optional ytinspector.sinks sink the videos are streamed to instead of being returned as a list;
+			uploads are then hydrated 500 at a time and the number of videos written is returned.
+		"""
+		if sink is not None:
+			return self._collect(self.iterChannelVideos(channel_id, id_type, checkpoint=checkpoint, resume=resume, compact=compact), sink)
+		try:
+			video_ids = list(self._iterUploadVideoIds(channel_id, id_type, checkpoint, resume))
+			return self.hydrateVideos(video_ids, compact=compact)
+		except YouTubeException:
+			raise
+		except Exception as e:
+			raise YouTubeException(e)
 
-		playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-		part_string = 'contentDetails'
+	def syncChannelVideos(self, channel_id, state=None, id_type='by id'):
+		"""
+		Incrementally sync a channel's uploads. The uploads playlist is paginated only until an already
+		synced upload is reached, and only the new videos are hydrated.
+		:param channel_id
+		:param state: ChannelSyncState returned by the previous call (e.g. ChannelSyncState.load(path)).
+			None performs a full sync.
+		:param id_type: {by id; by username}
+		:return: Tuple(new_videos, state) -- new videos newest first, and the state to pass to the next call.
+		"""
+		state = state or ChannelSyncState(channel_id)
 		try:
-			response = self.service.playlistItems().list(
-					part=part_string,
-					playlistId=playlist_id,
-					maxResults=50
-				).execute()
-			playlistItems = response['items']
-			nextPageToken = response.get('nextPageToken')
-
-			while nextPageToken:
-				response = self.service.playlistItems().list(
-					part=part_string,
-					playlistId=playlist_id,
-					maxResults=50,
-					pageToken=nextPageToken
-				).execute()
-				playlistItems.extend(response['items'])
-				nextPageToken = response.get('nextPageToken')
-				print('Token {0}'.format(nextPageToken))
-
-			videos = [v['contentDetails'] for v in playlistItems]
-			videos_info = []
-
-			for batch_num in range(0, len(videos), 50):
-				video_batch = videos[batch_num: batch_num + 50]				
-				# maxium 50 videos per request
-				response_videos = self.service.videos().list(
-					id=','.join(list(map(lambda x:x['videoId'], video_batch))),
-					part='snippet,contentDetails,statistics',
-					maxResults=50
-				).execute()
-				videos_info.extend(response_videos['items'])
-			return videos_info
+			playlist_id = state.playlist_id or self._uploadsPlaylistId(self._execute(self._channelsRequest(channel_id, id_type)))
+			new_items = []
+			pages = self._iterPages(self.service.playlistItems().list, part='contentDetails', playlistId=playlist_id, maxResults=50, fields=self.UPLOADS_FIELDS)
+			for response in pages:
+				page_items = list(takewhile(lambda item: not state.is_known(item), response['items']))
+				new_items.extend(page_items)
+				if len(page_items) < len(response['items']):
+					break
+			new_videos = self.hydrateVideos([item['contentDetails']['videoId'] for item in new_items])
+			return new_videos, state.advance(new_items, playlist_id)
+		except YouTubeException:
+			raise
 		except Exception as e:
 			raise YouTubeException(e)
 
-	def retrieveVideoComments(self, video_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False):
+	def iterVideoComments(self, video_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False, reply_strategy='inline',
+						  checkpoint=None, resume=False, fields=AUTO, compact=False):
+		"""
+		Generator version of retrieveVideoComments.
+		"""
+		pages = self._iterPages(
+			self.service.commentThreads().list,
+			NoCommentsReturned("Video has no comment"),
+			item_limit=3000,
+			checkpoint=checkpoint,
+			resume=resume,
+			part=self._commentThreadsPart(include_replies, reply_strategy),
+			videoId=video_id,
+			maxResults=100,
+			order=order_by,
+			textFormat=output_type,
+			searchTerms=search_keyword,
+			fields=self._commentThreadsFields(fields, to_video_comment, include_replies, reply_strategy)
+		)
+		return self._iterComments(pages, to_compact_video_comment if compact else to_video_comment, output_type, include_replies)
+
+	def retrieveVideoComments(self, video_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False, reply_strategy='inline',
+							  checkpoint=None, resume=False, fields=AUTO, compact=False, sink=None):
 		"""
 		Retrieve video comments. Limiting to 3,000 comments cap to avoid exceeding daily usage quota.
 		:param video_id
 		:param ordder_by: {time; relevance}
 		:param output_format: {plainText; html}
 		:param include_replies: {True; False}
+		:param reply_strategy: {inline; fetch} inline uses the replies embedded in the comment threads response
+			and only calls comments().list for threads with more replies than embedded.
+		:param checkpoint: Optional file path (or ytinspector.checkpoint.Checkpoint) the comment threads crawl is
+			saved to every 10 pages.
+		:param resume: Continue an interrupted crawl from its checkpoint instead of starting from page 1.
+		:param fields: Partial response mask. The default (AUTO) requests only the fields the returned records use;
+			None requests the full parts, any other string is sent as the fields= parameter
+			with the page-level fields it leaves out (nextPageToken, pageInfo) added.
+		:param compact: Return ytinspector.records.CompactVideoComment records: slotted, with interned video ids,
+			author names and author URLs, and integer epoch timestamps.
+		:param sink: Optional ytinspector.sinks sink (JSONLSink, CSVSink, ParquetSink, SQLiteSink) the comments are
+			streamed to in batches instead of being returned as a list; the number of comments written is returned.
 		"""
-		def getCommentReply(service, comment_thread_id, output_format='plainText'):
-			comment_replies = [] 
-			comment_replies_items = []
-			response_comment_repleis = service.comments().list(
-				part='snippet',
-				parentId=comment_thread_id,
-				maxResults=100,
-				textFormat=output_format
-			).execute()
-
-			comment_replies_items.extend(response_comment_repleis.get('items'))
-			nextPageToken = response_comment_repleis.get('nextPageToken')
-
-			while nextPageToken:
-				response_comment_repleis = service.comments().list(
-					part='snippet',
-					parentId=comment_thread_id,
-					maxResults=100,
-					textFormat=output_format,
-					pageToken=nextPageToken
-				).execute()
-
-				comment_replies_items.extend(response_comment_repleis.get('items'))
-				nextPageToken = response_comment_repleis.get('nextPageToken')     
-
-			for comment_replies_item in comment_replies_items:
-				comment_replies.append(VideoReply(
-					comment_replies_item['id'],
-					comment_thread_id,
-					comment_replies_item['snippet']['textDisplay'],
-					comment_replies_item['snippet']['authorDisplayName'],
-					comment_replies_item['snippet']['authorChannelUrl'],
-					comment_replies_item['snippet']['likeCount'],
-					comment_replies_item['snippet']['publishedAt'],
-					comment_replies_item['snippet']['updatedAt']
-				))
-			return comment_replies
+		return self._collect(self.iterVideoComments(video_id, order_by, output_type, search_keyword, include_replies, reply_strategy, checkpoint, resume, fields, compact), sink)
 
-		comment_thread_count = 0
-		comment_threads = []
-		comment_threads_items = []
-		response_commentThreads = self.service.commentThreads().list(
-			part='snippet',
-			videoId=video_id,
+	def iterChannelRelatedComments(self, channel_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False, reply_strategy='inline',
+								   checkpoint=None, resume=False, fields=AUTO, compact=False):
+		"""
+		Generator version of retrieveChannelRelatedComments.
+		"""
+		pages = self._iterPages(
+			self.service.commentThreads().list,
+			NoCommentsReturned("Video has no comment"),
+			item_limit=500,
+			checkpoint=checkpoint,
+			resume=resume,
+			part=self._commentThreadsPart(include_replies, reply_strategy),
+			allThreadsRelatedToChannelId=channel_id,
 			maxResults=100,
 			order=order_by,
 			textFormat=output_type,
-			searchTerms=search_keyword
-		).execute()
-
-		if response_commentThreads['pageInfo']['totalResults'] == 0:
-			raise NoCommentsReturned("Video has no comment")
-
-		comment_threads_items.extend(response_commentThreads['items'])
-		nextPageToken = response_commentThreads.get('nextPageToken')
-		comment_thread_count += len(response_commentThreads['items'])
-
-		while nextPageToken:
-			if 3000 >= comment_thread_count:
-				response_commentThreads = self.service.commentThreads().list(
-					part='snippet',
-					videoId=video_id,
-					maxResults=100,
-					order=order_by,                      
-					textFormat=output_type,
-					pageToken=nextPageToken,
-					searchTerms=search_keyword
-				).execute()   
-				comment_threads_items.extend(response_commentThreads['items'])
-				nextPageToken = response_commentThreads.get('nextPageToken')
-				print('Token {0}'.format(nextPageToken))
-				comment_thread_count += len(response_commentThreads['items'])
-			else:
-				nextPageToken = None
-
-		if include_replies:
-			for comment_threads_item in comment_threads_items:
-				comment_threads.append(VideoComment(
-					comment_threads_item['snippet']['videoId'],
-					comment_threads_item['snippet']['topLevelComment']['id'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['textDisplay'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorDisplayName'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorChannelUrl'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['likeCount'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['publishedAt'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['updatedAt'], 
-					comment_threads_item['snippet']['totalReplyCount'],
-					getCommentReply(self.service, comment_threads_item['snippet']['topLevelComment']['id'], output_type)
-				))
-		else:
-			for comment_threads_item in comment_threads_items:
-				comment_threads.append(VideoComment(
-					comment_threads_item['snippet']['videoId'],
-					comment_threads_item['snippet']['topLevelComment']['id'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['textDisplay'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorDisplayName'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorChannelUrl'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['likeCount'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['publishedAt'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['updatedAt'], 
-					comment_threads_item['snippet']['totalReplyCount'],
-					[]
-				))			
-		return comment_threads
-
-	def retrieveChannelRelatedComments(self, channel_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False):
+			searchTerms=search_keyword,
+			fields=self._commentThreadsFields(fields, to_channel_related_comment, include_replies, reply_strategy)
+		)
+		return self._iterComments(pages, to_compact_channel_related_comment if compact else to_channel_related_comment, output_type, include_replies)
+
+	def retrieveChannelRelatedComments(self, channel_id, order_by='time', output_type='plainText', search_keyword=None, include_replies=False, reply_strategy='inline',
+									   checkpoint=None, resume=False, fields=AUTO, compact=False, sink=None):
 		"""
 		Retrieve video and channel related comments. Limiting to 500 comments cap to avoid exceeding daily usage quota.
 		:param channel_id
 		:param ordder_by: {time; relevance}
 		:param output_format: {plainText; html}
 		:param include_replies: {True; False}
+		:param reply_strategy: {inline; fetch} inline uses the replies embedded in the comment threads response
+			and only calls comments().list for threads with more replies than embedded.
+		:param checkpoint: Optional file path (or ytinspector.checkpoint.Checkpoint) the crawl is saved to every 10 pages.
+		:param resume: Continue an interrupted crawl from its checkpoint instead of starting from page 1.
+		:param fields: Partial response mask, see retrieveVideoComments.
+		:param compact: Return ytinspector.records.CompactChannelRelatedComment records, see retrieveVideoComments.
+		:param sink: Optional sink the comments are streamed to, see retrieveVideoComments.
 		"""
-		def getCommentReply(service, comment_thread_id, output_format='plainText'):
-			comment_replies = [] 
-			comment_replies_items = []
-			response_comment_repleis = service.comments().list(
-				part='snippet',
-				parentId=comment_thread_id,
-				maxResults=100,
-				textFormat=output_format
-			).execute()
-
-			comment_replies_items.extend(response_comment_repleis.get('items'))
-			nextPageToken = response_comment_repleis.get('nextPageToken')
-
-			while nextPageToken:
-				response_comment_repleis = service.comments().list(
-					part='snippet',
-					parentId=comment_thread_id,
-					maxResults=100,
-					textFormat=output_format,
-					pageToken=nextPageToken
-				).execute()
-
-				comment_replies_items.extend(response_comment_repleis.get('items'))
-				nextPageToken = response_comment_repleis.get('nextPageToken')     
-
-			for comment_replies_item in comment_replies_items:
-				comment_replies.append(VideoReply(
-					comment_replies_item['id'],
-					comment_thread_id,
-					comment_replies_item['snippet']['textDisplay'],
-					comment_replies_item['snippet']['authorDisplayName'],
-					comment_replies_item['snippet']['authorChannelUrl'],
-					comment_replies_item['snippet']['likeCount'],
-					comment_replies_item['snippet']['publishedAt'],
-					comment_replies_item['snippet']['updatedAt']
-				))
-			return comment_replies
+		return self._collect(self.iterChannelRelatedComments(channel_id, order_by, output_type, search_keyword, include_replies, reply_strategy, checkpoint, resume, fields, compact), sink)
 
-		comment_thread_count = 0
-		comment_threads = []
-		comment_threads_items = []
-		response_commentThreads = self.service.commentThreads().list(
-			part='snippet',
+	def syncVideoComments(self, video_id, state=None, output_type='plainText', include_replies=False, reply_strategy='inline', edit_lookback=0):
+		"""
+		Incrementally sync video comments (newest first). Pagination stops at the last synced comment thread
+		instead of running to the 3,000 comments cap, which only applies to the first sync.
+		:param video_id
+		:param state: CommentSyncState returned by the previous call (e.g. CommentSyncState.load(path)),
+			or CommentSyncState.since(video_id, published_at=..., comment_id=...). None performs a full sync.
+		:param output_format: {plainText; html}
+		:param include_replies: {True; False}
+		:param reply_strategy: {inline; fetch}
+		:param edit_lookback: Number of already synced threads to re-check for edits (updatedAt) before stopping.
+		:return: Tuple(new_comments, edited_comments, state)
+		"""
+		state = state or CommentSyncState(video_id)
+		return self._syncComments(
+			state, to_video_comment, output_type, include_replies, edit_lookback, 3000 if state.initial else None,
+			part=self._commentThreadsPart(include_replies, reply_strategy),
+			videoId=video_id,
+			fields=self._commentThreadsFields(AUTO, to_video_comment, include_replies, reply_strategy)
+		)
+
+	def syncChannelRelatedComments(self, channel_id, state=None, output_type='plainText', include_replies=False, reply_strategy='inline', edit_lookback=0):
+		"""
+		Incrementally sync video and channel related comments, see syncVideoComments.
+		The 500 comments cap only applies to the first sync.
+		:return: Tuple(new_comments, edited_comments, state)
+		"""
+		state = state or CommentSyncState(channel_id)
+		return self._syncComments(
+			state, to_channel_related_comment, output_type, include_replies, edit_lookback, 500 if state.initial else None,
+			part=self._commentThreadsPart(include_replies, reply_strategy),
 			allThreadsRelatedToChannelId=channel_id,
-			maxResults=100,
-			order=order_by,
-			textFormat=output_type,
-			searchTerms=search_keyword
-		).execute()
-
-		if response_commentThreads['pageInfo']['totalResults'] == 0:
-			raise NoCommentsReturned("Video has no comment")
-
-		comment_threads_items.extend(response_commentThreads['items'])
-		nextPageToken = response_commentThreads.get('nextPageToken')
-		comment_thread_count += len(response_commentThreads['items'])
-
-		while nextPageToken:
-			if 500 >= comment_thread_count:
-				response_commentThreads = self.service.commentThreads().list(
-					part='snippet',
-					allThreadsRelatedToChannelId=channel_id,
-					maxResults=100,
-					order=order_by,                      
-					textFormat=output_type,
-					pageToken=nextPageToken,
-					searchTerms=search_keyword
-				).execute()   
-				comment_threads_items.extend(response_commentThreads['items'])
-				nextPageToken = response_commentThreads.get('nextPageToken')
-				print('Token {0}'.format(nextPageToken))
-				comment_thread_count += len(response_commentThreads['items'])
-			else:
-				nextPageToken = None
-
-		if include_replies:
-			for comment_threads_item in comment_threads_items:
-				comment_threads.append(ChannelRelatedComment(
-					comment_threads_item['snippet']['channelId'],
-					comment_threads_item['snippet']['videoId'],
-					comment_threads_item['snippet']['topLevelComment']['id'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['textDisplay'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorDisplayName'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorChannelUrl'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['likeCount'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['publishedAt'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['updatedAt'], 
-					comment_threads_item['snippet']['totalReplyCount'],
-					getCommentReply(self.service, comment_threads_item['snippet']['topLevelComment']['id'], output_type)
-				))
-		else:
-			for comment_threads_item in comment_threads_items:
-				comment_threads.append(ChannelRelatedComment(
-					comment_threads_item['snippet']['channelId'],
-					comment_threads_item['snippet']['videoId'],					
-					comment_threads_item['snippet']['topLevelComment']['id'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['textDisplay'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorDisplayName'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['authorChannelUrl'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['likeCount'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['publishedAt'],
-					comment_threads_item['snippet']['topLevelComment']['snippet']['updatedAt'], 
-					comment_threads_item['snippet']['totalReplyCount'],
-					[]
-				))			
-		return comment_threads		
+			fields=self._commentThreadsFields(AUTO, to_channel_related_comment, include_replies, reply_strategy)
+		)
 
 	def retrieveVideoCategoriesList(self, region_code='us'):
 		"""
@@ -303,21 +447,53 @@ class YouTube:
 		"""
 		try:
 			video_categories = {}
-			response = self.service.videoCategories().list(
+			response = self._execute(self.service.videoCategories().list(
 				part='snippet',
 				regionCode=region_code
-			).execute()
+			))
 
 			for item in response['items']:
 				video_categories[item['id']] = item['snippet']['title']
 			return video_categories
+		except YouTubeException:
+			raise
 		except TypeError as e:
-			raise Exception('Invalid region code')
+			raise YouTubeException('Invalid region code') from e
 		except Exception as e:
-			raise Exception('Error retrieving video categories')
+			raise YouTubeException('Error retrieving video categories') from e
+
+	def iterSearchVideos(self, search_keyword, region_code='us', video_duration='any', video_definition='any', video_dimension='any', published_before=None, 
+					  published_after=None, order_by='relevance', channel_type='any', safe_search='none', category_id=None, location=None, location_radius=None, result_limit=50, fields=AUTO):
+		"""
+		Generator version of searchVideos.
+		"""
+		pages = self._iterPages(
+			self.service.search().list,
+			SearchResultReturnsNone("No videos found for the search keyword: " + search_keyword),
+			item_limit=result_limit,
+			part='snippet',
+			q=search_keyword,
+			channelType=channel_type,
+			publishedBefore=published_before,
+			publishedAfter=published_after,
+			location=location,
+			locationRadius=location_radius, 
+			regionCode=region_code,
+			videoCategoryId=category_id,
+			type='video',
+			order=order_by,
+			safeSearch=safe_search,
+			videoDuration=video_duration,
+			videoDefinition=video_definition,
+			videoDimension=video_dimension,
+			maxResults=50,
+			fields=resolve_fields(fields, converter_fields(to_search_results_video))
+		)
+		return self._iterResults(pages, to_search_results_video, region_code)
 
 	def searchVideos(self, search_keyword, region_code='us', video_duration='any', video_definition='any', video_dimension='any', published_before=None, 
-					  published_after=None, order_by='relevance', channel_type='any', safe_search='none', category_id=None, location=None, location_radius=None, result_limit=50):
+					  published_after=None, order_by='relevance', channel_type='any', safe_search='none', category_id=None, location=None, location_radius=None, result_limit=50, fields=AUTO,
+					  sink=None):
 		"""
 		Search Channels (There is a limit of up to 500 items can be returned)
 		:param search_keyword: Query term.
@@ -338,84 +514,41 @@ class YouTube:
 		:param location_radius: TThe locationRadius parameter, in conjunction with the location parameter, defines a circular geographic area.
 			(Valid parameter values include 1500m, 5km, 10000ft, and 0.75mi. The API does not support locationRadius parameter values larger than 1000 kilometers.)
 		:param result_limit: Up to 500 results can be returned.
+		:param fields: Partial response mask. The default (AUTO) requests only the fields the returned records use;
+			None requests the full snippet, any other string is sent as the fields= parameter
+			with the page-level fields it leaves out (nextPageToken, pageInfo) added.
+		:param sink: Optional ytinspector.sinks sink the results are streamed to instead of being returned as a list;
+			the number of results written is returned.
 		
 		ps: A call to this method has a quota cost of 100 units.
 		"""
-		videos = []
-		videos_items = []
-		item_count = 0
+		return self._collect(self.iterSearchVideos(
+			search_keyword, region_code, video_duration, video_definition, video_dimension, published_before, 
+			published_after, order_by, channel_type, safe_search, category_id, location, location_radius, result_limit, fields
+		), sink)
 
-		response = self.service.search().list(
+	def iterSearchChannels(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', channel_type=None, result_limit=50, fields=AUTO):
+		"""
+		Generator version of searchChannels.
+		"""
+		pages = self._iterPages(
+			self.service.search().list,
+			SearchResultReturnsNone("No channels found for the search keyword: " + search_keyword),
+			item_limit=result_limit,
 			part='snippet',
 			q=search_keyword,
 			channelType=channel_type,
 			publishedBefore=published_before,
 			publishedAfter=published_after,
-			location=location,
-			locationRadius=location_radius, 
 			regionCode=region_code,
-			videoCategoryId=category_id,
-			type='video',
+			type='channel',
 			order=order_by,
-			safeSearch=safe_search,
-			videoDuration=video_duration,
-			videoDefinition=video_definition,
-			videoDimension=video_dimension,
-			maxResults=50
-		).execute()
-
-		if response['pageInfo']['totalResults'] == 0:			
-			raise SearchResultReturnsNone("No videos found for the search keyword: " + search_keyword)
-
-		# total_results = response['pageInfo']['totalResults']
-		videos_items.extend(response['items'])
-		nextPageToken = response.get('nextPageToken')
-		item_count += len(response['items'])
-		print('Token {0}'.format(nextPageToken))
-
-		while nextPageToken:
-			if result_limit > item_count:
-				response = self.service.search().list(
-					part='snippet',
-					q=search_keyword,
-					channelType=channel_type,
-					publishedBefore=published_before,
-					publishedAfter=published_after,
-					location=location,
-					locationRadius=location_radius, 
-					regionCode=region_code,
-					videoCategoryId=category_id,
-					type='video',
-					order=order_by,
-					safeSearch=safe_search,
-					videoDuration=video_duration,
-					videoDefinition=video_definition,
-					videoDimension=video_dimension,
-					maxResults=50,
-					pageToken=nextPageToken
-				).execute()			
-				videos_items.extend(response['items'])
-				nextPageToken = response.get('nextPageToken')
-				item_count += len(response['items'])
-				print('Token {0}'.format(nextPageToken))
-			else:
-				nextPageToken = None
-		
-		for videos_item in videos_items:
-			videos.append(SearchResultsVideo(					
-				videos_item['id']['videoId'],
-				videos_item['snippet']['title'],
-				videos_item['snippet']['channelId'],
-				videos_item['snippet']['channelTitle'],
-				videos_item['snippet']['description'],
-				videos_item['snippet']['publishedAt'],
-				region_code,
-				videos_item['snippet']['thumbnails']['default']['url'],
-				'https://www.youtube.com/watch?v={0}'.format(videos_item['id']['videoId'])
-			))
-		return videos				  
+			maxResults=50,
+			fields=resolve_fields(fields, converter_fields(to_search_results_channel))
+		)
+		return self._iterResults(pages, to_search_results_channel, region_code)
 
-	def searchChannels(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', channel_type=None, result_limit=50):
+	def searchChannels(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', channel_type=None, result_limit=50, fields=AUTO):
 		"""
 		Search Channels (There is a limit of up to 500 items can be returned)
 		:param search_keyword: Query term.
@@ -427,68 +560,35 @@ class YouTube:
 		:param order_by: Order results by (date, rating, relevance, title, videoCount, viewCount).
 		:param channel_type: Filter by channel type (any, show).
 		:param result_limit: Up to 500 results can be returned.
+		:param fields: Partial response mask. The default (AUTO) requests only the fields the returned records use;
+			None requests the full snippet, any other string is sent as the fields= parameter
+			with the page-level fields it leaves out (nextPageToken, pageInfo) added.
 		
 		ps: A call to this method has a quota cost of 100 units.
 		"""
-		channels = []
-		channels_items = []
-		item_count = 0
+		return self._collect(self.iterSearchChannels(search_keyword, region_code, published_before, published_after, order_by, channel_type, result_limit, fields))
 
-		response = self.service.search().list(
+	def iterSearchPlaylists(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', result_limit=50, fields=AUTO):
+		"""
+		Generator version of searchPlaylists.
+		"""
+		pages = self._iterPages(
+			self.service.search().list,
+			SearchResultReturnsNone("No playlists found for the search keyword: " + search_keyword),
+			item_limit=result_limit,
 			part='snippet',
 			q=search_keyword,
-			channelType=channel_type,
 			publishedBefore=published_before,
 			publishedAfter=published_after,
 			regionCode=region_code,
-			type='channel',
+			type='playlist',
 			order=order_by,
-			maxResults=50
-		).execute()
-
-		if response['pageInfo']['totalResults'] == 0:			
-			raise SearchResultReturnsNone("No channels found for the search keyword: " + search_keyword)
-
-		# total_results = response['pageInfo']['totalResults']
-		channels_items.extend(response['items'])
-		nextPageToken = response.get('nextPageToken')
-		item_count += len(response['items'])
-		print('Token {0}'.format(nextPageToken))
-
-		while nextPageToken:
-			if result_limit > item_count:
-				response = self.service.search().list(
-					part='snippet',
-					q=search_keyword,
-					channelType=channel_type,
-					publishedBefore=published_before,
-					publishedAfter=published_after,
-					regionCode=region_code,
-					type='channel',
-					order=order_by,
-					maxResults=50,
-					pageToken=nextPageToken
-				).execute()				
-				channels_items.extend(response['items'])
-				nextPageToken = response.get('nextPageToken')
-				item_count += len(response['items'])
-				print('Token {0}'.format(nextPageToken))
-			else:
-				nextPageToken = None
-		
-		for channel_item in channels_items:
-			channels.append(SearchResultsChannel(
-				channel_item['snippet']['channelId'],
-				channel_item['snippet']['channelTitle'],
-				channel_item['snippet']['description'],
-				channel_item['snippet']['publishedAt'],
-				region_code,
-				channel_item['snippet']['thumbnails']['default']['url'],
-				'https://www.youtube.com/channel/{0}'.format(channel_item['snippet']['channelId'])
-			))
-		return channels
+			maxResults=50,
+			fields=resolve_fields(fields, converter_fields(to_search_results_playlist))
+		)
+		return self._iterResults(pages, to_search_results_playlist, region_code)
 
-	def searchPlaylists(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', result_limit=50):
+	def searchPlaylists(self, search_keyword, region_code='us', published_before=None, published_after=None, order_by='relevance', result_limit=50, fields=AUTO):
 		"""
 		Search Playlists (There is a limit of up to 500 items can be returned)
 		:param search_keyword: Query term.
@@ -499,64 +599,128 @@ class YouTube:
 			(The value is an RFC 3339 formatted date-time value (1970-01-01T00:00:00Z)).
 		:param order_by: Order results by (date, rating, relevance, title, videoCount, viewCount).
 		:param result_limit: Up to 500 results can be returned.
+		:param fields: Partial response mask. The default (AUTO) requests only the fields the returned records use;
+			None requests the full snippet, any other string is sent as the fields= parameter
+			with the page-level fields it leaves out (nextPageToken, pageInfo) added.
 		
 		ps: A call to this method has a quota cost of 100 units.
 		"""
-		playlists = []
-		playlist_items = []
-		item_count = 0
+		return self._collect(self.iterSearchPlaylists(search_keyword, region_code, published_before, published_after, order_by, result_limit, fields))
 
-		response = self.service.search().list(
-			part='snippet',
+	def _iterShardedSearch(self, convert, published_after, published_before, order_by, region_code, shard_limit, min_window, fields, **params):
+		"""
+		Search over published time windows concurrently on the thread pool. A window whose first page estimates
+		more than shard_limit results, or whose results reach shard_limit, is split in half (down to min_window)
+		and its halves are searched instead. Results are merged by merge_shards.
+		"""
+		params.update(part='snippet', order=order_by, regionCode=region_code, maxResults=50, fields=resolve_fields(fields, converter_fields(convert)))
+		root_window = (
+			parse_rfc_datetime(published_after),
+			parse_rfc_datetime(published_before) if published_before else datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+		)
+
+		with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+			def searchWindow(window):
+				splittable = window[1] - window[0] > min_window
+				results = []
+				pages = iter_pages(self.service.search().list, item_limit=shard_limit, execute=self._executeInThread, **window_params(window), **params)
+				for page_number, response in enumerate(pages):
+					if splittable and page_number == 0 and response['pageInfo']['totalResults'] > shard_limit:
+						break
+					results.extend(convert(item, region_code) for item in response['items'])
+				else:
+					if not splittable or len(results) < shard_limit:
+						return results, None
+				return None, [executor.submit(searchWindow, half) for half in split_window(window)]
+
+			def iterShards(future):
+				results, halves = future.result()
+				if halves is None:
+					yield results
+					return
+				for half in halves:
+					yield from iterShards(half)
+
+			yield from merge_shards(iterShards(executor.submit(searchWindow, root_window)), order_by)
+
+	def iterSearchVideosSharded(self, search_keyword, published_after, published_before=None, region_code='us', video_duration='any', video_definition='any',
+								video_dimension='any', order_by='date', channel_type='any', safe_search='none', category_id=None, location=None, location_radius=None,
+								shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Generator version of searchVideosSharded.
+		"""
+		return self._iterShardedSearch(
+			to_search_results_video, published_after, published_before, order_by, region_code, shard_limit, min_window, fields,
 			q=search_keyword,
-			publishedBefore=published_before,
-			publishedAfter=published_after,
-			regionCode=region_code,
-			type='playlist',
-			order=order_by,
-			maxResults=50
-		).execute()
-
-		if response['pageInfo']['totalResults'] == 0:			
-			raise SearchResultReturnsNone("No playlists found for the search keyword: " + search_keyword)
-
-		# total_results = response['pageInfo']['totalResults']
-		playlist_items.extend(response['items'])
-		nextPageToken = response.get('nextPageToken')
-		item_count += len(response['items'])
-		print('Token {0}'.format(nextPageToken))
-
-		while nextPageToken:
-			if result_limit > item_count:
-				response = self.service.search().list(
-					part='snippet',
-					q=search_keyword,
-					publishedBefore=published_before,
-					publishedAfter=published_after,
-					regionCode=region_code,
-					type='playlist',
-					order=order_by,
-					maxResults=50,
-					pageToken=nextPageToken
-				).execute()				
-				playlist_items.extend(response['items'])
-				nextPageToken = response.get('nextPageToken')
-				item_count += len(response['items'])
-				print('Token {0}'.format(nextPageToken))
-			else:
-				nextPageToken = None
-		
-		for playlist_item in playlist_items:
-			playlists.append(SearchResultsPlaylist(					
-				playlist_item['id']['playlistId'],
-				playlist_item['snippet']['title'],
-				playlist_item['snippet']['channelId'],
-				playlist_item['snippet']['channelTitle'],
-				playlist_item['snippet']['description'],
-				playlist_item['snippet']['publishedAt'],
-				region_code,
-				playlist_item['snippet']['thumbnails']['default']['url'],
-				'https://www.youtube.com/playlist?list={0}'.format(playlist_item['id']['playlistId'])
-			))
-		return playlists	
+			type='video',
+			channelType=channel_type,
+			location=location,
+			locationRadius=location_radius,
+			videoCategoryId=category_id,
+			safeSearch=safe_search,
+			videoDuration=video_duration,
+			videoDefinition=video_definition,
+			videoDimension=video_dimension
+		)
+
+	def searchVideosSharded(self, search_keyword, published_after, published_before=None, region_code='us', video_duration='any', video_definition='any',
+							video_dimension='any', order_by='date', channel_type='any', safe_search='none', category_id=None, location=None, location_radius=None,
+							shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Search videos beyond the 500 results cap by splitting the published_after / published_before range into
+		time windows, recursively halving every window that saturates, and searching the windows concurrently.
+		Results are de-duplicated and ordered by order_by: date and title are exact, other orders interleave
+		the rankings of the individual windows.
+		Arguments are those of searchVideos, plus:
+		:param published_after: Start of the swept range (RFC 3339 string or datetime). Required.
+		:param published_before: End of the swept range. Defaults to now.
+		:param shard_limit: Results a window may return before it is split.
+		:param min_window: Windows shorter than this are not split further.
+
+		ps: Every window searched costs at least 100 quota units.
+		"""
+		return self._collect(self.iterSearchVideosSharded(
+			search_keyword, published_after, published_before, region_code, video_duration, video_definition, video_dimension, order_by,
+			channel_type, safe_search, category_id, location, location_radius, shard_limit, min_window, fields
+		))
+
+	def iterSearchChannelsSharded(self, search_keyword, published_after, published_before=None, region_code='us', order_by='date', channel_type=None,
+								  shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Generator version of searchChannelsSharded.
+		"""
+		return self._iterShardedSearch(
+			to_search_results_channel, published_after, published_before, order_by, region_code, shard_limit, min_window, fields,
+			q=search_keyword,
+			type='channel',
+			channelType=channel_type
+		)
 
+	def searchChannelsSharded(self, search_keyword, published_after, published_before=None, region_code='us', order_by='date', channel_type=None,
+							  shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Search channels beyond the 500 results cap, see searchVideosSharded.
+		"""
+		return self._collect(self.iterSearchChannelsSharded(
+			search_keyword, published_after, published_before, region_code, order_by, channel_type, shard_limit, min_window, fields
+		))
+
+	def iterSearchPlaylistsSharded(self, search_keyword, published_after, published_before=None, region_code='us', order_by='date',
+								   shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Generator version of searchPlaylistsSharded.
+		"""
+		return self._iterShardedSearch(
+			to_search_results_playlist, published_after, published_before, order_by, region_code, shard_limit, min_window, fields,
+			q=search_keyword,
+			type='playlist'
+		)
+
+	def searchPlaylistsSharded(self, search_keyword, published_after, published_before=None, region_code='us', order_by='date',
+							   shard_limit=SEARCH_RESULT_CAP, min_window=datetime.timedelta(minutes=10), fields=AUTO):
+		"""
+		Search playlists beyond the 500 results cap, see searchVideosSharded.
+		"""
+		return self._collect(self.iterSearchPlaylistsSharded(
+			search_keyword, published_after, published_before, region_code, order_by, shard_limit, min_window, fields
+		))
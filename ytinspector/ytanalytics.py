@@ -1,5 +1,15 @@
-from .exceptions import YTAnalyticsException
-from .google_apis import create_service
+import datetime
+import difflib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import YTAnalyticsException, InvalidQuery
+from .google_apis import create_service, build_thread_http
+from .executor import RequestExecutor
+from .columnar import OUTPUT_FORMATS, format_report
+
+logger = logging.getLogger(__name__)
 
 CoreDimensions = [
 	'ageGroup',
@@ -16,8 +26,10 @@ CoreDimensions = [
 SubDimensions = [
 	'adType',
 	'audienceType',
+	'city',
 	'claimedStatus',
 	'continent',
+	'creatorContentType',
 	'deviceType',
 	'elapsedVideoTimeRatio',
 	'group',
@@ -68,13 +80,17 @@ SubMetrics = [
 	'cardTeaserClicks',
 	'cardTeaserClickRate',
 	'cpm',
+	'engagedViews',
 	'estimatedAdRevenue',
 	'estimatedRedMinutesWatched',
-	'estimatedRedPartnerRevenue ',
+	'estimatedRedPartnerRevenue',
 	'grossRevenue',
 	'monetizedPlaybacks',
 	'playbackBasedCpm',
+	'playlistAverageViewDuration',
+	'playlistEstimatedMinutesWatched',
 	'playlistStarts',
+	'playlistViews',
 	'redViews',
 	'relativeRetentionPerformance',
 	'viewsPerPlaylistStart',
@@ -83,16 +99,168 @@ SubMetrics = [
 ]
 
 
+# Compatibility index, precomputed from the tables above and the API's report definitions
+DIMENSIONS = frozenset(CoreDimensions + SubDimensions)
+METRICS = frozenset(CoreMetrics + SubMetrics)
+
+# dimensions that only support the listed metrics
+DIMENSION_METRICS = {
+	'ageGroup': frozenset(['viewerPercentage']),
+	'gender': frozenset(['viewerPercentage']),
+	'elapsedVideoTimeRatio': frozenset(['audienceWatchRatio', 'relativeRetentionPerformance']),
+}
+
+# metrics that require one of the listed dimensions
+METRIC_DIMENSIONS = {
+	'viewerPercentage': frozenset(['ageGroup', 'gender']),
+	'audienceWatchRatio': frozenset(['elapsedVideoTimeRatio']),
+	'relativeRetentionPerformance': frozenset(['elapsedVideoTimeRatio']),
+}
+
+# dimensions that require a filter on the listed dimension
+DIMENSION_FILTERS = {
+	'province': 'country',
+	'insightTrafficSourceDetail': 'insightTrafficSourceType',
+	'insightPlaybackLocationDetail': 'insightPlaybackLocationType',
+}
+
+# metrics only reported for playlists (filter isCurated==1)
+PLAYLIST_METRICS = frozenset(['playlistStarts', 'viewsPerPlaylistStart', 'averageTimeInPlaylist'])
+
+# dimensions that cannot be used in the same query
+EXCLUSIVE_DIMENSIONS = [frozenset(['day', 'month'])]
+
+
+def _suggest(name, valid_names):
+	matches = difflib.get_close_matches(name, valid_names, n=3)
+	return ' (did you mean {0}?)'.format(' or '.join(matches)) if matches else ''
+
+def _splitNames(value):
+	if not value:
+		return []
+	return value.split(',') if isinstance(value, str) else list(value)
+
+def unknown_names(metrics, dimensions=None, filters=None):
+	"""
+	Metrics, dimensions and filters missing from the compatibility index, with the closest known names.
+	The index does not list every name the API supports, so these are only suspects (e.g. typos).
+	"""
+	filter_names = [condition.split('==', 1)[0] for condition in filters.split(';')] if filters else []
+	unknown = []
+	for metric in _splitNames(metrics):
+		if metric not in METRICS:
+			unknown.append('unknown metric {0!r}{1}'.format(metric, _suggest(metric, METRICS)))
+	for dimension in _splitNames(dimensions):
+		if dimension not in DIMENSIONS:
+			unknown.append('unknown dimension {0!r}{1}'.format(dimension, _suggest(dimension, DIMENSIONS)))
+	for name in filter_names:
+		if name not in DIMENSIONS:
+			unknown.append('unknown filter {0!r}{1}'.format(name, _suggest(name, DIMENSIONS)))
+	return unknown
+
+def query_problems(metrics, dimensions=None, filters=None, sort=None, strict=False):
+	"""
+	Check a YouTube Analytics query locally against the compatibility index.
+	:param metrics: Comma separated string or list of metrics.
+	:param dimensions: Comma separated string or list of dimensions.
+	:param filters: Filters string (e.g. video==pd1FJh59zxQ;country==IT).
+	:param sort: Sort string (e.g. -views,day).
+	:param strict: Also report the names missing from the index (see unknown_names) as problems.
+	:return: List of problems, each with the closest valid names when a name is unknown. Empty if the query is valid.
+	"""
+	metric_list = _splitNames(metrics)
+	dimension_list = _splitNames(dimensions)
+	filter_names = [condition.split('==', 1)[0] for condition in filters.split(';')] if filters else []
+	problems = []
+
+	if not metric_list:
+		problems.append('at least one metric is required')
+	if strict:
+		problems.extend(unknown_names(metric_list, dimension_list, filters))
+
+	# only combinations of known names are checked
+	dimension_set = frozenset(dimension_list)
+	for dimension in dimension_list:
+		allowed = DIMENSION_METRICS.get(dimension)
+		if allowed is not None and not allowed.issuperset(metric_list):
+			problems.append('dimension {0!r} only supports the metrics {1}'.format(dimension, ', '.join(sorted(allowed))))
+		required_filter = DIMENSION_FILTERS.get(dimension)
+		if required_filter is not None and required_filter not in filter_names:
+			problems.append('dimension {0!r} requires a {1!r} filter'.format(dimension, required_filter))
+	for metric in metric_list:
+		required = METRIC_DIMENSIONS.get(metric)
+		if required is not None and not required & dimension_set:
+			problems.append('metric {0!r} requires one of the dimensions {1}'.format(metric, ', '.join(sorted(required))))
+		if metric in PLAYLIST_METRICS and 'isCurated' not in filter_names:
+			problems.append('metric {0!r} requires the filter isCurated==1'.format(metric))
+	for exclusive in EXCLUSIVE_DIMENSIONS:
+		if exclusive <= dimension_set:
+			problems.append('dimensions {0} cannot be combined'.format(', '.join(sorted(exclusive))))
+
+	selected = set(metric_list) | dimension_set
+	for field in _splitNames(sort):
+		if field.lstrip('-') not in selected:
+			problems.append('sort field {0!r} is not a requested metric or dimension{1}'.format(field, _suggest(field.lstrip('-'), selected)))
+	return problems
+
+def validate_query(metrics, dimensions=None, filters=None, sort=None, strict=False):
+	"""
+	Raise InvalidQuery if query_problems finds any problem. Unless strict, names missing from the
+	compatibility index are logged as warnings and the query is left for the API to accept or reject.
+	"""
+	if not strict:
+		for message in unknown_names(metrics, dimensions, filters):
+			logger.warning('%s; sending the query anyway', message)
+	problems = query_problems(metrics, dimensions, filters, sort, strict)
+	if problems:
+		raise InvalidQuery('; '.join(problems))
+
+
+def date_chunks(start_date, end_date, chunk_days):
+	"""
+	Split an inclusive YYYY-MM-DD date range into consecutive (start_date, end_date) chunks of chunk_days days.
+	"""
+	start = datetime.date.fromisoformat(start_date)
+	end = datetime.date.fromisoformat(end_date)
+	chunks = []
+	while start <= end:
+		chunk_end = min(end, start + datetime.timedelta(days=chunk_days - 1))
+		chunks.append((start.isoformat(), chunk_end.isoformat()))
+		start = chunk_end + datetime.timedelta(days=1)
+	return chunks
+
+
 class YTAnalytics:
 	SCOPES = ['https://www.googleapis.com/auth/youtube',
               'https://www.googleapis.com/auth/yt-analytics-monetary.readonly',
               'https://www.googleapis.com/auth/youtubepartner']
 	API_NAME = 'youtubeAnalytics'
 	API_VERSION = 'v2'
+	# rows per call when fetching the missing days of a day_cache query
+	DAY_CACHE_PAGE_SIZE = 10000
 
-	def __init__(self, client_secret_file):
+	def __init__(self, client_secret_file, cache=None, ledger=None, retry=None, rate_limit=None, output_format='rows', day_cache=None, validate=True):
+		"""
+		:param client_secret_file: OAuth client secret file.
+		:param cache: Optional response cache (ytinspector.cache.MemoryCache or SQLiteCache).
+		:param ledger: Optional ytinspector.quota.QuotaLedger charged for every API call.
+		:param retry: Optional ytinspector.retry.RetryPolicy for transient errors (5 retries with exponential backoff by default).
+		:param rate_limit: Optional requests per second cap, or a ytinspector.retry.TokenBucket shared between clients.
+		:param output_format: Format of the reports returned: rows -- Tuple(columns, rows); numpy -- dict of typed
+			NumPy arrays; pandas -- DataFrame; arrow -- pyarrow Table. Columns are typed from columnHeaders dataType.
+		:param day_cache: Optional ytinspector.analytics_cache.AnalyticsDayCache serving finalized days of reports locally.
+		:param validate: Check dimensions, metrics, filters and sort fields locally (validate_query) before calling the API.
+			Known-incompatible combinations raise InvalidQuery; names missing from the local tables only log a warning.
+		"""
+		if output_format not in OUTPUT_FORMATS:
+			raise YTAnalyticsException('output_format must be one of {0}'.format(', '.join(OUTPUT_FORMATS)))
 		self.client_secret_file = client_secret_file
+		self.output_format = output_format
+		self.day_cache = day_cache
+		self.validate = validate
 		self.service = None
+		self.executor = RequestExecutor(cache=cache, ledger=ledger, retry=retry, rate_limit=rate_limit)
+		self._local = threading.local()
 	   
 	def initService(self, prefix=None):
 		try:
@@ -100,8 +268,89 @@ class YTAnalytics:
 		except Exception as e:
 			raise YTAnalyticsException(e)
 
+	def _execute(self, request, http=None):
+		return self.executor.execute(request, http=http)
+
+	def _executeInThread(self, request):
+		"""Execute a request on a transport owned by the calling thread."""
+		http = getattr(self._local, 'http', None)
+		if http is None:
+			http = self._local.http = build_thread_http(self.service)
+		return self._execute(request, http=http)
+
+	@staticmethod
+	def _headersRows(response):
+		# rows is omitted when the report is empty
+		return response['columnHeaders'], response.get('rows', [])
+
+	def _format(self, column_headers, rows, output_format=None):
+		return format_report(column_headers, rows, output_format or self.output_format)
+
+	def _queryFields(self, metric_list, dimension_list):
+		"""Validate the metric and dimension lists of a query, returning them comma separated"""
+		if not self.service:
+			raise YTAnalyticsException('Service is not initialized.')
+
+		if not isinstance(metric_list, list):
+			raise YTAnalyticsException('metric_list must be a list')
+		else:
+			metrics = ','.join(metric_list)
+
+		if dimension_list is not None:
+			if not isinstance(dimension_list, list):
+				raise YTAnalyticsException('dimension_list must be a list')
+			else:    
+				dimensions = ','.join(dimension_list)
+		else:
+			dimensions = None
+		return metrics, dimensions
+
+	def _reportPages(self, page_size, execute=None, **params):
+		"""Run a report page by page (startIndex / maxResults) until a short page, returning (columns, rows)"""
+		execute = execute or self._execute
+		column_headers, rows = [], []
+		start_index = 1
+		while True:
+			response = execute(self.service.reports().query(ids='channel==MINE', startIndex=start_index, maxResults=page_size, **params))
+			column_headers, page_rows = self._headersRows(response)
+			rows.extend(page_rows)
+			if len(page_rows) < page_size:
+				return column_headers, rows
+			start_index += page_size
+
+	@staticmethod
+	def _stitch(reports):
+		"""Concatenate the (column_headers, rows) reports of consecutive date chunks"""
+		column_headers = reports[0][0] if reports else []
+		return column_headers, [row for report_headers, rows in reports for row in rows]
+
+	def _queryAll(self, chunks, page_size, max_workers, output_format=None, **params):
+		if len(chunks) == 1:
+			return self._format(*self._reportPages(page_size, startDate=chunks[0][0], endDate=chunks[0][1], **params), output_format)
+
+		def reportChunk(chunk):
+			return self._reportPages(page_size, self._executeInThread, startDate=chunk[0], endDate=chunk[1], **params)
+
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			return self._format(*self._stitch(list(executor.map(reportChunk, chunks))), output_format)
+
+	def _validate(self, params):
+		if self.validate:
+			validate_query(params['metrics'], params.get('dimensions'), params.get('filters'), params.get('sort'))
+
+	def _report(self, output_format=None, **params):
+		"""Run a reports().query against the authorized channel and return it in the output format"""
+		self._validate(params)
+		plan = self.day_cache.plan(params) if self.day_cache is not None else None
+		if plan is not None:
+			reports = [self._reportPages(self.DAY_CACHE_PAGE_SIZE, **fetch_params) for fetch_params in plan.fetches]
+			return self._format(*self.day_cache.merge(plan, reports), output_format)
+
+		response = self._execute(self.service.reports().query(ids='channel==MINE', **params))
+		return self._format(*self._headersRows(response), output_format)
+
 	def query(self, start_date, end_date, metric_list, 
-			  dimension_list=None, filters=None, max_results=1000, start_index=1, sort_by=None):
+			  dimension_list=None, filters=None, max_results=1000, start_index=1, sort_by=None, output_format=None):
 		"""
 			Query the YouTube Analytics API.
 			Args:
@@ -115,28 +364,14 @@ class YTAnalytics:
 				start_index int (optional): The 1-based index of the first entity to retrieve. (The default value is 1.) 
 										Use this parameter as a pagination mechanism along with the max-results parameter..
 				sort_by str (optional): A list of fields to sort by. (e.g. -views)
+				output_format str (optional): Overrides the client's output_format (rows, numpy, pandas, arrow).
 			Returns:
-				Tuple(columns, rows)
+				Tuple(columns, rows), or the columnar output_format
 		"""
-		if not self.service:
-			raise YTAnalyticsException('Service is not initialized.')
-
-		if not isinstance(metric_list, list):
-			raise YTAnalyticsException('metric_list must be a list')
-		else:
-			metrics = ','.join(metric_list)
-
-		if dimension_list is not None:
-			if not isinstance(dimension_list, list):
-				raise YTAnalyticsException('dimension_list must be a list')
-			else:    
-				dimensions = ','.join(dimension_list)
-		else:
-			dimensions = None
-		
+		metrics, dimensions = self._queryFields(metric_list, dimension_list)
 		try:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
+				output_format,
 				startDate=start_date,
 				endDate=end_date,
 				metrics=metrics,
@@ -145,10 +380,44 @@ class YTAnalytics:
 				maxResults=max_results,
 				startIndex=start_index,
 				sort=sort_by
-			).execute()
-			columns = [column['name'] for column in response['columnHeaders']]
-			rows = response['rows']
-			return columns, rows
+			)
+		except YTAnalyticsException:
+			raise
+		except Exception as e:
+			raise YTAnalyticsException(e)
+
+	def queryAll(self, start_date, end_date, metric_list, dimension_list=None, filters=None, sort_by=None,
+				 page_size=10000, chunk_days=None, max_workers=8, output_format=None):
+		"""
+			Query the YouTube Analytics API and return every row, paging through the results.
+			Long reports with a day dimension can be split into date range chunks fetched concurrently;
+			the chunks are stitched back together in date order.
+			Args:
+				start_date str: The start date for the query in the format YYYY-MM-DD.
+				end_date str: The end date for the query in the format YYYY-MM-DD.
+				metric_list list: YouTube Analytics metrics.
+				dimension_list list (optional): YouTube Analytics dimensions.
+				filters str (optional): Filters applied when retrieving YouTube Analytics data (e.g. country==IT).
+				sort_by str (optional): A list of fields to sort by. (e.g. -views) Applies within each chunk.
+				page_size int (optional): Rows requested per call (max-results).
+				chunk_days int (optional): Split the date range into chunks of this many days.
+										Requires the day dimension, since other reports aggregate over the whole range.
+				max_workers int (optional): Number of chunks fetched concurrently.
+				output_format str (optional): Overrides the client's output_format (rows, numpy, pandas, arrow).
+			Returns:
+				Tuple(columns, rows), or the columnar output_format
+		"""
+		metrics, dimensions = self._queryFields(metric_list, dimension_list)
+		if chunk_days is not None and 'day' not in (dimension_list or []):
+			raise YTAnalyticsException('chunk_days requires the day dimension')
+
+		params = dict(metrics=metrics, dimensions=dimensions, filters=filters, sort=sort_by)
+		self._validate(params)
+		try:
+			chunks = date_chunks(start_date, end_date, chunk_days) if chunk_days else [(start_date, end_date)]
+			return self._queryAll(chunks, page_size, max_workers, output_format, **params)
+		except YTAnalyticsException:
+			raise
 		except Exception as e:
 			raise YTAnalyticsException(e)
 
@@ -162,43 +431,33 @@ class YTAnalytics:
 			Tuple(columns, rows)		
 		"""
 		if is_yt_partner:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
 				startDate=start_date,
 				endDate=end_date,
 				metrics='views,comments,likes,dislikes,estimatedMinutesWatched,subscribersGained,subscribersLost,estimatedRevenue'
-			).execute()
+			)
 		else:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
 				startDate=start_date,
 				endDate=end_date,
 				metrics='views,comments,likes,dislikes,estimatedMinutesWatched,subscribersGained,subscribersLost'
-			).execute()			
-		columns = [column['name'] for column in response['columnHeaders']]
-		rows = response['rows']
-		return columns, rows
+			)
 
 	def summaryByCountry(self, start_date, end_date, country_code='us', is_yt_partner=False):
 		if is_yt_partner:
-			response = self.service.reports().query(
-							ids='channel==MINE',
-							startDate=start_date,
-							endDate=end_date,
-							metrics='views,likes,dislikes,estimatedMinutesWatched,estimatedRevenue',
-							filters='country=={0}'.format(country_code)
-						).execute()
+			return self._report(
+				startDate=start_date,
+				endDate=end_date,
+				metrics='views,likes,dislikes,estimatedMinutesWatched,estimatedRevenue',
+				filters='country=={0}'.format(country_code)
+			)
 		else:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
 				startDate=start_date,
 				endDate=end_date,
 				metrics='views,likes,dislikes,estimatedMinutesWatched,subscribersGained,subscribersLost',
 				filters='country=={0}'.format(country_code)
-			).execute()
-		columns = [column['name'] for column in response['columnHeaders']]
-		rows = response['rows']
-		return columns, rows
+			)
 
 	def top200Videos(self, start_date, end_date, sortby_field='views', is_yt_partner=False):
 		"""
@@ -211,67 +470,47 @@ class YTAnalytics:
 				Tuple(columns, rows)
 		"""
 		if is_yt_partner:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
 				startDate=start_date,
 				endDate=end_date,
 				metrics='views,comments,likes,dislikes,estimatedMinutesWatched,subscribersGained,subscribersLost',
 				dimensions='video',
 				sort='-{0}'.format(sortby_field),
 				maxResults=200
-			).execute()
-			columns = [column['name'] for column in response['columnHeaders']]
-			rows = response['rows']
-			return columns, rows		
+			)
 		else:
-			response = self.service.reports().query(
-				ids='channel==MINE',
+			return self._report(
 				startDate=start_date,
 				endDate=end_date,
 				metrics='views,comments,likes,dislikes,estimatedMinutesWatched,subscribersGained,subscribersLost,estimatedRevenue',
 				dimensions='video',
 				sort='-{0}'.format(sortby_field),
 				maxResults=200
-			).execute()
-			columns = [column['name'] for column in response['columnHeaders']]
-			rows = response['rows']
-			return columns, rows
+			)
 
 	def playlistSummary(self, start_date, end_date, playlist_id=None):
 		if playlist_id is None:
-			response = self.service.reports().query(
-							ids='channel==MINE',
-							metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
-							startDate=start_date,
-							endDate=end_date,
-							filters="isCurated==1",
-						).execute()
-			columns = [column['name'] for column in response['columnHeaders']]
-			rows = response['rows']
-			return columns, rows				
-		response = self.service.reports().query(
-						ids='channel==MINE',
-						metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
-						startDate=start_date,
-						endDate=end_date,
-						filters="isCurated==1",
-						playlist='playlist=={0}'.format(playlist_id)
-					).execute()
-		columns = [column['name'] for column in response['columnHeaders']]
-		rows = response['rows']
-		return columns, rows
-
-	def top200Playlists(self, start_date, end_date, sortby_field='view'):
-		response = self.service.reports().query(
-						ids='channel==MINE',
-						dimensions='playlist',
-						metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
-						startDate=start_date,
-						endDate=end_date,
-						filters='isCurated==1',
-						maxResults=200,
-						sort='-{0}'.format(sortby_field)
-					).execute()		
-		columns = [column['name'] for column in response['columnHeaders']]
-		rows = response['rows']
-		return columns, rows
\ No newline at end of file
+			return self._report(
+				metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
+				startDate=start_date,
+				endDate=end_date,
+				filters="isCurated==1",
+			)
+		return self._report(
+			metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
+			startDate=start_date,
+			endDate=end_date,
+			filters="isCurated==1",
+			playlist='playlist=={0}'.format(playlist_id)
+		)
+
+	def top200Playlists(self, start_date, end_date, sortby_field='views'):
+		return self._report(
+			dimensions='playlist',
+			metrics='playlistStarts,estimatedMinutesWatched,views,viewsPerPlaylistStart',
+			startDate=start_date,
+			endDate=end_date,
+			filters='isCurated==1',
+			maxResults=200,
+			sort='-{0}'.format(sortby_field)
+		)